@@ -10,15 +10,53 @@ Características principales:
 - Simulación asíncrona para permitir animaciones sin bloquear el servidor.
 - Visualización de banderas de países mediante FlagCDN.
 - Registro en tiempo real de los eventos del sorteo.
+- Panel de consultas condicionales sobre sorteos simulados y almacenados (`consultas_sorteos`).
+- Métricas de Prometheus en `/metrics` (`metricas`).
+- Perfilador por muestreo bajo demanda en `/admin/perfil` (`perfilador`).
+- Control de admisión: límite de sorteos animados simultáneos, cola con posición en el banner y
+  sorteo instantáneo precalculado cuando la cola se llena (`admision`).
+- Panel de probabilidades en vivo: tras cada bolita, P(grupo) y rivales probables de los equipos que
+  faltan, estimados fuera del event loop desde el estado actual (`probabilidades_vivo`).
+- Sala de transmisión en `/sala`: un sorteo del anfitrión visto por muchos clientes (`sala_transmision`).
+- Resaltados, banner y fila del bombo agrupados por ventana de 100 ms (`lotes_ui`): menos mensajes de websocket por sorteo.
+- Enlace permanente a cada sorteo terminado: `/draw/<token>`, página estática cacheada con ETag (`permalinks`).
+- Precalentamiento al arrancar (datos, tablas, núcleo compilado, reserva instantánea, cachés de factibilidad y
+  probabilidades) y `/ready` para el health check: 503 hasta terminar (`arranque`).
+- Panel "¿Qué pasaría si...?": fijar equipos a mano ("BRA en C; NOR con MEX"), ver al instante si es legal
+  y P(grupo)/rivales de los demás con esas fijaciones (`fijaciones`, también en `POST /api/que-pasaria`).
 """
 
+import arranque  # primero: marca el comienzo del arranque, antes de leer los datos
+import os
+import json
+import time
+import multiprocessing
 import asyncio
 import random
-import string
-import pandas as pd
-from nicegui import ui, app
-from simular_bombos import df_bombos
-from simular_sorteo_func import checker_validez_grupo, lookahead
+from fastapi import Request
+from nicegui import ui, app, run, background_tasks
+from simular_bombos import df_bombos, CONFEDERACIONES
+from formato_torneo import WC2026
+from simular_sorteo_func import (esqueleto_sorteo, eventos_bombo_1, eventos_bombo_n,
+                                 InicioBombo, BolaSorteada, GrupoRechazado, EquipoColocado)
+from consultas_sorteos import indice_para
+import sorteo_rapido
+import instrumentacion
+import metricas
+import perfilador
+import sala_transmision
+from sala_transmision import SalaTransmision, INSTANTANEA, COOKIE_ANFITRION
+from admision import ControlAdmision, ResultadosPrecalculados
+from instrumentacion import ContadoresSolver
+from lotes_ui import LoteUI
+import probabilidades_vivo
+from probabilidades_vivo import CacheProbabilidades
+from factibilidad_acotada import CacheFactibilidad, ComprobadorAcotado
+import permalinks
+import fijaciones
+
+ARRANQUE = arranque.Arranque()
+ARRANQUE.marcar('importar y leer datos')
 
 # --- Configuración y Estilos ---
 # Definimos estilos CSS en línea para mantener el código autocontenido y facilitar la personalización.
@@ -29,6 +67,11 @@ SLOT_STYLE = "padding: 4px; margin: 2px; border-bottom: 1px solid #444; font-siz
 HIGHLIGHT_STYLE = "background-color: #00c752;"
 DISCARDED_STYLE = "background-color: #ea1e63;"  # Nuevo color para descarte
 
+# Formato del torneo que se sortea (grupos, bombos, anfitriones y cupos; ver formato_torneo.py)
+FORMATO = WC2026
+# Corrida almacenada (ver almacen_resultados.py) sobre la que trabaja el panel de consultas
+DIRECTORIO_CONSULTAS = os.getenv("WC_CORRIDA_CONSULTAS", "03_resultados/corrida_01")
+
 # --- Datos y Mapeos ---
 # Diccionario para mapear códigos FIFA (3 letras) a códigos ISO (2 letras) para obtener las banderas.
 # Esto es necesario porque FlagCDN utiliza códigos ISO.
@@ -75,16 +118,15 @@ class SorteoManager:
 
     def reset(self):
         """Reinicia el estado a los valores iniciales para un nuevo sorteo."""
-        self.grupos = list(string.ascii_uppercase[:12])  # Grupos A-L
-        self.grupos_dict = {g: [] for g in self.grupos}  # Equipos en cada grupo
-        # Slots disponibles (ej: A1, A2, A3, A4)
-        self.bombos_slots = {g: [f"{g}{i}" for i in range(1, 5)] for g in self.grupos}
-        self.asignaciones = {}
+        # Equipos en cada grupo, asignaciones y slots disponibles (ej: A1, A2, A3, A4)
+        self.grupos_dict, self.asignaciones, self.bombos_slots = esqueleto_sorteo(FORMATO)
+        self.grupos = list(self.grupos_dict)  # Grupos A-L
         self.current_bombo = 1
         self.processing = False  # Flag para evitar múltiples ejecuciones simultáneas
         self.logs = []
         self.finished = False
         self.current_team = None  # Equipo actual sorteado
+        self.contadores = ContadoresSolver()  # Contadores del solver de esta sesión
 
     def log(self, message):
         """Agrega un mensaje al registro de eventos."""
@@ -92,6 +134,138 @@ class SorteoManager:
         if len(self.logs) > 50:  # Mantenemos solo los últimos 50 mensajes
             self.logs.pop(0)
 
+def consultar_rivales(directorio, equipo, dado):
+    """Rivales probables de `equipo` condicionados a `dado`. El índice se comparte entre sesiones."""
+    df = indice_para(directorio).rivales_probables(equipo, tuple(dado))
+    return df, df.attrs['n_condicionados']
+
+def pintar_tarjeta_grupo(card, g, teams):
+    """Dibuja la tarjeta del grupo `g` con sus equipos (lista de dicts codigo/slot/conf)."""
+    # Cambia el marco a verde si el grupo está completo
+    if len(teams) == FORMATO.slots_por_grupo:
+        card.style(CARD_STYLE_COMPLETE)
+    else:
+        card.style(CARD_STYLE)
+    card.clear()
+    with card:
+        ui.label(f"Grupo {g}").style("font-weight: bold; font-size: 1.2em; color: #333; margin-bottom: 5px;")
+        slot_map = {}
+        for t in teams:
+            slot_num = int(t['slot'][-1])
+            slot_map[slot_num] = t
+        for i in range(1, FORMATO.slots_por_grupo + 1):
+            team_data = slot_map.get(i)
+            with ui.row().classes('items-center no-wrap').style(SLOT_STYLE):
+                ui.label(f"{g}{i}").style("font-weight: bold; margin-right: 6px; min-width: 25px; color: #555;")
+                if team_data:
+                    code = team_data['codigo']
+                    iso = FIFA_TO_ISO.get(code, '').lower()
+                    if iso:
+                        ui.image(f"https://flagcdn.com/h24/{iso}.png").style("width: 24px; height: auto; margin-right: 8px; border-radius: 2px; box-shadow: 0 1px 2px rgba(0,0,0,0.2);")
+                    else:
+                        ui.icon('flag', size='xs').style("margin-right: 8px; color: #ccc;")
+                    ui.label(f"{code}").style("font-weight: bold; color: #000; margin-right: 4px;")
+                    ui.label(f"({team_data['conf']})").style("font-size: 0.8em; color: #666;")
+                else:
+                    ui.label("---").style("color: #aaa;")
+
+# Motor con todas las reglas (confederaciones y condición de Hall) para el sorteo rápido
+TABLA_RAPIDA = sorteo_rapido.TablaSorteo(df_bombos, FORMATO)
+
+
+def llenar_sorteo_rapido(state, al_actualizar=lambda: None, rng=random):
+    """
+    Sorteo rápido sobre un `SorteoManager`, sin dependencias de UI.
+
+    El sorteo lo resuelve `sorteo_rapido.sortear` (mismo procedimiento y reglas que el sorteo
+    animado) y se vuelca bombo por bombo. `al_actualizar` se invoca en los mismos puntos en que
+    la página refresca el banner y la lista del bombo; los benchmarks pasan un stub vacío.
+    """
+    t = TABLA_RAPIDA
+    grupo_de, slot_de = sorteo_rapido.sortear(t, rng)
+    for n in range(1, FORMATO.n_bombos + 1):
+        state.current_bombo = n
+        al_actualizar()
+        for i, eq in enumerate(t.equipos):
+            if t.bombo[i] != n:
+                continue
+            state.current_team = eq
+            grupo = t.grupos[grupo_de[i]]
+            slot = f"{grupo}{slot_de[i] + 1}"
+            conf = CONFEDERACIONES[eq]
+            state.asignaciones[eq] = {"grupo": grupo, "slot": slot, "conf": conf}
+            state.grupos_dict[grupo].append({"codigo": eq, "slot": slot, "conf": conf})
+            if slot in state.bombos_slots[grupo]:
+                state.bombos_slots[grupo].remove(slot)
+        state.current_team = None
+        state.current_bombo = None
+        al_actualizar()
+
+# --- Control de admisión de sorteos animados (compartido por todas las sesiones) ---
+ADMISION = ControlAdmision()
+RESERVA_INSTANTANEA = ResultadosPrecalculados(df_bombos)
+
+metricas.Medidor('admision_activos', "Sorteos animados en curso", funcion=lambda: ADMISION.activos)
+metricas.Medidor('admision_cola', "Sorteos animados esperando turno", funcion=lambda: len(ADMISION.cola))
+metricas.Contador('admision_rechazados_total', "Pedidos desviados a sorteo instantáneo por cola llena",
+                 funcion=lambda: ADMISION.rechazados)
+
+# --- Factibilidad con plazo por bolita (caché de estados compartida por todas las sesiones) ---
+CACHE_FACTIBILIDAD = CacheFactibilidad()
+for origen in ('cache', 'exacta', 'respaldo'):
+    metricas.Contador(f'factibilidad_{origen}_total', f"Comprobaciones de factibilidad respondidas por {origen}",
+                     funcion=lambda origen=origen: CACHE_FACTIBILIDAD.origenes[origen])
+
+# --- Probabilidades en vivo (caché compartida por todas las sesiones) ---
+CACHE_PROBABILIDADES = CacheProbabilidades()
+LATENCIA_PROBABILIDADES = metricas.Histograma(
+    'probabilidades_vivo_segundos', "Tiempo desde la bolita hasta tener sus probabilidades en vivo")
+metricas.Contador('probabilidades_cache_aciertos_total', "Estados de sorteo con probabilidades ya calculadas",
+                 funcion=lambda: CACHE_PROBABILIDADES.aciertos)
+
+async def probabilidades_para(codificado):
+    """Probabilidades del estado `codificado`, de la caché o estimadas en el pool de procesos."""
+    resultado = CACHE_PROBABILIDADES.get(codificado)
+    if resultado is None:
+        resultado = await run.cpu_bound(probabilidades_vivo.estimar, codificado)
+        if resultado is not None:
+            CACHE_PROBABILIDADES.put(codificado, resultado)
+    return resultado
+
+async def precalentar_probabilidades():
+    """Arranca el worker del pool y deja en caché el estado inicial (el primero que pide cada sorteo)."""
+    await probabilidades_para(probabilidades_vivo.codificar(esqueleto_sorteo()[0]))
+
+# Los workers solo corren funciones puras de `probabilidades_vivo`; con spawn volverían a importar
+# este script como __mp_main__ (y con él ui.run)
+if 'fork' in multiprocessing.get_all_start_methods():
+    run.process_pool_start_method = 'fork'
+
+# --- Precalentamiento del arranque (/ready da 503 hasta que termina) ---
+async def precalentar():
+    """
+    Fases del arranque en frío, en hilos para que el event loop siga atendiendo /ready.
+    El núcleo se compila en este proceso antes del primer `run.cpu_bound`: con fork, los workers
+    del pool nacen con las tablas y el núcleo ya compilado.
+    """
+    ARRANQUE.marcar('configurar app y arrancar servidor')
+    with ARRANQUE.fase('tablas de reglas'):
+        await run.io_bound(lambda: (probabilidades_vivo.tabla(), permalinks.tabla()))
+    if os.path.isdir(DIRECTORIO_CONSULTAS):
+        with ARRANQUE.fase('índice de consultas'):
+            await run.io_bound(indice_para, DIRECTORIO_CONSULTAS)
+    with ARRANQUE.fase('núcleo compilado'):
+        await run.io_bound(lambda: probabilidades_vivo.nucleo().sortear_lote(1))
+    with ARRANQUE.fase('reserva instantánea'):
+        await run.io_bound(RESERVA_INSTANTANEA.preparar)
+    with ARRANQUE.fase('caché de factibilidad'):
+        await run.io_bound(arranque.calentar_factibilidad, df_bombos, CACHE_FACTIBILIDAD)
+    with ARRANQUE.fase('pool y probabilidades del estado inicial'):
+        await precalentar_probabilidades()
+    ARRANQUE.terminar()
+
+app.on_startup(precalentar)
+
 # --- Página Principal ---
 @ui.page('/')
 def index():
@@ -107,35 +281,73 @@ def index():
 
     # Estado local para esta sesión
     state = SorteoManager()
+    cliente = ui.context.client
     group_cards = {}
     log_container = None
     draw_button = None
     current_team_banner = None
+    banner_label = None
+    bolas_bombo = {'bombo': None, 'etiquetas': {}}  # Fila del bombo mostrada y sus etiquetas
+    lote = LoteUI()  # Cambios de estilo/texto agrupados por ventana (menos mensajes de websocket)
     bombo_list_container = None  # Nuevo contenedor para la lista fija
+    consulta_dado = None
+    consulta_equipo = None
+    consulta_info = None
+    consulta_tabla = None
+    prob_panel = None
+    prob_equipo = None
+    prob_info = None
+    prob_grupos = {}
+    prob_tabla = None
+    enlace_compartir = None
+    fijar_texto = None
+    fijar_equipo = None
+    fijar_info = None
+    fijar_grupos = {}
+    fijar_tabla = None
+    fijar_ejemplo = None
+    # Último pedido de probabilidades (estado codificado, instante), cálculo en curso y último resultado
+    prob_vivo = {'pedido': None, 'tarea': None, 'ultimo': None}
 
-    # Use mutable objects for pause/step flags to avoid UnboundLocalError
-    paused = {'value': False}
+    # Pausa: el sorteo espera en `no_pausado` (sin sondeo); Step deja pasar un solo paso
+    no_pausado = asyncio.Event()
+    no_pausado.set()
     step_requested = {'value': False}
-    auto_play = {'value': False}
     speed_multiplier = {'value': 1.0}  # Multiplicador de velocidad (1.0 = velocidad normal)
+    tareas_sesion = set()  # Sorteos/consultas en curso de esta sesión
 
     def pause_resume():
-        paused['value'] = not paused['value']
-        auto_play['value'] = False
+        if no_pausado.is_set():
+            no_pausado.clear()
+        else:
+            no_pausado.set()
 
     def step_once():
-        step_requested['value'] = True
-        auto_play['value'] = False
+        if not no_pausado.is_set():
+            step_requested['value'] = True
+            no_pausado.set()
 
     def play_auto():
-        paused['value'] = False
-        auto_play['value'] = True
+        no_pausado.set()
 
     async def maybe_pause():
-        while paused['value'] and not step_requested['value'] and not auto_play['value']:
-            await asyncio.sleep(0.1)
+        await no_pausado.wait()
         if step_requested['value']:
             step_requested['value'] = False
+            no_pausado.clear()
+
+    def liberar_sesion():
+        """
+        Se invoca cuando NiceGUI elimina el cliente (pestaña cerrada y sin reconexión).
+        Cancela los sorteos en curso de la sesión y suelta su estado.
+        """
+        for tarea in list(tareas_sesion):
+            tarea.cancel()
+        tareas_sesion.clear()
+        state.reset()
+        state.logs.clear()
+
+    cliente.on_delete(liberar_sesion)
 
     # --- Funciones Auxiliares de UI ---
     def refresh_groups_ui(only_group=None):
@@ -143,59 +355,31 @@ def index():
         Actualiza la visualización de los grupos.
         Si only_group se especifica, solo actualiza ese grupo.
         """
+        lote.vaciar()  # los estilos pendientes no deben pisar la tarjeta recién pintada
         grupos_a_actualizar = [only_group] if only_group else state.grupos
         for g in grupos_a_actualizar:
             card = group_cards.get(g)
             if card:
-                # Cambia el marco a verde si el grupo está completo
-                if len(state.grupos_dict[g]) == 4:
-                    card.style(CARD_STYLE_COMPLETE)
-                else:
-                    card.style(CARD_STYLE)
-                card.clear()
-                with card:
-                    ui.label(f"Grupo {g}").style("font-weight: bold; font-size: 1.2em; color: #333; margin-bottom: 5px;")
-                    teams = state.grupos_dict[g]
-                    slot_map = {}
-                    for t in teams:
-                        slot_num = int(t['slot'][-1])
-                        slot_map[slot_num] = t
-                    for i in range(1, 5):
-                        team_data = slot_map.get(i)
-                        with ui.row().classes('items-center no-wrap').style(SLOT_STYLE):
-                            ui.label(f"{g}{i}").style("font-weight: bold; margin-right: 6px; min-width: 25px; color: #555;")
-                            if team_data:
-                                code = team_data['codigo']
-                                iso = FIFA_TO_ISO.get(code, '').lower()
-                                if iso:
-                                    ui.image(f"https://flagcdn.com/h24/{iso}.png").style("width: 24px; height: auto; margin-right: 8px; border-radius: 2px; box-shadow: 0 1px 2px rgba(0,0,0,0.2);")
-                                else:
-                                    ui.icon('flag', size='xs').style("margin-right: 8px; color: #ccc;")
-                                ui.label(f"{code}").style("font-weight: bold; color: #000; margin-right: 4px;")
-                                ui.label(f"({team_data['conf']})").style("font-size: 0.8em; color: #666;")
-                            else:
-                                ui.label("---").style("color: #aaa;")
-
-    def update_current_team_banner(finalizado=False):
-        """Actualiza el banner fijo con el equipo actual sorteado y el número de bombo."""
-        if current_team_banner:
-            current_team_banner.clear()
-            with current_team_banner:
-                if finalizado:
-                    ui.label("Sorteo finalizado").style(
-                        "font-size: 1.2em; font-weight: bold; color: #b486ff; padding: 8px;"
-                    )
-                else:
-                    bombo = state.current_bombo
-                    if bombo in [1, 2, 3, 4]:
-                        equipo_txt = f"Equipo actual sorteado: {state.current_team}" if state.current_team else "Esperando sorteo..."
-                        ui.label(f"{equipo_txt}   |   Bombo: {bombo}").style(
-                            "font-size: 1.2em; font-weight: bold; color: #b486ff; padding: 8px;"
-                        )
-                    else:
-                        ui.label("Esperando sorteo...").style(
-                            "font-size: 1.2em; font-weight: bold; color: #b486ff; padding: 8px;"
-                        )
+                pintar_tarjeta_grupo(card, g, state.grupos_dict[g])
+
+    def update_current_team_banner(finalizado=False, texto=None):
+        """Actualiza el banner fijo con el equipo actual sorteado y el número de bombo (o con `texto`)."""
+        if banner_label is None:
+            return
+        if not texto:
+            if finalizado:
+                texto = "Sorteo finalizado"
+            elif state.current_bombo in [1, 2, 3, 4]:
+                equipo_txt = f"Equipo actual sorteado: {state.current_team}" if state.current_team else "Esperando sorteo..."
+                texto = f"{equipo_txt}   |   Bombo: {state.current_bombo}"
+            else:
+                texto = "Esperando sorteo..."
+        lote.texto(banner_label, texto)
+
+    def estilo_bola(color, bg, border):
+        return (f"font-size:1em;margin:2px 8px;padding:4px 12px;border-radius:6px;"
+                f"color:{color};background:{bg};border:{border};"
+                "font-weight:bold;")
 
     def update_bombo_list_ui(descolorear=None, equipo_actual=None):
         """
@@ -203,36 +387,32 @@ def index():
         Si descolorear, ese equipo se muestra gris aunque no esté asignado.
         Si equipo_actual, lo colorea especial mientras se asigna.
         Cuando ya se seleccionó el equipo del bombo, se colorea gris tenue.
+        La fila solo se reconstruye al cambiar de bombo; dentro de un bombo se cambian estilos.
         """
         if bombo_list_container:
-            bombo_list_container.clear()
             bombo = state.current_bombo
-            if bombo in [1, 2, 3, 4]:
-                equipos_bombo = list(df_bombos[df_bombos['bombo'] == bombo]['codigo'])
-                sorteados = set(state.asignaciones.keys())
-                with bombo_list_container:
-                    with ui.row().classes('w-full justify-center').style("flex-wrap:wrap;"):
-                        for eq in equipos_bombo:
-                            # Si es el equipo actual, lo coloreamos especial
-                            if equipo_actual == eq:
-                                color = "#fff"
-                                border = "2px solid #faae96"
-                                bg = "#faae96"
-                            # Si ya fue sorteado, gris tenue
-                            elif eq in sorteados or descolorear == eq:
-                                color = "#bbb"
-                                border = "2px solid #bbb"
-                                bg = "#ededed"
-                            else:
-                                color = "#00c752"
-                                border = "2px solid #b486ff"
-                                bg = "#6101eb"
-                            ui.label(eq).style(
-                                f"font-size:1em;margin:2px 8px;padding:4px 12px;border-radius:6px;"
-                                f"color:{color};background:{bg};border:{border};"
-                                "font-weight:bold;"
-                            )
+            if bombo != bolas_bombo['bombo']:
+                lote.vaciar()
+                bombo_list_container.clear()
+                bolas_bombo['bombo'] = bombo
+                bolas_bombo['etiquetas'] = {}
+                if bombo in [1, 2, 3, 4]:
+                    with bombo_list_container:
+                        with ui.row().classes('w-full justify-center').style("flex-wrap:wrap;"):
+                            for eq in df_bombos.loc[df_bombos['bombo'] == bombo, 'codigo']:
+                                bolas_bombo['etiquetas'][eq] = ui.label(eq)
             # Si no hay bombo válido, no muestra nada
+            sorteados = state.asignaciones
+            for eq, etiqueta in bolas_bombo['etiquetas'].items():
+                # Si es el equipo actual, lo coloreamos especial
+                if equipo_actual == eq:
+                    estilo = estilo_bola("#fff", "#faae96", "2px solid #faae96")
+                # Si ya fue sorteado, gris tenue
+                elif eq in sorteados or descolorear == eq:
+                    estilo = estilo_bola("#bbb", "#ededed", "2px solid #bbb")
+                else:
+                    estilo = estilo_bola("#00c752", "#6101eb", "2px solid #b486ff")
+                lote.estilo(etiqueta, estilo)
 
     async def highlight_group(group_name):
         """
@@ -243,13 +423,13 @@ def index():
         """
         if group_name in group_cards:
             card = group_cards[group_name]
-            card.style(HIGHLIGHT_STYLE)
+            lote.estilo(card, HIGHLIGHT_STYLE)
             await asyncio.sleep(0.5 * speed_multiplier['value'])
             # Restaura al estilo correcto según si está completo o no
-            if len(state.grupos_dict[group_name]) == 4:
-                card.style(CARD_STYLE_COMPLETE)
+            if len(state.grupos_dict[group_name]) == FORMATO.slots_por_grupo:
+                lote.estilo(card, CARD_STYLE_COMPLETE)
             else:
-                card.style(CARD_STYLE)
+                lote.estilo(card, CARD_STYLE)
             # Pausa adicional antes de continuar con la asignación
             await asyncio.sleep(0.15 * speed_multiplier['value'])
 
@@ -259,91 +439,71 @@ def index():
         """
         if group_name in group_cards:
             card = group_cards[group_name]
-            card.style(DISCARDED_STYLE)
+            lote.estilo(card, DISCARDED_STYLE)
             await asyncio.sleep(0.3 * speed_multiplier['value'])
             # Restaura al estilo correcto según si está completo o no
-            if len(state.grupos_dict[group_name]) == 4:
-                card.style(CARD_STYLE_COMPLETE)
+            if len(state.grupos_dict[group_name]) == FORMATO.slots_por_grupo:
+                lote.estilo(card, CARD_STYLE_COMPLETE)
             else:
-                card.style(CARD_STYLE)
+                lote.estilo(card, CARD_STYLE)
 
     # --- Funciones de Lógica del Sorteo (Clausuras sobre `state`) ---
     
-    async def run_bombo_1():
-        """
-        Ejecuta la lógica de sorteo para el Bombo 1 (Cabezas de Serie).
-        
-        El Bombo 1 tiene reglas especiales:
-        1. Los anfitriones (MEX, CAN, USA) se asignan a grupos predefinidos.
-        2. El resto de cabezas de serie se asignan aleatoriamente a los grupos restantes.
-        """
-        state.log("--- INICIANDO BOMBO 1 ---")
-        update_bombo_list_ui()
-        state.current_bombo = 1
-        update_current_team_banner()
-        update_bombo_list_ui()
-        await asyncio.sleep(0.35 * speed_multiplier['value'])  # Espera antes de iniciar el primer equipo
-        await maybe_pause()
-        
-        # 1. Asignar Anfitriones (Regla fija)
-        anfitriones = {"MEX": "A1", "CAN": "B1", "USA": "D1"}
-        
-        for eq, slot in anfitriones.items():
-            await maybe_pause()
-            await asyncio.sleep(0.35 * speed_multiplier['value'])
-            state.current_team = eq
+    def siguiente_evento(generador):
+        """Avanza el generador del sorteo con los contadores de esta sesión activos (None al terminar)."""
+        with instrumentacion.activar(state.contadores):
+            return next(generador, None)
+
+    async def animar_evento(evento):
+        """Traduce un evento de `simular_sorteo_func` a la animación correspondiente."""
+        if isinstance(evento, InicioBombo):
+            state.log(f"--- INICIANDO BOMBO {evento.bombo} ---")
+            state.current_bombo = evento.bombo
             update_current_team_banner()
-            update_bombo_list_ui(equipo_actual=eq)
-            await asyncio.sleep(0.35 * speed_multiplier['value'])
-            conf = df_bombos.loc[df_bombos['codigo'] == eq, 'confederacion'].iloc[0]
-            grupo = slot[0]
-            # Previsualiza el marco verde si el grupo va a quedar completo
-            if len(state.grupos_dict[grupo]) == 3:
-                group_cards[grupo].style(CARD_STYLE_COMPLETE)
-            # Highlight antes de colocar el país (ahora incluye la pausa interna)
-            await highlight_group(grupo)
-            # Actualizar estado
-            state.asignaciones[eq] = {"grupo": grupo, "slot": slot, "conf": conf}
-            state.grupos_dict[grupo].append({"codigo": eq, "slot": slot, "conf": conf})
-            if slot in state.bombos_slots[grupo]:
-                state.bombos_slots[grupo].remove(slot)
-            state.log(f"ANFITRIÓN: {eq} asignado a {grupo} ({slot})")
-            refresh_groups_ui(only_group=grupo)
-            await asyncio.sleep(0.2 * speed_multiplier['value'])
-        # 2. Resto del Bombo 1
-        eq_restantes_bombo_1 = df_bombos[
-            (~df_bombos['codigo'].isin(['MEX', 'USA', 'CAN'])) &
-            (df_bombos['bombo'] == 1)
-        ]
-        
-        # Grupos disponibles (excluyendo los de anfitriones)
-        grupos_disponibles = [g for g in state.bombos_slots.keys() if g not in ('A', 'B', 'D')]
-        
-        for grupo in grupos_disponibles:
+            update_bombo_list_ui()
+            await asyncio.sleep(0.35 * speed_multiplier['value'])  # Espera antes de iniciar el primer equipo
             await maybe_pause()
-            await asyncio.sleep(0.35 * speed_multiplier['value'])
-            eq_sorteado = eq_restantes_bombo_1['codigo'].sample(1).iloc[0]
-            state.current_team = eq_sorteado
+
+        elif isinstance(evento, BolaSorteada):
+            await maybe_pause()
+            await asyncio.sleep(0.35 * speed_multiplier['value'])  # Pausa un poco más corta para suspense
+            state.current_team = evento.equipo
             update_current_team_banner()
-            update_bombo_list_ui(equipo_actual=eq_sorteado)
+            update_bombo_list_ui(equipo_actual=evento.equipo)
             await asyncio.sleep(0.35 * speed_multiplier['value'])
-            fila_eq = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] == eq_sorteado].iloc[0]
-            conf = fila_eq['confederacion']
-            # Previsualiza el marco verde si el grupo va a quedar completo
-            if len(state.grupos_dict[grupo]) == 3:
-                group_cards[grupo].style(CARD_STYLE_COMPLETE)
+            if evento.bombo > 1:
+                state.log(f"Sorteando equipo: {evento.equipo}...")
+
+        elif isinstance(evento, GrupoRechazado):
+            # Restricción de confederación o lookahead (dejaría sin solución al resto del bombo)
+            await highlight_discarded_group(evento.grupo)
+
+        elif isinstance(evento, EquipoColocado):
+            grupo = evento.grupo
+            # El estado ya incluye al equipo: marco verde si el grupo quedó completo
+            if len(state.grupos_dict[grupo]) == FORMATO.slots_por_grupo:
+                lote.estilo(group_cards[grupo], CARD_STYLE_COMPLETE)
             await highlight_group(grupo)
-            # Actualizar estado después del highlight
-            eq_restantes_bombo_1 = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] != eq_sorteado]
-            slot = grupo + "1"
-            state.asignaciones[eq_sorteado] = {"grupo": grupo, "slot": slot, "conf": conf}
-            state.grupos_dict[grupo].append({"codigo": eq_sorteado, "slot": slot, "conf": conf})
-            if slot in state.bombos_slots[grupo]:
-                state.bombos_slots[grupo].remove(slot)
-            state.log(f"SORTEO: {eq_sorteado} cabeza de serie Grupo {grupo}")
+            if evento.anfitrion:
+                state.log(f"ANFITRIÓN: {evento.equipo} asignado a {grupo} ({evento.slot})")
+            elif evento.bombo == 1:
+                state.log(f"SORTEO: {evento.equipo} cabeza de serie Grupo {grupo}")
+            else:
+                state.log(f"-> Asignado a Grupo {grupo} (Slot {evento.slot})")
+                _, _, t_bola = state.contadores.tiempos_bola[-1]
+                metricas.LATENCIA_BOLA.observe(t_bola, bombo=evento.bombo)
             refresh_groups_ui(only_group=grupo)
+            pedir_probabilidades()
             await asyncio.sleep(0.2 * speed_multiplier['value'])
 
+    async def animar_bombo(generador):
+        """Consume los eventos de un bombo animándolos uno a uno y limpia el banner al final."""
+        while True:
+            evento = siguiente_evento(generador)
+            if evento is None:
+                break
+            await animar_evento(evento)
+
         state.current_team = None
         update_current_team_banner()
         state.current_bombo = None
@@ -351,6 +511,17 @@ def index():
         await asyncio.sleep(0.35 * speed_multiplier['value'])  # Espera al finalizar el bombo
         await maybe_pause()
 
+    async def run_bombo_1():
+        """
+        Ejecuta la lógica de sorteo para el Bombo 1 (Cabezas de Serie).
+        
+        El Bombo 1 tiene reglas especiales:
+        1. Los anfitriones (MEX, CAN, USA) se asignan a grupos predefinidos.
+        2. El resto de cabezas de serie se asignan aleatoriamente a los grupos restantes.
+        """
+        await animar_bombo(eventos_bombo_1(df_bombos, state.grupos_dict, state.asignaciones, state.bombos_slots,
+                                           formato=FORMATO))
+
     async def run_bombo_n(n):
         """
         Ejecuta la lógica de sorteo para los Bombos 2, 3 y 4.
@@ -358,94 +529,35 @@ def index():
         Args:
             n (int): Número de bombo a sortear.
             
-        Lógica:
+        Lógica (en `eventos_bombo_n`, aquí solo se anima cada evento):
         1. Itera sobre los grupos en orden (A-L).
         2. Para cada grupo, extrae una bola (equipo) del bombo actual.
-        3. Verifica restricciones geográficas y realiza 'lookahead' para evitar bloqueos.
+        3. Verifica restricciones geográficas y realiza 'lookahead' para evitar bloqueos, con
+           tiempo acotado por bolita (`factibilidad_acotada`) para no congelar la animación.
         4. Asigna el equipo a un grupo válido y a un slot aleatorio dentro de ese grupo.
         """
-        state.log(f"--- INICIANDO BOMBO {n} ---")
-        update_bombo_list_ui()
-        state.current_bombo = n
-        update_current_team_banner()
-        update_bombo_list_ui()
-        await asyncio.sleep(0.35 * speed_multiplier['value'])  # Espera antes de iniciar el primer equipo
-        await maybe_pause()
-        
-        eq_bombo = df_bombos[df_bombos['bombo'] == n].copy()
-        grupos_orden = list(state.bombos_slots.keys())
-        
-        # Intentamos llenar un cupo en cada grupo
-        for _ in grupos_orden:
-            if eq_bombo.empty: break
-                
-            await asyncio.sleep(0.35 * speed_multiplier['value']) # Pausa un poco más corta para suspense
-            await maybe_pause()
-            
-            # Sacar equipo del bombo
-            eq_sorteado = eq_bombo['codigo'].sample(1).iloc[0]
-            state.current_team = eq_sorteado
-            update_current_team_banner()
-            update_bombo_list_ui(equipo_actual=eq_sorteado)
-            await asyncio.sleep(0.35 * speed_multiplier['value'])
-            eq_bombo = eq_bombo[eq_bombo['codigo'] != eq_sorteado]
-            
-            state.log(f"Sorteando equipo: {eq_sorteado}...")
-            
-            grupo_asignado = None
-            
-            # Buscar grupo válido
-            for g in grupos_orden:
-                # 1. Verificar si el grupo ya está lleno para este nivel de bombo
-                if len(state.grupos_dict[g]) >= n:
-                    continue
-                
-                # 2. Verificar restricciones de confederación (ej: no más de 1 de CONMEBOL)
-                if not checker_validez_grupo(g, eq_sorteado, state.grupos_dict, verbose=False):
-                    await highlight_discarded_group(g)
-                    continue
-                
-                # 3. Lookahead: Verificar si esta asignación bloquearía el sorteo futuro
-                remaining_teams = list(eq_bombo['codigo'])
-                if not lookahead(g, eq_sorteado, remaining_teams, state.grupos_dict, state.bombos_slots, n):
-                    await highlight_discarded_group(g)
-                    continue
-                
-                grupo_asignado = g
-                break
-                
-            if grupo_asignado is None:
-                state.log(f"ERROR CRÍTICO: No se encontró grupo para {eq_sorteado}")
-                ui.notify(f"Error: No valid group for {eq_sorteado}", type='negative')
-                return
-            # Previsualiza el marco verde si el grupo va a quedar completo
-            if len(state.grupos_dict[grupo_asignado]) == 3:
-                group_cards[grupo_asignado].style(CARD_STYLE_COMPLETE)
-            await highlight_group(grupo_asignado)
-            # Actualizar estado después del highlight
-            slot_sorteado = random.choice(state.bombos_slots[grupo_asignado])
-            state.bombos_slots[grupo_asignado].remove(slot_sorteado)
-            conf_sorteado = df_bombos.loc[df_bombos['codigo'] == eq_sorteado, 'confederacion'].iloc[0]
-            state.grupos_dict[grupo_asignado].append({
-                "codigo": eq_sorteado,
-                "slot": slot_sorteado,
-                "conf": conf_sorteado
-            })
-            state.asignaciones[eq_sorteado] = {
-                "grupo": grupo_asignado,
-                "slot": slot_sorteado,
-                "conf": conf_sorteado
-            }
-            state.log(f"-> Asignado a Grupo {grupo_asignado} (Slot {slot_sorteado})")
-            refresh_groups_ui(only_group=grupo_asignado)
-            await asyncio.sleep(0.2 * speed_multiplier['value'])
+        await animar_bombo(eventos_bombo_n(n, df_bombos, state.bombos_slots, state.grupos_dict, state.asignaciones,
+                                           factibilidad=ComprobadorAcotado(CACHE_FACTIBILIDAD), formato=FORMATO))
 
-        state.current_team = None
-        update_current_team_banner()
-        state.current_bombo = None
-        update_bombo_list_ui()
-        await asyncio.sleep(0.35 * speed_multiplier['value'])  # Espera al finalizar el bombo
-        await maybe_pause()
+    def actualizar_enlace_compartir():
+        """
+        Muestra el enlace permanente (/draw/<token>) cuando el sorteo de la sesión terminó. El
+        token se decodifica antes de mostrarlo: un sorteo que `/draw` rechazaría no tiene enlace.
+        """
+        if enlace_compartir is None:
+            return
+        enlace_compartir.clear()
+        if not state.finished:
+            return
+        try:
+            token = permalinks.token_de(state.grupos_dict)
+            permalinks.decodificar(token)
+        except ValueError as e:
+            state.log(f"Sin enlace permanente: {e}")
+            return
+        with enlace_compartir:
+            ui.link('Enlace permanente a este sorteo', f"/draw/{token}",
+                    new_tab=True).style('font-weight: bold; color: #6101eb;')
 
     async def start_simulation():
         """
@@ -455,34 +567,84 @@ def index():
         Ejecuta secuencialmente el sorteo de los bombos 1, 2, 3 y 4.
         """
         if state.processing: return
+        # Control de admisión: con la cola llena se muestra un sorteo precalculado al instante
+        turno = ADMISION.solicitar()
+        if turno is None:
+            mostrar_sorteo_instantaneo()
+            return
         state.processing = True
+        tarea = asyncio.current_task()
+        tareas_sesion.add(tarea)
         if draw_button: draw_button.disable()
         state.reset()
         refresh_groups_ui()
         update_current_team_banner()
         update_bombo_list_ui()
+        actualizar_enlace_compartir()
+        pedir_probabilidades()
         
         try:
-            await run_bombo_1()
-            for n in range(2, 5):
-                await run_bombo_n(n)
+            await ADMISION.esperar(turno, al_avanzar=mostrar_posicion_en_cola)
+            with metricas.medir_sorteo('animado', cliente.id):
+                await run_bombo_1()
+                for n in range(2, FORMATO.n_bombos + 1):
+                    await run_bombo_n(n)
+            metricas.LATENCIA_SORTEO.observe(sum(state.contadores.tiempos_bombo.values()), modo='animado')
             state.log("--- SORTEO FINALIZADO ---")
+            resumen = state.contadores.resumen()
+            state.log(f"Solver: {resumen['nodos']} nodos, {resumen['backtracks']} backtracks, "
+                      f"bola más lenta {resumen['bola_max_equipo']} ({resumen['bola_max_s'] * 1000:.0f} ms)")
             ui.notify("Sorteo Finalizado con Éxito", type='positive')
+            ARRANQUE.sorteo_terminado('animado')
             state.finished = True
             update_current_team_banner(finalizado=True)
+            actualizar_enlace_compartir()
         except Exception as e:
             state.log(f"Error: {str(e)}")
             ui.notify(f"Error durante el sorteo: {e}", type='negative')
             raise e
         finally:
+            ADMISION.liberar(turno)
+            tareas_sesion.discard(tarea)
             state.processing = False
-            if draw_button: draw_button.enable()
-            update_bombo_list_ui()
+            # Si la sesión se cerró (sorteo cancelado) ya no hay elementos que actualizar
+            if not cliente.is_deleted:
+                if draw_button: draw_button.enable()
+                update_bombo_list_ui()
+
+    def mostrar_posicion_en_cola(posicion):
+        if posicion:
+            update_current_team_banner(texto=f"En cola: posición {posicion} de {len(ADMISION.cola)} "
+                                             f"({ADMISION.activos} sorteos animados en curso)")
+        else:
+            update_current_team_banner()
+
+    def mostrar_sorteo_instantaneo():
+        """Resultado precalculado (con todas las reglas) cuando la cola de sorteos animados está llena."""
+        metricas.SORTEOS_INICIADOS.inc(modo='instantaneo')
+        state.reset()
+        state.grupos_dict, state.asignaciones = RESERVA_INSTANTANEA.tomar()
+        for g in state.grupos:
+            state.bombos_slots[g] = []
+        state.finished = True
+        state.log("--- SORTEO INSTANTÁNEO (alta demanda) ---")
+        ui.notify("Hay mucha demanda: se muestra un sorteo instantáneo", type='info')
+        refresh_groups_ui()
+        update_current_team_banner(finalizado=True)
+        update_bombo_list_ui()
+        actualizar_enlace_compartir()
+        pedir_probabilidades()
+        metricas.SORTEOS_COMPLETADOS.inc(modo='instantaneo')
+        ARRANQUE.sorteo_terminado('instantaneo')
+
+    def actualizar_banner_y_bombo():
+        update_current_team_banner()
+        update_bombo_list_ui()
 
     async def fast_draw():
         """
         Sorteo rápido: llena todos los grupos sin animaciones ni esperas.
-        No respeta constraints de tiempo, pero sí las reglas de asignación.
+        No respeta constraints de tiempo, pero sí las reglas de asignación (motor de `sorteo_rapido`).
         """
         if state.processing: return
         state.processing = True
@@ -491,90 +653,149 @@ def index():
         refresh_groups_ui()
         update_current_team_banner()
         update_bombo_list_ui()
+        actualizar_enlace_compartir()
 
         try:
-            # BOMBO 1
-            state.current_bombo = 1
-            update_current_team_banner()
-            update_bombo_list_ui()
-            anfitriones = {"MEX": "A1", "CAN": "B1", "USA": "D1"}
-            for eq, slot in anfitriones.items():
-                state.current_team = eq
-                update_current_team_banner()
-                conf = df_bombos.loc[df_bombos['codigo'] == eq, 'confederacion'].iloc[0]
-                grupo = slot[0]
-                state.asignaciones[eq] = {"grupo": grupo, "slot": slot, "conf": conf}
-                state.grupos_dict[grupo].append({"codigo": eq, "slot": slot, "conf": conf})
-                if slot in state.bombos_slots[grupo]:
-                    state.bombos_slots[grupo].remove(slot)
-            eq_restantes_bombo_1 = df_bombos[
-                (~df_bombos['codigo'].isin(['MEX', 'USA', 'CAN'])) &
-                (df_bombos['bombo'] == 1)
-            ]
-            grupos_disponibles = [g for g in state.bombos_slots.keys() if g not in ('A', 'B', 'D')]
-            for grupo in grupos_disponibles:
-                eq_sorteado = eq_restantes_bombo_1['codigo'].sample(1).iloc[0]
-                state.current_team = eq_sorteado
-                fila_eq = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] == eq_sorteado].iloc[0]
-                conf = fila_eq['confederacion']
-                eq_restantes_bombo_1 = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] != eq_sorteado]
-                slot = grupo + "1"
-                state.asignaciones[eq_sorteado] = {"grupo": grupo, "slot": slot, "conf": conf}
-                state.grupos_dict[grupo].append({"codigo": eq_sorteado, "slot": slot, "conf": conf})
-                if slot in state.bombos_slots[grupo]:
-                    state.bombos_slots[grupo].remove(slot)
-            state.current_team = None
-            state.current_bombo = None
-            update_current_team_banner()
-            update_bombo_list_ui()
-
-            # BOMBO 2, 3, 4
-            for n in range(2, 5):
-                state.current_bombo = n
-                update_current_team_banner()
-                update_bombo_list_ui()
-                eq_bombo = df_bombos[df_bombos['bombo'] == n].copy()
-                grupos_orden = list(state.bombos_slots.keys())
-                for g in grupos_orden:
-                    if eq_bombo.empty: break
-                    # Busca grupo con slot disponible
-                    if len(state.grupos_dict[g]) >= n:
-                        continue
-                    eq_sorteado = eq_bombo['codigo'].sample(1).iloc[0]
-                    state.current_team = eq_sorteado
-                    eq_bombo = eq_bombo[eq_bombo['codigo'] != eq_sorteado]
-                    slot_sorteado = random.choice(state.bombos_slots[g])
-                    state.bombos_slots[g].remove(slot_sorteado)
-                    conf_sorteado = df_bombos.loc[df_bombos['codigo'] == eq_sorteado, 'confederacion'].iloc[0]
-                    state.grupos_dict[g].append({
-                        "codigo": eq_sorteado,
-                        "slot": slot_sorteado,
-                        "conf": conf_sorteado
-                    })
-                    state.asignaciones[eq_sorteado] = {
-                        "grupo": g,
-                        "slot": slot_sorteado,
-                        "conf": conf_sorteado
-                    }
-                state.current_team = None
-                state.current_bombo = None
-                update_current_team_banner()
-                update_bombo_list_ui()
+            with metricas.medir_sorteo('rapido', cliente.id):
+                with metricas.LATENCIA_SORTEO.cronometrar(modo='rapido'):
+                    llenar_sorteo_rapido(state, al_actualizar=actualizar_banner_y_bombo)
 
             state.log("--- SORTEO FINALIZADO ---")
             ui.notify("Sorteo rápido finalizado", type='positive')
+            ARRANQUE.sorteo_terminado('rapido')
             state.finished = True
             update_current_team_banner(finalizado=True)
             refresh_groups_ui()
             update_bombo_list_ui()
+            actualizar_enlace_compartir()
+            pedir_probabilidades()
         except Exception as e:
             state.log(f"Error: {str(e)}")
             ui.notify(f"Error durante el sorteo rápido: {e}", type='negative')
             raise e
         finally:
             state.processing = False
-            if draw_button: draw_button.enable()
-            update_bombo_list_ui()
+            if not cliente.is_deleted:
+                if draw_button: draw_button.enable()
+                update_bombo_list_ui()
+
+    def pedir_probabilidades():
+        """
+        Pide las probabilidades en vivo del estado actual. Si ya hay un cálculo en curso solo se
+        guarda el pedido más reciente: con la animación rápida se saltan estados intermedios en
+        lugar de acumular atraso.
+        """
+        if prob_panel is None or not prob_panel.value:
+            return  # Panel cerrado: no se calcula nada
+        prob_vivo['pedido'] = (probabilidades_vivo.codificar(state.grupos_dict), time.perf_counter())
+        if prob_vivo['tarea'] is None:
+            prob_vivo['tarea'] = background_tasks.create(actualizar_probabilidades(), name='probabilidades_vivo')
+            tareas_sesion.add(prob_vivo['tarea'])
+
+    async def actualizar_probabilidades():
+        try:
+            while prob_vivo['pedido'] is not None:
+                codificado, t0 = prob_vivo['pedido']
+                prob_vivo['pedido'] = None
+                resultado = await probabilidades_para(codificado)
+                if resultado is None or cliente.is_deleted:
+                    return
+                LATENCIA_PROBABILIDADES.observe(time.perf_counter() - t0)
+                prob_vivo['ultimo'] = (codificado, resultado)
+                pintar_probabilidades()
+        finally:
+            tareas_sesion.discard(prob_vivo['tarea'])
+            prob_vivo['tarea'] = None
+
+    def pintar_probabilidades():
+        """Muestra el último resultado para el equipo elegido en el panel."""
+        if prob_vivo['ultimo'] is None:
+            return
+        codificado, resultado = prob_vivo['ultimo']
+        tabla = probabilidades_vivo.tabla()
+        i_eq = tabla.idx[prob_equipo.value]
+        restantes = codificado.count(-1)
+        if codificado[i_eq] >= 0:
+            estado_txt = f"{prob_equipo.value} ya está en el Grupo {state.grupos[codificado[i_eq] // FORMATO.slots_por_grupo]}"
+        else:
+            estado_txt = f"{prob_equipo.value} aún no salió del bombo"
+        prob_info.text = (f"{estado_txt} · faltan {restantes} equipos · "
+                          f"{resultado.n_sorteos} sorteos simulados desde el estado actual")
+        probs = resultado.grupo[i_eq]
+        for k, g in enumerate(state.grupos):
+            prob_grupos[g].text = f"{g}: {100 * probs[k]:.0f}%"
+            prob_grupos[g].style(f"font-weight:bold;padding:2px 6px;border-radius:4px;"
+                                 f"background:rgba(97,1,235,{0.08 + 0.6 * probs[k]:.2f});")
+        rivales = resultado.rivales[i_eq]
+        orden = [j for j in rivales.argsort()[::-1] if rivales[j] > 0][:12]
+        prob_tabla.rows = [
+            {'rival': tabla.equipos[j], 'confederacion': CONFEDERACIONES[tabla.equipos[j]],
+             'probabilidad': f"{100 * rivales[j]:.1f}%"}
+            for j in orden
+        ]
+
+    async def run_consulta():
+        """
+        Ejecuta una consulta condicional sobre la corrida almacenada.
+        El cálculo corre fuera del event loop para no congelar la animación de otros clientes.
+        """
+        dado = [c.strip() for c in (consulta_dado.value or '').split(';') if c.strip()]
+        try:
+            df, n_condicionados = await run.io_bound(
+                consultar_rivales, DIRECTORIO_CONSULTAS, consulta_equipo.value, dado
+            )
+        except FileNotFoundError:
+            ui.notify("No hay sorteos almacenados en el servidor", type='warning')
+            return
+        except (json.JSONDecodeError, OSError) as e:
+            state.log(f"Consultas: no se pudo leer la corrida {DIRECTORIO_CONSULTAS}: {e!r}")
+            ui.notify(f"La corrida almacenada en el servidor no se puede leer ({type(e).__name__})", type='negative')
+            return
+        except (ValueError, KeyError) as e:
+            ui.notify(f"Consulta inválida: {e}", type='negative')
+            return
+
+        condicion_txt = ' y '.join(dado) if dado else 'sin condiciones'
+        consulta_info.text = f"{n_condicionados} sorteos cumplen: {condicion_txt}"
+        consulta_tabla.rows = [
+            {'rival': r.rival, 'confederacion': r.confederacion, 'probabilidad': f"{100 * r.probabilidad:.1f}%"}
+            for r in df.head(15).itertuples()
+        ]
+
+    async def run_que_pasaria():
+        """Evalúa las fijaciones del panel "¿Qué pasaría si...?" en el pool de procesos."""
+        r = await run.cpu_bound(fijaciones.evaluar, fijar_texto.value or '', fijar_equipo.value)
+        if cliente.is_deleted:
+            return
+        if r['estado'] == 'invalido':
+            ui.notify(f"Fijaciones inválidas: {r['motivo']}", type='negative')
+            return
+
+        if r['estado'] == 'ilegal':
+            fijar_info.text = f"Ilegal: {r['motivo']}"
+        elif r['estado'] == 'sin_completar':
+            fijar_info.text = "No se encontró ningún sorteo completo con estas fijaciones (la búsqueda no terminó)"
+        else:
+            fijados = ', '.join(f"{eq} {slot}" for eq, slot in r['fijados'].items()) or 'nada fijado'
+            fijar_info.text = (f"Legal ({fijados}) · {r['n_sorteos']} sorteos completados"
+                               + (f", {r['atascados']} descartados" if r['atascados'] else '')
+                               + f" · {r['segundos'] * 1000:.0f} ms")
+        probs = r['probabilidad'].get(fijar_equipo.value)
+        for k, g in enumerate(state.grupos):
+            p = probs[k] if probs else 0.0
+            fijar_grupos[g].text = f"{g}: {100 * p:.0f}%" if probs else f"{g}: -"
+            fijar_grupos[g].style(f"font-weight:bold;padding:2px 6px;border-radius:4px;"
+                                  f"background:rgba(97,1,235,{0.08 + 0.6 * p:.2f});")
+        fijar_tabla.rows = [
+            {'rival': x['rival'], 'confederacion': x['confederacion'], 'probabilidad': f"{100 * x['probabilidad']:.1f}%"}
+            for x in r['rivales']
+        ]
+        if r['ejemplo']:
+            fijar_ejemplo.text = 'Ejemplo: ' + ' · '.join(
+                f"{g}: {' '.join(e['codigo'] for e in sorted(equipos, key=lambda e: e['slot']))}"
+                for g, equipos in r['ejemplo'].items())
+        else:
+            fijar_ejemplo.text = ''
 
     # --- Construcción del Layout ---
     with ui.column().classes('w-full items-center'):
@@ -585,6 +806,8 @@ def index():
             current_team_banner = ui.row().classes('w-full justify-center').style(
                 "background-color:#23232a;border-radius:8px;margin-bottom:10px;box-shadow:0 2px 8px rgba(97,1,235,0.07);"
             )
+            with current_team_banner:
+                banner_label = ui.label().style("font-size: 1.2em; font-weight: bold; color: #b486ff; padding: 8px;")
 
         # Lista fija de equipos del bombo actual
         bombo_list_container = ui.column().classes('w-full items-center').style("margin-bottom:16px;")
@@ -615,6 +838,9 @@ def index():
             ui.button('Step', on_click=step_once).props('outline color=accent icon=skip_next').style('background-color:#ffffff !important;box-shadow:0 2px 8px rgba(97,1,235,0.10);')
             ui.button('Play', on_click=play_auto).props('outline color=accent icon=play_arrow').style('background-color:#ffffff !important;box-shadow:0 2px 8px rgba(97,1,235,0.10);')
 
+        # Enlace permanente al sorteo terminado
+        enlace_compartir = ui.row().classes('w-full justify-center')
+
         # Grid de Grupos
         with ui.grid(columns=4).classes('w-full q-pa-md gap-4').style("max-width: 1400px;"):
             for g in state.grupos:
@@ -622,12 +848,173 @@ def index():
                     group_cards[g] = card
                     ui.label(f"Grupo {g}").style("font-weight: bold;")
         
+        # Panel de probabilidades en vivo (se actualiza tras cada bolita)
+        with ui.expansion('Probabilidades en vivo', icon='insights', value=True,
+                          on_value_change=lambda e: e.value and pedir_probabilidades()) \
+                .classes('w-full').style("max-width: 1400px;") as prob_panel:
+            with ui.row().classes('w-full items-center'):
+                prob_equipo = ui.select(sorted(df_bombos['codigo']), value='ARG', label='Equipo',
+                                        on_change=pintar_probabilidades)
+                prob_info = ui.label('').style('font-weight: bold;')
+            with ui.row().classes('w-full').style("flex-wrap:wrap;gap:6px;"):
+                for g in state.grupos:
+                    prob_grupos[g] = ui.label(f"{g}: -")
+            prob_tabla = ui.table(columns=[
+                {'name': 'rival', 'label': 'Rival', 'field': 'rival', 'align': 'left'},
+                {'name': 'confederacion', 'label': 'Confederación', 'field': 'confederacion', 'align': 'left'},
+                {'name': 'probabilidad', 'label': 'Prob. de compartir grupo', 'field': 'probabilidad'},
+            ], rows=[], row_key='rival').classes('w-full')
+
+        # Panel "¿Qué pasaría si...?": equipos fijados a mano
+        with ui.expansion('¿Qué pasaría si...?', icon='push_pin').classes('w-full').style("max-width: 1400px;"):
+            with ui.row().classes('w-full items-end'):
+                fijar_texto = ui.input('Fijar (separar con ;)', placeholder='BRA en C; NOR con MEX').style('min-width: 320px;')
+                fijar_texto.on('keydown.enter', run_que_pasaria)
+                fijar_equipo = ui.select(sorted(df_bombos['codigo']), value='ARG', label='Equipo',
+                                         on_change=run_que_pasaria)
+                ui.button('Evaluar', on_click=run_que_pasaria).props('push color=primary icon=rule')
+            fijar_info = ui.label('').style('font-weight: bold; margin-top: 8px;')
+            with ui.row().classes('w-full').style("flex-wrap:wrap;gap:6px;"):
+                for g in state.grupos:
+                    fijar_grupos[g] = ui.label(f"{g}: -")
+            fijar_tabla = ui.table(columns=[
+                {'name': 'rival', 'label': 'Rival', 'field': 'rival', 'align': 'left'},
+                {'name': 'confederacion', 'label': 'Confederación', 'field': 'confederacion', 'align': 'left'},
+                {'name': 'probabilidad', 'label': 'Prob. de compartir grupo', 'field': 'probabilidad'},
+            ], rows=[], row_key='rival').classes('w-full')
+            fijar_ejemplo = ui.label('').style('font-size: 0.85em; color: #555;')
+
+        # Panel de consultas condicionales sobre sorteos almacenados
+        with ui.expansion('Consultas sobre sorteos simulados', icon='query_stats').classes('w-full').style("max-width: 1400px;"):
+            with ui.row().classes('w-full items-end'):
+                consulta_dado = ui.input('Dado (separar con ;)', placeholder='MEX con UEFA; ARG en C').style('min-width: 320px;')
+                consulta_equipo = ui.select(sorted(df_bombos['codigo']), value='ARG', label='Rivales de')
+                ui.button('Consultar', on_click=run_consulta).props('push color=primary icon=search')
+            consulta_info = ui.label('').style('font-weight: bold; margin-top: 8px;')
+            consulta_tabla = ui.table(columns=[
+                {'name': 'rival', 'label': 'Rival', 'field': 'rival', 'align': 'left'},
+                {'name': 'confederacion', 'label': 'Confederación', 'field': 'confederacion', 'align': 'left'},
+                {'name': 'probabilidad', 'label': 'Probabilidad', 'field': 'probabilidad'},
+            ], rows=[], row_key='rival').classes('w-full')
+
         # Elimina el panel de log y equipos lateral
         # ...no agregar log_container ni expansión lateral...
 
     refresh_groups_ui()
     update_current_team_banner()
     update_bombo_list_ui()
+    pedir_probabilidades()
+
+# --- Sala de transmisión ("watch party") ---
+# Un único sorteo compartido: el solver corre una vez y cada espectador solo pinta los eventos
+SALA = SalaTransmision(df_bombos, cache_factibilidad=CACHE_FACTIBILIDAD, formato=FORMATO)
+metricas.Medidor('sala_espectadores', "Clientes suscritos a la sala de transmisión",
+                 funcion=lambda: len(SALA.espectadores))
+
+
+@ui.page('/sala')
+def sala(request: Request):
+    """
+    Página de la sala de transmisión. Con la cookie de `POST /sala/anfitrion` (WC_ADMIN_TOKEN) se
+    muestran los controles del anfitrión (iniciar, pausa y velocidad); el resto de clientes solo mira.
+    """
+    ui.colors(primary='#6101eb', secondary='#b486ff', accent='#00c752', positive='#00c752')
+    ui.add_head_html('<style>body { background-color: #d1d1d1; }</style>')
+
+    es_anfitrion = sala_transmision.es_anfitrion(request.cookies.get(COOKIE_ANFITRION))
+    group_cards = {}
+    resaltado = {'grupo': None}
+
+    def pintar_banner():
+        if SALA.error:
+            banner.text = f"Error en el sorteo: {SALA.error}"
+        elif SALA.finalizado:
+            banner.text = "Sorteo finalizado"
+        elif SALA.current_bombo is None:
+            banner.text = "Esperando al anfitrión..."
+        else:
+            equipo_txt = f"Equipo actual sorteado: {SALA.current_team}" if SALA.current_team else "Esperando sorteo..."
+            banner.text = f"{equipo_txt}   |   Bombo: {SALA.current_bombo}"
+
+    def quitar_resaltado():
+        g = resaltado['grupo']
+        if g is not None:
+            group_cards[g].style(CARD_STYLE_COMPLETE if len(SALA.grupos_dict[g]) == FORMATO.slots_por_grupo else CARD_STYLE)
+            resaltado['grupo'] = None
+
+    def resaltar(g, estilo):
+        quitar_resaltado()
+        group_cards[g].style(estilo)
+        resaltado['grupo'] = g
+
+    def aplicar(evento):
+        """Actualiza la UI del espectador a partir del estado compartido de la sala."""
+        if evento == INSTANTANEA:
+            quitar_resaltado()
+            for g, card in group_cards.items():
+                pintar_tarjeta_grupo(card, g, SALA.grupos_dict[g])
+        elif isinstance(evento, GrupoRechazado):
+            resaltar(evento.grupo, DISCARDED_STYLE)
+        elif isinstance(evento, EquipoColocado):
+            quitar_resaltado()
+            pintar_tarjeta_grupo(group_cards[evento.grupo], evento.grupo, SALA.grupos_dict[evento.grupo])
+            resaltar(evento.grupo, HIGHLIGHT_STYLE)
+        pintar_banner()
+
+    async def escuchar():
+        espectador = SALA.suscribir()
+        try:
+            while True:
+                aplicar(await espectador.cola.get())
+        finally:
+            SALA.desuscribir(espectador)
+
+    with ui.column().classes('w-full items-center'):
+        ui.label('Sorteo FIFA World Cup 2026™ - Sala').style(HEADER_STYLE)
+        banner = ui.label('').style(
+            "font-size: 1.2em; font-weight: bold; color: #b486ff; padding: 8px; background-color:#23232a;"
+            "border-radius:8px; margin-bottom:10px;"
+        )
+        if es_anfitrion:
+            espectadores = ui.label('').style('color: #555;')
+            ui.timer(2.0, lambda: espectadores.set_text(f"{len(SALA.espectadores)} espectadores"))
+            with ui.row().classes('w-full justify-center items-center q-mb-md'):
+                def iniciar():
+                    if not SALA.iniciar():
+                        ui.notify("Ya hay un sorteo en curso", type='warning')
+                ui.button('Iniciar Sorteo', on_click=iniciar).props('push color=accent icon=play_arrow')
+                ui.button('Pausa / Reanudar', on_click=SALA.alternar_pausa).props('outline color=secondary icon=pause')
+                ui.label('Velocidad:').style('margin-left: 20px; font-weight: bold;')
+                ui.slider(min=0.15, max=1.85, step=0.05, value=1.0).bind_value(
+                    SALA, 'velocidad', forward=lambda v: 2.0 - v, backward=lambda v: 2.0 - v
+                ).style('width: 200px;')
+        elif os.getenv('WC_ADMIN_TOKEN'):
+            #Formulario POST: el token no queda en la URL
+            ui.html('<form method="post" action="/sala/anfitrion" style="display:flex;gap:6px;align-items:center;">'
+                    '<input type="password" name="clave" placeholder="Token de anfitrión" autocomplete="off">'
+                    '<button type="submit">Entrar como anfitrión</button></form>', sanitize=False)
+
+        with ui.grid(columns=4).classes('w-full q-pa-md gap-4').style("max-width: 1400px;"):
+            for g in SALA.grupos_dict:
+                with ui.card().style(CARD_STYLE) as card:
+                    group_cards[g] = card
+
+    tarea = background_tasks.create(escuchar(), name='espectador sala')
+    ui.context.client.on_delete(tarea.cancel)
+
+# Métricas de Prometheus en /metrics
+metricas.registrar_cache('indice_consultas', indice_para)
+metricas.instalar(app)
+# Sorteos compartidos en /draw/<token>
+metricas.registrar_cache('permalinks_html', permalinks.instalar(app, FIFA_TO_ISO))
+# "¿Qué pasaría si...?" en POST /api/que-pasaria, evaluado en el pool de procesos
+fijaciones.instalar(app, ejecutar=run.cpu_bound)
+# Readiness en /ready (health check del despliegue)
+arranque.instalar(app, ARRANQUE)
+# Perfil por muestreo en /admin/perfil (requiere WC_ADMIN_TOKEN)
+perfilador.instalar(app)
+# Cookie del anfitrión de la sala en POST /sala/anfitrion (requiere WC_ADMIN_TOKEN)
+sala_transmision.instalar(app)
 
 if __name__ in {"__main__", "__mp_main__"}:
     ui.run(port=5555, title="Sorteo FIFA 2026")
@@ -0,0 +1,108 @@
+"""
+Control de admisión para los sorteos animados de la GUI.
+
+Un sorteo animado ocupa el event loop (solver + actualizaciones de UI) durante uno o más
+minutos. `ControlAdmision` limita cuántos corren a la vez y pone al resto en una cola FIFO
+(justa: se admite siempre al que más lleva esperando). Cada vez que alguien sale, los que
+siguen en cola reciben su nueva posición para mostrarla en el banner.
+
+Si la cola ya está llena, `solicitar` devuelve None y la GUI muestra en su lugar un sorteo
+precalculado (`ResultadosPrecalculados`, motor de `sorteo_rapido`, respeta todas las reglas).
+
+Configuración por variables de entorno:
+    WC_MAX_SORTEOS_ANIMADOS  sorteos animados simultáneos (por defecto 4)
+    WC_MAX_COLA              turnos en espera antes de pasar a resultados instantáneos (por defecto 20)
+"""
+
+import os
+import random
+import asyncio
+from collections import deque
+
+import sorteo_rapido
+
+MAX_SORTEOS_ANIMADOS = int(os.getenv('WC_MAX_SORTEOS_ANIMADOS', 4))
+MAX_COLA = int(os.getenv('WC_MAX_COLA', 20))
+TAMANO_RESERVA = 512  # sorteos precalculados para el modo instantáneo
+
+
+class Turno:
+    """Un pedido de sorteo animado: admitido de inmediato o esperando en la cola."""
+    __slots__ = ('admitido', '_aviso')
+
+    def __init__(self, admitido=False):
+        self.admitido = admitido
+        self._aviso = asyncio.Event()
+
+
+class ControlAdmision:
+    """Semáforo con cola FIFO visible (posición de cada turno) y límite de cola."""
+    def __init__(self, max_concurrentes=MAX_SORTEOS_ANIMADOS, max_cola=MAX_COLA):
+        self.max_concurrentes = max_concurrentes
+        self.max_cola = max_cola
+        self.activos = 0
+        self.cola = deque()
+        self.rechazados = 0
+
+    def solicitar(self):
+        """Turno admitido o en cola; None si la cola está llena (usar resultado instantáneo)."""
+        if self.activos < self.max_concurrentes and not self.cola:
+            self.activos += 1
+            return Turno(admitido=True)
+        if len(self.cola) >= self.max_cola:
+            self.rechazados += 1
+            return None
+        turno = Turno()
+        self.cola.append(turno)
+        return turno
+
+    def posicion(self, turno):
+        """1 = el siguiente en entrar; 0 si ya está admitido."""
+        return 0 if turno.admitido else self.cola.index(turno) + 1
+
+    async def esperar(self, turno, al_avanzar=lambda posicion: None):
+        """Espera a que el turno sea admitido, avisando cada cambio de posición."""
+        al_avanzar(self.posicion(turno))
+        while not turno.admitido:
+            await turno._aviso.wait()
+            turno._aviso.clear()
+            al_avanzar(self.posicion(turno))
+
+    def liberar(self, turno):
+        """Devuelve el cupo (o abandona la cola si se cancela esperando) y admite al siguiente."""
+        avisar = []
+        if not turno.admitido:
+            if turno in self.cola:
+                self.cola.remove(turno)
+        else:
+            turno.admitido = False
+            self.activos -= 1
+            if self.cola and self.activos < self.max_concurrentes:
+                siguiente = self.cola.popleft()
+                siguiente.admitido = True
+                self.activos += 1
+                avisar.append(siguiente)
+        # El recién admitido entra y los que siguen en cola actualizan su posición
+        for t in avisar + list(self.cola):
+            t._aviso.set()
+
+
+class ResultadosPrecalculados:
+    """Reserva de sorteos completos ya resueltos para responder al instante bajo carga."""
+    def __init__(self, df_bombos, n=TAMANO_RESERVA, seed=None):
+        self.tabla = sorteo_rapido.TablaSorteo(df_bombos)
+        self.seed = random.randrange(2**31) if seed is None else seed
+        self.n = n
+        self._codificados = None
+
+    def preparar(self):
+        if self._codificados is None:
+            self._codificados = sorteo_rapido.sortear_lote(self.tabla, self.n, seed=self.seed)
+        return self
+
+    def tomar(self, rng=random):
+        """(grupos_dict, asignaciones_sorteo) de un sorteo de la reserva elegido al azar."""
+        codificados = self.preparar()._codificados[:, rng.randrange(self.n)]
+        grupo_de = [int(v) // sorteo_rapido.SLOTS_POR_GRUPO for v in codificados]
+        slot_de = [int(v) % sorteo_rapido.SLOTS_POR_GRUPO for v in codificados]
+        return sorteo_rapido.a_grupos_dict(self.tabla, grupo_de, slot_de)
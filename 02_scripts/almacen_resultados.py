@@ -0,0 +1,255 @@
+"""
+Almacén columnar en disco para resultados de simulaciones grandes.
+
+Formato (un directorio por corrida):
+- `manifest.json`: seed, snapshot del ranking, escenario de repechaje, versión de reglas,
+  formato del torneo (nombre, grupos y slots por grupo), orden de equipos (columnas) y lista
+  de chunks.
+- `chunk_NNNNN.npy`: matriz int8 de forma (n_equipos, n_sorteos_chunk) en orden C, es decir,
+  la columna de cada equipo es contigua en disco. Cada celda codifica grupo y slot como
+  `indice_grupo * slots_por_grupo + (slot - 1)` (0-47 en el 2026); -1 si el equipo no está en
+  el sorteo.
+
+Los lectores abren los chunks con `np.load(mmap_mode='r')`, de modo que una consulta como
+"sorteos donde ESP cae en el Grupo A" solo lee la columna de ESP de cada chunk.
+
+`simular_a_almacen` llena los chunks con `nucleo_sorteo.NucleoSorteo.sortear_lote`, que ya sale
+con esta codificación (un lote por chunk, con semilla derivada de `seed` y el número de chunk).
+Con `motor='original'` usa `sortear_mundial` sorteo a sorteo (seed + i), mucho más lento.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/almacen_resultados.py 03_resultados/corrida_01 --sorteos 1000000 --seed 7
+    python 02_scripts/almacen_resultados.py 03_resultados/corrida_02 --sorteos 1000 --motor original
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+
+import numpy as np
+
+from simular_bombos import df_bombos, RUTA_POWER_RANKING, escenario_de
+from simular_sorteo_func import sortear_mundial, VERSION_REGLAS
+from formato_torneo import WC2026
+
+VERSION_FORMATO = 1
+GRUPOS = WC2026.grupos  # A-L; cada corrida guarda los de su formato en el manifest
+SLOTS_POR_GRUPO = WC2026.slots_por_grupo
+SIN_ASIGNAR = -1
+
+
+def codificar_slot(slot, formato=WC2026):
+    """'C3' -> 2 * 4 + 2 = 10"""
+    return formato.grupos.index(slot[0]) * formato.slots_por_grupo + int(slot[1:]) - 1
+
+
+def decodificar_slot(codigo, grupos=GRUPOS, slots_por_grupo=SLOTS_POR_GRUPO):
+    """10 -> 'C3'"""
+    grupo, pos = divmod(int(codigo), slots_por_grupo)
+    return f"{grupos[grupo]}{pos + 1}"
+
+
+class EscritorResultados:
+    """
+    Escribe sorteos en chunks columnares. Se usa como context manager:
+
+        with EscritorResultados(ruta, equipos, seed=7) as escritor:
+            for ...:
+                escritor.agregar(asignaciones_sorteo)
+    """
+    def __init__(self, directorio, equipos, seed=None, snapshot_ranking=None,
+                 escenario_repechaje=None, version_reglas=VERSION_REGLAS,
+                 tamano_chunk=100_000, formato=WC2026):
+        self.directorio = directorio
+        self.formato = formato
+        self.equipos = list(equipos)
+        self._idx = {eq: i for i, eq in enumerate(self.equipos)}
+        self.tamano_chunk = tamano_chunk
+        self.manifest = {
+            'version_formato': VERSION_FORMATO,
+            'seed': seed,
+            'snapshot_ranking': snapshot_ranking,
+            'escenario_repechaje': [list(x) for x in escenario_repechaje] if escenario_repechaje else None,
+            'version_reglas': version_reglas,
+            'equipos': self.equipos,
+            'formato': formato.nombre,
+            'grupos': formato.grupos,
+            'slots_por_grupo': formato.slots_por_grupo,
+            'n_sorteos': 0,
+            'chunks': [],
+        }
+        os.makedirs(directorio, exist_ok=True)
+        self._buffer = np.full((len(self.equipos), tamano_chunk), SIN_ASIGNAR, dtype=np.int8)
+        self._n_buffer = 0
+
+    def agregar(self, asignaciones_sorteo):
+        """Agrega un sorteo con el formato de `asignaciones_sorteo` ({codigo: {'slot': 'A1', ...}})."""
+        columna = self._buffer[:, self._n_buffer]
+        for eq, info in asignaciones_sorteo.items():
+            columna[self._idx[eq]] = codificar_slot(info['slot'], self.formato)
+        self._n_buffer += 1
+        if self._n_buffer == self.tamano_chunk:
+            self._volcar()
+
+    def agregar_codificados(self, matriz):
+        """Agrega un bloque ya codificado de forma (n_equipos, n_sorteos)."""
+        matriz = np.asarray(matriz, dtype=np.int8)
+        inicio = 0
+        while inicio < matriz.shape[1]:
+            n = min(self.tamano_chunk - self._n_buffer, matriz.shape[1] - inicio)
+            self._buffer[:, self._n_buffer:self._n_buffer + n] = matriz[:, inicio:inicio + n]
+            self._n_buffer += n
+            inicio += n
+            if self._n_buffer == self.tamano_chunk:
+                self._volcar()
+
+    def _volcar(self):
+        if self._n_buffer == 0:
+            return
+        archivo = f"chunk_{len(self.manifest['chunks']):05d}.npy"
+        np.save(os.path.join(self.directorio, archivo),
+                np.ascontiguousarray(self._buffer[:, :self._n_buffer]))
+        self.manifest['chunks'].append({'archivo': archivo, 'n_sorteos': self._n_buffer})
+        self.manifest['n_sorteos'] += self._n_buffer
+        self._buffer.fill(SIN_ASIGNAR)
+        self._n_buffer = 0
+        self._escribir_manifest()
+
+    def _escribir_manifest(self):
+        #Escritura atómica: un lector nunca ve un manifest a medio escribir
+        ruta = os.path.join(self.directorio, 'manifest.json')
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(ruta + '.tmp', ruta)
+
+    def cerrar(self):
+        self._volcar()
+        self._escribir_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class LectorResultados:
+    """Lectura con memory-mapping de un directorio escrito por `EscritorResultados`."""
+    def __init__(self, directorio):
+        self.directorio = directorio
+        with open(os.path.join(directorio, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.equipos = self.manifest['equipos']
+        self.n_sorteos = self.manifest['n_sorteos']
+        #Las corridas anteriores a los formatos no guardaban los slots: eran del 2026
+        self.nombres_grupos = self.manifest.get('grupos', GRUPOS)
+        self.slots_por_grupo = self.manifest.get('slots_por_grupo', SLOTS_POR_GRUPO)
+        self._idx = {eq: i for i, eq in enumerate(self.equipos)}
+        self._chunks = [
+            np.load(os.path.join(directorio, c['archivo']), mmap_mode='r')
+            for c in self.manifest['chunks']
+        ]
+
+    def columnas(self, equipo):
+        """Itera la columna del equipo chunk a chunk (vistas sobre el mmap, sin copiar)."""
+        fila = self._idx[equipo]
+        for chunk in self._chunks:
+            yield chunk[fila]
+
+    def columna(self, equipo):
+        """Columna completa del equipo (n_sorteos bytes)."""
+        return np.concatenate(list(self.columnas(equipo))) if self._chunks else np.empty(0, np.int8)
+
+    def grupos(self, equipo):
+        """Índice de grupo (0-11 en el 2026) del equipo en cada sorteo."""
+        return self.columna(equipo) // self.slots_por_grupo
+
+    def sorteos_donde(self, equipo, grupo):
+        """IDs de los sorteos en los que `equipo` cae en `grupo` (letra)."""
+        g = self.nombres_grupos.index(grupo)
+        ids = []
+        offset = 0
+        for col in self.columnas(equipo):
+            ids.append(np.flatnonzero(col // self.slots_por_grupo == g) + offset)
+            offset += len(col)
+        return np.concatenate(ids) if ids else np.empty(0, np.int64)
+
+    def probabilidad_grupos(self, equipo):
+        """Frecuencia de cada grupo para el equipo, leyendo solo su columna."""
+        conteo = np.zeros(len(self.nombres_grupos), dtype=np.int64)
+        for col in self.columnas(equipo):
+            col = col[col != SIN_ASIGNAR]
+            conteo += np.bincount(col // self.slots_por_grupo, minlength=len(self.nombres_grupos))
+        return dict(zip(self.nombres_grupos, conteo / max(self.n_sorteos, 1)))
+
+    def sorteo(self, id_sorteo):
+        """Reconstruye un sorteo como {codigo: slot}."""
+        for c, chunk in zip(self.manifest['chunks'], self._chunks):
+            if id_sorteo < c['n_sorteos']:
+                return {eq: decodificar_slot(v, self.nombres_grupos, self.slots_por_grupo)
+                        for eq, v in zip(self.equipos, chunk[:, id_sorteo])
+                        if v != SIN_ASIGNAR}
+            id_sorteo -= c['n_sorteos']
+        raise IndexError("id de sorteo fuera de rango")
+
+
+def semilla_chunk(seed, k):
+    return int(np.random.SeedSequence(seed, spawn_key=(k,)).generate_state(1)[0])
+
+
+def simular_a_almacen(directorio, n_sorteos, seed=0, df_bombos=df_bombos, tamano_chunk=100_000, motor='nucleo',
+                      formato=WC2026):
+    """
+    Corre `n_sorteos` sorteos y los persiste en `directorio`. Con el núcleo cada chunk es un
+    lote sembrado con `semilla_chunk(seed, k)`; con el original, el i-ésimo sorteo usa seed + i.
+    """
+    if motor == 'nucleo':
+        from sorteo_rapido import TablaSorteo
+        from nucleo_sorteo import NucleoSorteo
+        nucleo = NucleoSorteo(TablaSorteo(df_bombos, formato))
+        equipos = nucleo.tabla.equipos
+    elif motor == 'original':
+        equipos = df_bombos['codigo']
+    else:
+        raise ValueError(f"Motor desconocido: {motor} (hay 'nucleo' y 'original')")
+
+    with EscritorResultados(directorio, equipos, seed=seed,
+                            snapshot_ranking=os.path.basename(RUTA_POWER_RANKING),
+                            escenario_repechaje=escenario_de(df_bombos),
+                            tamano_chunk=tamano_chunk, formato=formato) as escritor:
+        escritor.manifest['motor'] = motor
+        if motor == 'nucleo':
+            for k, inicio in enumerate(range(0, n_sorteos, tamano_chunk)):
+                n = min(tamano_chunk, n_sorteos - inicio)
+                escritor.agregar_codificados(nucleo.sortear_lote(n, seed=semilla_chunk(seed, k)))
+        else:
+            for i in range(n_sorteos):
+                random.seed(seed + i)
+                np.random.seed(seed + i)
+                _, asignaciones = sortear_mundial(df_bombos, formato=formato)
+                escritor.agregar(asignaciones)
+    return LectorResultados(directorio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula sorteos y los guarda en un almacén columnar")
+    parser.add_argument('directorio')
+    parser.add_argument('--sorteos', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tamano-chunk', type=int, default=100_000)
+    parser.add_argument('--motor', choices=['nucleo', 'original'], default='nucleo')
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.directorio, 'manifest.json')):
+        sys.exit(f"{args.directorio} ya contiene una corrida. Elige otro directorio.")
+
+    lector = simular_a_almacen(args.directorio, args.sorteos, seed=args.seed,
+                               tamano_chunk=args.tamano_chunk, motor=args.motor)
+    print(f"{lector.n_sorteos} sorteos guardados en {args.directorio} "
+          f"({len(lector.manifest['chunks'])} chunks)")
+
+
+if __name__ == "__main__":
+    main()
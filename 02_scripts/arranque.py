@@ -0,0 +1,167 @@
+"""
+Precalentamiento al arrancar el servidor y endpoint de readiness (`/ready`).
+
+En un arranque en frío (Render duerme el servicio del plan gratis) el primer visitante pagaba
+todo lo que se construye a pedido: tablas de enteros de los motores, la reserva de sorteos
+instantáneos, la compilación (o carga de la caché en disco) de `nucleo_sorteo`, la caché de
+factibilidad vacía y el pool de procesos de las probabilidades en vivo.
+
+`Arranque` cuenta el tiempo desde `INICIO` (al importar este módulo, que la GUI importa antes que
+nada: incluye leer el Excel de `simular_bombos`) y registra cada fase de precalentamiento con
+`fase`/`marcar`. La GUI corre las fases al iniciar el servidor y después llama a `terminar`.
+
+`instalar(app, arranque)` agrega `GET /ready`: 503 mientras se precalienta y 200 cuando terminó,
+con las fases y sus tiempos en el cuerpo. Usado como health check de la plataforma (en Render,
+`healthCheckPath: /ready`), la instancia nueva no recibe tráfico hasta estar lista.
+
+Por arranque quedan en el log (prefijo `[arranque]`) y en `/metrics`:
+- tiempo hasta listo, con el detalle por fase;
+- tiempo hasta el primer sorteo terminado (cualquier modo), una sola vez por proceso.
+
+Uso desde consola (corre las fases que no necesitan servidor y muestra sus tiempos, desde la raíz del repo):
+    python 02_scripts/arranque.py
+"""
+
+import time
+import argparse
+from contextlib import contextmanager
+
+INICIO = time.perf_counter()
+SORTEOS_FACTIBILIDAD = 3    # sorteos completos que llenan la caché de factibilidad (~0.1 s cada uno)
+
+
+class Arranque:
+    """Fases de precalentamiento de un proceso del servidor y sus tiempos."""
+    def __init__(self, inicio=INICIO, registrar=print):
+        self.inicio = inicio
+        self.registrar = registrar
+        self.fases = []             # (nombre, segundos) en orden
+        self.errores = []           # (fase, error) de las fases que fallaron
+        self._fin_ultima = inicio
+        self.listo = False
+        self.segundos_hasta_listo = None
+        self.segundos_hasta_primer_sorteo = None
+        self.modo_primer_sorteo = None
+
+    def transcurrido(self):
+        return time.perf_counter() - self.inicio
+
+    def marcar(self, nombre):
+        """Cierra una fase que ya pasó: desde el final de la anterior (o `inicio`) hasta ahora."""
+        ahora = time.perf_counter()
+        self.fases.append((nombre, ahora - self._fin_ultima))
+        self._fin_ultima = ahora
+
+    @contextmanager
+    def fase(self, nombre):
+        """
+        Mide el bloque como una fase (también si adentro se espera con `await`). Un error queda
+        registrado y en el log sin cortar el arranque: con una caché fría se puede atender, sin
+        `terminar` el health check no pasaría nunca.
+        """
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.errores.append((nombre, repr(e)))
+            self.registrar(f"[arranque] Falló la fase '{nombre}': {e!r}")
+        finally:
+            self._fin_ultima = time.perf_counter()
+            self.fases.append((nombre, self._fin_ultima - t0))
+
+    def terminar(self):
+        self.listo = True
+        self.segundos_hasta_listo = self.transcurrido()
+        detalle = ', '.join(f"{nombre} {segundos:.2f} s" for nombre, segundos in self.fases)
+        self.registrar(f"[arranque] Listo en {self.segundos_hasta_listo:.2f} s ({detalle})")
+
+    def sorteo_terminado(self, modo):
+        """Avisar al terminar cada sorteo; solo el primero del proceso queda registrado."""
+        if self.segundos_hasta_primer_sorteo is not None:
+            return
+        self.segundos_hasta_primer_sorteo = self.transcurrido()
+        self.modo_primer_sorteo = modo
+        self.registrar(f"[arranque] Primer sorteo ({modo}) a los {self.segundos_hasta_primer_sorteo:.2f} s del arranque")
+
+    def estado(self):
+        return {
+            'listo': self.listo,
+            'segundos_desde_inicio': round(self.transcurrido(), 3),
+            'segundos_hasta_listo': self.segundos_hasta_listo,
+            'segundos_hasta_primer_sorteo': self.segundos_hasta_primer_sorteo,
+            'modo_primer_sorteo': self.modo_primer_sorteo,
+            'fases': [{'fase': nombre, 'segundos': round(segundos, 3)} for nombre, segundos in self.fases],
+            'errores': [{'fase': nombre, 'error': error} for nombre, error in self.errores],
+        }
+
+
+def calentar_factibilidad(df_bombos, cache, n_sorteos=SORTEOS_FACTIBILIDAD):
+    """
+    Sorteos completos sin animación con `ComprobadorAcotado(cache)`: dejan en la caché los
+    estados canónicos por los que pasan todos los sorteos animados (los del bombo 2 sobre todo).
+    """
+    from factibilidad_acotada import ComprobadorAcotado
+    from simular_sorteo_func import eventos_mundial
+
+    for _ in range(n_sorteos):
+        for _ in eventos_mundial(df_bombos, eventos=False, factibilidad=ComprobadorAcotado(cache)):
+            pass
+    return len(cache)
+
+
+def instalar(app, arranque, ruta='/ready'):
+    """
+    Agrega `GET {ruta}` a la app y las métricas del arranque. Los segundos hasta listo y hasta el
+    primer sorteo no tienen muestra hasta que ocurren.
+    """
+    from fastapi.responses import JSONResponse
+    import metricas
+
+    metricas.Medidor('arranque_listo', "1 si el precalentamiento del arranque terminó",
+                     funcion=lambda: int(arranque.listo))
+    metricas.Medidor('arranque_segundos_hasta_listo', "Segundos desde el arranque hasta terminar el precalentamiento",
+                     funcion=lambda: arranque.segundos_hasta_listo)
+    metricas.Medidor('arranque_segundos_hasta_primer_sorteo', "Segundos desde el arranque hasta el primer sorteo terminado",
+                     funcion=lambda: arranque.segundos_hasta_primer_sorteo)
+
+    @app.get(ruta, include_in_schema=False)
+    def ready():
+        return JSONResponse(arranque.estado(), status_code=200 if arranque.listo else 503,
+                            headers={'Cache-Control': 'no-store'})
+
+    return ready
+
+
+def main():
+    """Fases de precalentamiento de la GUI que no dependen del servidor, en un proceso nuevo."""
+    parser = argparse.ArgumentParser(description="Tiempo de cada fase del precalentamiento en frío")
+    parser.add_argument('--sorteos-factibilidad', type=int, default=SORTEOS_FACTIBILIDAD)
+    args = parser.parse_args()
+
+    arranque = Arranque()
+    from simular_bombos import df_bombos
+    arranque.marcar('importar y leer datos')
+
+    import probabilidades_vivo
+    import permalinks
+    from admision import ResultadosPrecalculados
+    from factibilidad_acotada import CacheFactibilidad
+    from simular_sorteo_func import esqueleto_sorteo
+
+    with arranque.fase('tablas de reglas'):
+        probabilidades_vivo.tabla()
+        permalinks.tabla()
+    with arranque.fase('núcleo compilado'):
+        probabilidades_vivo.nucleo().sortear_lote(1)
+    with arranque.fase('reserva instantánea'):
+        ResultadosPrecalculados(df_bombos).preparar()
+    with arranque.fase('caché de factibilidad'):
+        estados = calentar_factibilidad(df_bombos, CacheFactibilidad(), args.sorteos_factibilidad)
+    with arranque.fase('probabilidades del estado inicial'):
+        probabilidades_vivo.estimar(probabilidades_vivo.codificar(esqueleto_sorteo()[0]))
+    arranque.terminar()
+    print(f"{estados} estados de factibilidad en caché")
+
+
+if __name__ == "__main__":
+    main()
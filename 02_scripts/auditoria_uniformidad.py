@@ -0,0 +1,347 @@
+"""
+Auditoría de uniformidad del procedimiento de sorteo.
+
+El procedimiento secuencial de `sortear_bombo_n` (cada bolita va al primer grupo válido en orden
+A→L) no muestrea de forma uniforme entre todos los sorteos válidos. Este módulo compara:
+
+1. Muestreador procedimental: `sorteo_rapido.sortear`, mismo procedimiento que el repo.
+2. Muestreador uniforme: cadena de Markov (MCMC) de intercambios sobre sorteos válidos.
+   - Estado: qué equipo de cada bombo está en cada grupo (los slots no afectan a las parejas).
+   - Propuesta: elegir un bombo al azar y dos grupos al azar, e intercambiar sus equipos de ese
+     bombo (los anfitriones no se mueven). La propuesta es simétrica.
+   - Se acepta si ambos grupos siguen cumpliendo las reglas de `checker_validez_grupo`.
+   Con propuesta simétrica y objetivo uniforme, la regla de Metropolis se reduce a "aceptar si es
+   válido", así que la distribución estacionaria es uniforme sobre los sorteos válidos alcanzables.
+
+Diagnóstico de mezcla: se corren varias cadenas independientes (una por worker como mínimo,
+cuatro como mínimo en total) desde sorteos procedimentales distintos, y sobre un conjunto fijo de
+estadísticos (indicadores de algunas parejas y la concentración de UEFA por grupo) se reporta:
+- R-hat (split) entre cadenas: valores < 1.01 indican que las cadenas exploran la misma
+  distribución (si hubiera regiones no conectadas por intercambios, R-hat lo delataría).
+- Tamaño efectivo de muestra (ESS) por estadístico, con la secuencia inicial positiva de Geyer.
+  El ESS mínimo se usa como tamaño muestral del lado uniforme en los tests chi-cuadrado.
+
+Comparación: probabilidad de que cada pareja de equipos comparta grupo bajo ambos muestreadores,
+con chi-cuadrado (2x2 por pareja, sumado) y distancia de variación total (parejas y grupos).
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/auditoria_uniformidad.py --sorteos 1000000 --workers 8
+"""
+
+import os
+import math
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sorteo_rapido import TablaSorteo, sortear, GRUPOS
+from simular_bombos import CONFEDERACIONES_ORDEN
+
+TAMANO_LOTE = 50_000  # sorteos por bloque al acumular conteos de parejas
+N_PARES_DIAGNOSTICO = 16
+
+
+# --- Conteos ---
+
+def conteo_grupos_y_parejas(grupos):
+    """
+    grupos: matriz (n_sorteos, n_equipos) con el índice de grupo de cada equipo.
+    Devuelve (conteo de cada equipo en cada grupo, conteo de parejas en el mismo grupo).
+    """
+    n_equipos = grupos.shape[1]
+    conteo_grupos = np.zeros((n_equipos, len(GRUPOS)), dtype=np.int64)
+    conteo_parejas = np.zeros((n_equipos, n_equipos), dtype=np.float64)
+    for inicio in range(0, len(grupos), TAMANO_LOTE):
+        bloque = grupos[inicio:inicio + TAMANO_LOTE]
+        for g in range(len(GRUPOS)):
+            en_g = (bloque == g).astype(np.float32)
+            conteo_grupos[:, g] += en_g.sum(axis=0, dtype=np.int64)
+            conteo_parejas += en_g.T @ en_g
+    np.fill_diagonal(conteo_parejas, 0)
+    return conteo_grupos, np.rint(conteo_parejas).astype(np.int64)
+
+
+# --- Muestreadores (se ejecutan en los workers) ---
+
+def _trabajo_procedimental(args):
+    tabla, seed, n_sorteos = args
+    grupos = np.empty((n_sorteos, tabla.n_equipos), dtype=np.int8)
+    for k in range(n_sorteos):
+        grupos[k] = sortear(tabla, random.Random(seed + k))[0]
+    return conteo_grupos_y_parejas(grupos)
+
+
+def _trabajo_mcmc(args):
+    tabla, seed, n_muestras, adelgazamiento, quemado = args
+    rng = random.Random(seed)
+    conf = tabla.conf
+    cupo = tabla.cupo
+
+    #Estado inicial: un sorteo procedimental (siempre válido)
+    grupo_de, _ = sortear(tabla, rng)
+    rejilla = [[-1] * tabla.n_grupos for _ in range(4)]
+    conteo = [[0] * tabla.n_conf for _ in range(tabla.n_grupos)]
+    for i, g in enumerate(grupo_de):
+        rejilla[tabla.bombo[i] - 1][g] = i
+        conteo[g][conf[i]] += 1
+
+    grupos_anfitriones = {g for g, _ in tabla.anfitriones.values()}
+    movibles = [
+        [g for g in range(tabla.n_grupos) if not (b == 0 and g in grupos_anfitriones)]
+        for b in range(4)
+    ]
+
+    muestras = np.empty((n_muestras, tabla.n_equipos), dtype=np.int8)
+    aceptadas = 0
+    total_pasos = quemado + n_muestras * adelgazamiento
+    randrange = rng.randrange
+    for paso in range(total_pasos):
+        b = randrange(4)
+        grupos_b = movibles[b]
+        g1 = grupos_b[randrange(len(grupos_b))]
+        g2 = grupos_b[randrange(len(grupos_b))]
+        if g1 != g2:
+            i = rejilla[b][g1]
+            j = rejilla[b][g2]
+            ci = conf[i]
+            cj = conf[j]
+            if ci == cj or (conteo[g1][cj] < cupo[cj] and conteo[g2][ci] < cupo[ci]):
+                if ci != cj:
+                    conteo[g1][ci] -= 1
+                    conteo[g1][cj] += 1
+                    conteo[g2][cj] -= 1
+                    conteo[g2][ci] += 1
+                rejilla[b][g1] = j
+                rejilla[b][g2] = i
+                grupo_de[i] = g2
+                grupo_de[j] = g1
+                aceptadas += 1
+
+        if paso >= quemado and (paso - quemado) % adelgazamiento == adelgazamiento - 1:
+            muestras[(paso - quemado) // adelgazamiento] = grupo_de
+
+    conteo_grupos, conteo_parejas = conteo_grupos_y_parejas(muestras)
+    return conteo_grupos, conteo_parejas, _estadisticos(tabla, muestras), aceptadas / total_pasos
+
+
+# --- Diagnóstico de mezcla ---
+
+def _pares_diagnostico(tabla):
+    #Parejas fijas de bombos distintos (sin anfitriones), elegidas con semilla fija
+    rng = random.Random(2026)
+    candidatos = [
+        (i, j) for i in range(tabla.n_equipos) for j in range(i + 1, tabla.n_equipos)
+        if tabla.bombo[i] != tabla.bombo[j] and i not in tabla.anfitriones and j not in tabla.anfitriones
+    ]
+    return rng.sample(candidatos, min(N_PARES_DIAGNOSTICO, len(candidatos)))
+
+
+def _estadisticos(tabla, muestras):
+    """Traza (n_muestras, k): indicadores de parejas y concentración de UEFA por grupo."""
+    pares = _pares_diagnostico(tabla)
+    traza = np.empty((len(muestras), len(pares) + 1), dtype=np.float32)
+    for k, (i, j) in enumerate(pares):
+        traza[:, k] = muestras[:, i] == muestras[:, j]
+    uefa = np.array([c == CONFEDERACIONES_ORDEN.index('UEFA') for c in tabla.conf])
+    por_grupo = np.stack([(muestras[:, uefa] == g).sum(axis=1) for g in range(len(GRUPOS))], axis=1)
+    traza[:, -1] = (por_grupo.astype(np.float32) ** 2).sum(axis=1)
+    return traza
+
+
+def _autocorrelacion(x):
+    x = x - x.mean()
+    n = len(x)
+    f = np.fft.rfft(x, n=2 * n)
+    acf = np.fft.irfft(f * np.conjugate(f))[:n]
+    return acf / acf[0] if acf[0] > 0 else np.zeros(n)
+
+
+def tamano_efectivo(cadenas):
+    """ESS de un estadístico (lista de trazas, una por cadena), secuencia inicial positiva de Geyer."""
+    ess = 0.0
+    for x in cadenas:
+        rho = _autocorrelacion(np.asarray(x, dtype=np.float64))
+        #tau = -1 + 2 * sum(rho_2k + rho_2k+1), cortando en el primer par negativo
+        tau = -1.0
+        for t in range(0, len(rho) - 1, 2):
+            par = rho[t] + rho[t + 1]
+            if par < 0:
+                break
+            tau += 2.0 * par
+        ess += len(x) / max(tau, 1.0)
+    return ess
+
+
+def r_hat(cadenas):
+    """R-hat con división de cada cadena en dos mitades (Gelman et al.)."""
+    mitades = []
+    for x in cadenas:
+        m = len(x) // 2
+        mitades += [np.asarray(x[:m], dtype=np.float64), np.asarray(x[m:2 * m], dtype=np.float64)]
+    n = len(mitades[0])
+    medias = np.array([h.mean() for h in mitades])
+    varianzas = np.array([h.var(ddof=1) for h in mitades])
+    w = varianzas.mean()
+    b = n * medias.var(ddof=1)
+    if w == 0:
+        return 1.0
+    return float(np.sqrt(((n - 1) / n * w + b / n) / w))
+
+
+# --- Estadística de la comparación ---
+
+def _sf_chi2(x, gl):
+    #Aproximación de Wilson-Hilferty: suficiente para gl grandes (cientos de parejas)
+    if gl <= 0:
+        return float('nan')
+    z = ((x / gl) ** (1 / 3) - (1 - 2 / (9 * gl))) / math.sqrt(2 / (9 * gl))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def comparar(conteo_a, n_a, conteo_b, n_b, n_b_efectivo):
+    """Chi-cuadrado 2x2 por pareja (a vs b), usando el tamaño efectivo de b."""
+    escala = n_b_efectivo / n_b
+    p_a = conteo_a / n_a
+    p_b = conteo_b / n_b
+    x_a, x_b = conteo_a, conteo_b * escala
+    n_ef = n_b_efectivo
+    p_pool = (x_a + x_b) / (n_a + n_ef)
+    denom = p_pool * (1 - p_pool) * (1 / n_a + 1 / n_ef)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2 = np.where(denom > 0, (p_a - p_b) ** 2 / denom, 0.0)
+    return p_a, p_b, chi2, denom > 0
+
+
+def auditar(n_sorteos=1_000_000, workers=None, seed=0, adelgazamiento=50, quemado=10_000,
+            tabla=None):
+    """
+    Corre ambos muestreadores con `n_sorteos` muestras cada uno y devuelve el reporte.
+
+    Returns:
+        dict con 'resumen' (dict), 'parejas' (DataFrame) y 'grupos' (DataFrame).
+    """
+    tabla = tabla or TablaSorteo()
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+
+    #Trabajos procedimentales: varios por worker para repartir bien la carga
+    n_trabajos = max(1, workers * 4)
+    cortes = np.linspace(0, n_sorteos, n_trabajos + 1, dtype=np.int64)
+    trabajos_proc = [(tabla, seed + int(a), int(b - a)) for a, b in zip(cortes[:-1], cortes[1:]) if b > a]
+
+    n_cadenas = max(4, workers)
+    por_cadena = -(-n_sorteos // n_cadenas)
+    trabajos_mcmc = [(tabla, seed + 10_000_019 * (k + 1), por_cadena, adelgazamiento, quemado)
+                     for k in range(n_cadenas)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futuros_mcmc = [ex.submit(_trabajo_mcmc, t) for t in trabajos_mcmc]
+            resultados_proc = list(ex.map(_trabajo_procedimental, trabajos_proc))
+            resultados_mcmc = [f.result() for f in futuros_mcmc]
+    else:
+        resultados_proc = [_trabajo_procedimental(t) for t in trabajos_proc]
+        resultados_mcmc = [_trabajo_mcmc(t) for t in trabajos_mcmc]
+
+    grupos_proc = sum(r[0] for r in resultados_proc)
+    parejas_proc = sum(r[1] for r in resultados_proc)
+    grupos_unif = sum(r[0] for r in resultados_mcmc)
+    parejas_unif = sum(r[1] for r in resultados_mcmc)
+    n_unif = por_cadena * n_cadenas
+
+    #Diagnóstico de mezcla
+    trazas = [r[2] for r in resultados_mcmc]
+    n_estadisticos = trazas[0].shape[1]
+    r_hats = [r_hat([t[:, k] for t in trazas]) for k in range(n_estadisticos)]
+    ess = [tamano_efectivo([t[:, k] for t in trazas]) for k in range(n_estadisticos)]
+    ess_min = max(1.0, min(ess))
+    tasa_aceptacion = float(np.mean([r[3] for r in resultados_mcmc]))
+
+    #Parejas
+    iu = np.triu_indices(tabla.n_equipos, k=1)
+    p_proc, p_unif, chi2, validas = comparar(parejas_proc[iu], n_sorteos, parejas_unif[iu], n_unif, ess_min)
+    gl = int(validas.sum())
+    chi2_total = float(chi2[validas].sum())
+    parejas_por_sorteo = len(GRUPOS) * 6  # C(4, 2) parejas por grupo
+    tv_parejas = 0.5 * float(np.abs(p_proc - p_unif).sum()) / parejas_por_sorteo
+
+    df_parejas = pd.DataFrame({
+        'equipo_a': [tabla.equipos[i] for i in iu[0]],
+        'equipo_b': [tabla.equipos[j] for j in iu[1]],
+        'p_procedimiento': p_proc,
+        'p_uniforme': p_unif,
+        'diferencia': p_proc - p_unif,
+        'chi2': chi2,
+    })
+    df_parejas = df_parejas[validas].sort_values(by='chi2', ascending=False).reset_index(drop=True)
+
+    #Distribución de grupo de cada equipo
+    pg_proc = grupos_proc / n_sorteos
+    pg_unif = grupos_unif / n_unif
+    tv_grupos = 0.5 * np.abs(pg_proc - pg_unif).sum(axis=1)
+    df_grupos = pd.DataFrame({
+        'equipo': tabla.equipos,
+        'bombo': tabla.bombo,
+        'tv_grupo': tv_grupos,
+        'grupo_mas_sesgado': [GRUPOS[g] for g in np.argmax(np.abs(pg_proc - pg_unif), axis=1)],
+    }).sort_values(by='tv_grupo', ascending=False).reset_index(drop=True)
+
+    resumen = {
+        'n_sorteos': n_sorteos,
+        'workers': workers,
+        'segundos': time.perf_counter() - t0,
+        'cadenas': n_cadenas,
+        'adelgazamiento': adelgazamiento,
+        'tasa_aceptacion': tasa_aceptacion,
+        'r_hat_max': max(r_hats),
+        'ess_min': ess_min,
+        'chi2': chi2_total,
+        'grados_libertad': gl,
+        'p_valor': _sf_chi2(chi2_total, gl),
+        'tv_parejas': tv_parejas,
+        'tv_grupo_max': float(tv_grupos.max()),
+        'tv_grupo_medio': float(tv_grupos.mean()),
+    }
+    return {'resumen': resumen, 'parejas': df_parejas, 'grupos': df_grupos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Procedimiento FIFA vs muestreador uniforme de sorteos válidos")
+    parser.add_argument('--sorteos', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--adelgazamiento', type=int, default=50,
+                        help="Propuestas MCMC entre muestras consecutivas")
+    parser.add_argument('--output', help="Prefijo para guardar las tablas (CSV)")
+    args = parser.parse_args()
+
+    reporte = auditar(args.sorteos, workers=args.workers, seed=args.seed,
+                      adelgazamiento=args.adelgazamiento)
+    r = reporte['resumen']
+
+    print(f"--- Auditoría de uniformidad: {r['n_sorteos']} sorteos por muestreador, "
+          f"{r['workers']} workers, {r['segundos']:.1f} s ---")
+    print(f"MCMC: {r['cadenas']} cadenas, adelgazamiento {r['adelgazamiento']}, "
+          f"aceptación {r['tasa_aceptacion']:.1%}")
+    print(f"Mezcla: R-hat máx {r['r_hat_max']:.4f} | ESS mín {r['ess_min']:.0f}"
+          + ("" if r['r_hat_max'] < 1.01 else "  (¡ATENCIÓN! cadenas sin mezclar, aumentar adelgazamiento)"))
+    print(f"Chi-cuadrado parejas: {r['chi2']:.1f} con {r['grados_libertad']} gl (p = {r['p_valor']:.3g})")
+    print(f"Variación total: parejas {r['tv_parejas']:.4f} | grupo por equipo máx "
+          f"{r['tv_grupo_max']:.4f}, media {r['tv_grupo_medio']:.4f}")
+
+    print("\n--- Parejas con mayor discrepancia ---")
+    print(reporte['parejas'].head(15).round(4).to_string(index=False))
+    print("\n--- Equipos con mayor sesgo de grupo ---")
+    print(reporte['grupos'].head(10).round(4).to_string(index=False))
+
+    if args.output:
+        reporte['parejas'].to_csv(f"{args.output}_parejas.csv", index=False)
+        reporte['grupos'].to_csv(f"{args.output}_grupos.csv", index=False)
+
+
+if __name__ == "__main__":
+    main()
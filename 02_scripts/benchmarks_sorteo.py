@@ -0,0 +1,294 @@
+"""
+Benchmarks de regresión para cada etapa del sorteo.
+
+Mide, con escenarios sembrados y fijos:
+- asignar_bombos
+- checker_validez_grupo
+- lookahead sobre el estado del bombo 4: la primera bolita fácil y la de más nodos
+- sortear_bombo_1 y sortear_bombo_n
+- sorteo completo (sortear_mundial) y motor rápido (sorteo_rapido.sortear)
+- el camino de `fast_draw` de la GUI (llenar_sorteo_rapido, motor de `sorteo_rapido`) con stubs de UI
+- el peor caso de cada perfil del corpus adversarial (`estres_lookahead`) con el solver de
+  producción (`SOLVER_ESTRES`), que además tiene que quedar dentro de
+  `estres_lookahead.PRESUPUESTO_S`; si el lookahead llega al corte de nodos el caso falla, no
+  se registra el tiempo del sorteo cortado
+
+Cada corrida se agrega a un historial JSON; `comparar` marca regresiones por encima de un umbral.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/benchmarks_sorteo.py                  # corre y guarda en el historial
+    python 02_scripts/benchmarks_sorteo.py comparar         # última corrida vs la anterior
+    python 02_scripts/benchmarks_sorteo.py comparar --umbral 0.05 --base 0
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+from statistics import median
+
+import numpy as np
+
+from simular_bombos import df_clasificados, df_bombos, asignar_bombos
+from simular_sorteo_func import (checker_validez_grupo, lookahead, sortear_bombo_1,
+                                 sortear_bombo_n, sortear_mundial, esqueleto_sorteo)
+from formato_torneo import WC2026
+import sorteo_rapido
+import instrumentacion
+import estres_lookahead
+
+RUTA_HISTORIAL = '03_resultados/benchmarks/historial.json'
+SEED = 2026
+TIEMPO_MINIMO_MUESTRA = 0.02  # segundos por muestra; se repite la llamada hasta alcanzarlo
+SOLVER_ESTRES = 'lookahead_acotado'  # el de la GUI; el sin cota no termina los casos sintéticos
+
+
+class CasoNoTermina(Exception):
+    """Un caso de estrés llegó al corte de nodos de `estres_lookahead`: no hay tiempo que medir."""
+
+
+def _sembrar(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+# --- Escenarios fijos ---
+
+def _estado_hasta_bombo(n_bombo, seed=SEED):
+    """Sorteo sembrado completo hasta el bombo `n_bombo - 1` inclusive."""
+    _sembrar(seed)
+    grupos_dict, asignaciones, slots = sortear_bombo_1(df_bombos, verbose=False)
+    for n in range(2, n_bombo):
+        grupos_dict, asignaciones, slots = sortear_bombo_n(n, df_bombos, slots, grupos_dict,
+                                                           asignaciones, verbose=False)
+    return grupos_dict, asignaciones, slots
+
+
+def _copiar(grupos_dict, asignaciones, slots):
+    return ({g: list(v) for g, v in grupos_dict.items()}, dict(asignaciones),
+            {g: list(v) for g, v in slots.items()})
+
+
+def _escenarios_lookahead():
+    """
+    Estado del bombo 4 antes de la primera bolita.
+    - fácil: primer (bolita, grupo) válido para el que lookahead encuentra solución.
+    - peor caso: el (bolita, grupo) válido con más nodos de lookahead (contados con
+      `instrumentacion`) entre todos los del estado.
+    """
+    grupos_dict, _, slots = _estado_hasta_bombo(4)
+    bolas = list(df_bombos.loc[df_bombos['bombo'] == 4, 'codigo'])
+
+    facil = peor = None
+    nodos_peor = -1
+    for eq in bolas:
+        restantes = [b for b in bolas if b != eq]
+        for g in grupos_dict:
+            if len(grupos_dict[g]) >= 4 or not checker_validez_grupo(g, eq, grupos_dict, verbose=False):
+                continue
+            with instrumentacion.medir() as c:
+                valido = lookahead(g, eq, restantes, grupos_dict, slots, 4)
+            if valido and facil is None:
+                facil = (g, eq, restantes)
+            if c.nodos > nodos_peor:
+                peor, nodos_peor = (g, eq, restantes), c.nodos
+
+    return grupos_dict, slots, facil, peor
+
+
+class _EstadoStub:
+    #Réplica mínima de SorteoManager.reset para no depender de una página NiceGUI
+    def __init__(self, formato=WC2026):
+        self.grupos_dict, self.asignaciones, self.bombos_slots = esqueleto_sorteo(formato)
+        self.grupos = list(self.grupos_dict)
+        self.current_bombo = 1
+        self.current_team = None
+
+
+def construir_benchmarks():
+    """Diccionario nombre -> función sin argumentos a cronometrar."""
+    benchmarks = {}
+
+    benchmarks['asignar_bombos'] = lambda: asignar_bombos(df_clasificados, random_state=42)
+
+    grupos_4, _, _ = _estado_hasta_bombo(4)
+    grupo_chk = next(g for g in grupos_4 if len(grupos_4[g]) == 3)
+    eq_chk = df_bombos.loc[df_bombos['bombo'] == 4, 'codigo'].iloc[0]
+    benchmarks['checker_validez_grupo'] = lambda: checker_validez_grupo(grupo_chk, eq_chk, grupos_4, verbose=False)
+
+    grupos_la, slots_la, facil, peor = _escenarios_lookahead()
+    benchmarks['lookahead_bombo4_facil'] = lambda: lookahead(facil[0], facil[1], facil[2], grupos_la, slots_la, 4)
+    benchmarks['lookahead_bombo4_peor_caso'] = lambda: lookahead(peor[0], peor[1], peor[2], grupos_la, slots_la, 4)
+
+    def bombo_1():
+        _sembrar()
+        sortear_bombo_1(df_bombos, verbose=False)
+    benchmarks['sortear_bombo_1'] = bombo_1
+
+    estado_2 = _estado_hasta_bombo(2)
+    estado_4 = _estado_hasta_bombo(4)
+
+    def bombo_n(estado, n):
+        def correr():
+            grupos_dict, asignaciones, slots = _copiar(*estado)
+            _sembrar()
+            sortear_bombo_n(n, df_bombos, slots, grupos_dict, asignaciones, verbose=False)
+        return correr
+    benchmarks['sortear_bombo_n_2'] = bombo_n(estado_2, 2)
+    benchmarks['sortear_bombo_n_4'] = bombo_n(estado_4, 4)
+
+    def completo():
+        _sembrar()
+        sortear_mundial(df_bombos)
+    benchmarks['sorteo_completo'] = completo
+
+    tabla = sorteo_rapido.TablaSorteo(df_bombos)
+    benchmarks['sorteo_rapido'] = lambda: sorteo_rapido.sortear(tabla, random.Random(SEED))
+
+    from GUI_sorteo import llenar_sorteo_rapido
+
+    def gui_fast_draw():
+        _sembrar()
+        llenar_sorteo_rapido(_EstadoStub())
+    benchmarks['gui_fast_draw'] = gui_fast_draw
+
+    def estres(caso):
+        def correr():
+            if not estres_lookahead.reproducir(caso, solver=SOLVER_ESTRES):
+                raise CasoNoTermina(f"{caso['nombre']} pasó de {estres_lookahead.LIMITE_NODOS} nodos")
+        return correr
+    for caso in estres_lookahead.peores_por_perfil(estres_lookahead.cargar_corpus()):
+        benchmarks[f"estres_{caso['perfil']}"] = estres(caso)
+
+    return benchmarks
+
+
+def cronometrar(funcion, repeticiones=7):
+    """Mediana y mínimo del tiempo por llamada (s), con número de llamadas por muestra automático."""
+    funcion()  # calentamiento
+    t0 = time.perf_counter()
+    funcion()
+    una = max(time.perf_counter() - t0, 1e-7)
+    llamadas = max(1, int(TIEMPO_MINIMO_MUESTRA / una))
+
+    muestras = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        for _ in range(llamadas):
+            funcion()
+        muestras.append((time.perf_counter() - t0) / llamadas)
+    return {'mediana_s': median(muestras), 'min_s': min(muestras),
+            'llamadas_por_muestra': llamadas, 'repeticiones': repeticiones}
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cargar_historial(ruta=RUTA_HISTORIAL):
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def correr(ruta=RUTA_HISTORIAL, filtro=None, repeticiones=7):
+    benchmarks = construir_benchmarks()
+    resultados = {}
+    fallidos = []
+    for nombre, funcion in benchmarks.items():
+        if filtro and filtro not in nombre:
+            continue
+        try:
+            resultados[nombre] = cronometrar(funcion, repeticiones)
+        except CasoNoTermina as e:
+            fallidos.append(nombre)
+            print(f"{nombre:<30} {'-':>10}    <-- NO TERMINA ({e})")
+            continue
+        marca = ''
+        if nombre.startswith('estres_') and resultados[nombre]['mediana_s'] > estres_lookahead.PRESUPUESTO_S:
+            marca = '  <-- FUERA DE PRESUPUESTO'
+        print(f"{nombre:<30} {resultados[nombre]['mediana_s'] * 1e3:>10.3f} ms{marca}")
+
+    corrida = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_actual(),
+        'python': platform.python_version(),
+        'maquina': platform.node(),
+        'resultados': resultados,
+        'fallidos': fallidos,
+    }
+    historial = cargar_historial(ruta)
+    historial.append(corrida)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(historial, f, indent=2)
+    return corrida
+
+
+def comparar(ruta=RUTA_HISTORIAL, umbral=0.10, base=-2, actual=-1):
+    """
+    Compara dos corridas del historial (por defecto la última contra la anterior).
+    Devuelve la lista de benchmarks cuya mediana empeora más que `umbral` (fracción).
+    """
+    historial = cargar_historial(ruta)
+    if len(historial) < 2:
+        print("Se necesitan al menos dos corridas en el historial para comparar.")
+        return []
+
+    corrida_base, corrida_actual = historial[base], historial[actual]
+    print(f"Base:   {corrida_base['fecha']} ({corrida_base.get('commit')})")
+    print(f"Actual: {corrida_actual['fecha']} ({corrida_actual.get('commit')})\n")
+
+    regresiones = []
+    for nombre, res in corrida_actual['resultados'].items():
+        if nombre not in corrida_base['resultados']:
+            print(f"{nombre:<30} (nuevo)")
+            continue
+        antes = corrida_base['resultados'][nombre]['mediana_s']
+        ahora = res['mediana_s']
+        cambio = ahora / antes - 1
+        marca = ''
+        if cambio > umbral:
+            marca = '  <-- REGRESIÓN'
+            regresiones.append(nombre)
+        print(f"{nombre:<30} {antes * 1e3:>10.3f} ms -> {ahora * 1e3:>10.3f} ms  ({cambio:+.1%}){marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de regresión del sorteo")
+    parser.add_argument('accion', nargs='?', default='correr', choices=['correr', 'comparar'])
+    parser.add_argument('--historial', default=RUTA_HISTORIAL)
+    parser.add_argument('--filtro', help="Solo benchmarks cuyo nombre contenga este texto")
+    parser.add_argument('--repeticiones', type=int, default=7)
+    parser.add_argument('--umbral', type=float, default=0.10, help="Fracción de empeoramiento tolerada")
+    parser.add_argument('--base', type=int, default=-2, help="Índice de la corrida base en el historial")
+    args = parser.parse_args()
+
+    if args.accion == 'correr':
+        corrida = correr(args.historial, args.filtro, args.repeticiones)
+        fuera = [nombre for nombre, res in corrida['resultados'].items()
+                 if nombre.startswith('estres_') and res['mediana_s'] > estres_lookahead.PRESUPUESTO_S]
+        if fuera or corrida['fallidos']:
+            print(f"\n{len(fuera)} caso(s) de estrés por encima de {estres_lookahead.PRESUPUESTO_S} s, "
+                  f"{len(corrida['fallidos'])} sin terminar")
+            sys.exit(1)
+    else:
+        regresiones = comparar(args.historial, args.umbral, base=args.base)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresión(es) por encima del {args.umbral:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Consultas de probabilidad condicional sobre sorteos almacenados.
+
+Sobre una corrida escrita por `almacen_resultados` se construyen una sola vez dos índices
+invertidos (se guardan en `<corrida>/indice/` y se reutilizan en las siguientes consultas):
+- (equipo, grupo) -> bitset de IDs de sorteo en los que el equipo cae en ese grupo.
+- (grupo, firma de confederaciones) -> bitset de sorteos en los que el grupo tiene esa mezcla
+  de confederaciones (ej: 'AFC:1|CAF:1|UEFA:2').
+
+Una consulta conjuntiva ("MEX con UEFA" y "ARG en C") se resuelve intersectando bitsets, y las
+probabilidades salen de contar bits, sin recorrer los sorteos.
+
+Sintaxis de condiciones:
+    "MEX en A"        MEX cae en el Grupo A
+    "MEX con UEFA"    el grupo de MEX tiene al menos un equipo UEFA
+    "MEX con 2 UEFA"  el grupo de MEX tiene al menos dos equipos UEFA
+    "MEX con ESP"     MEX y ESP comparten grupo
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/consultas_sorteos.py 03_resultados/corrida_01 --dado "MEX con UEFA" --rivales ARG
+"""
+
+import os
+import json
+import time
+import argparse
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from simular_bombos import CONFEDERACIONES, CONFEDERACIONES_ORDEN
+from almacen_resultados import LectorResultados
+
+
+# --- Bitsets sobre numpy (uint64) ---
+
+def _a_bitset(mascara):
+    bits = np.packbits(mascara, bitorder='little')
+    relleno = (-len(bits)) % 8
+    if relleno:
+        bits = np.concatenate([bits, np.zeros(relleno, dtype=np.uint8)])
+    return bits.view(np.uint64)
+
+
+if hasattr(np, 'bitwise_count'):
+    def contar_bits(bitset):
+        return int(np.bitwise_count(bitset).sum())
+else:
+    _POPCOUNT_BYTE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def contar_bits(bitset):
+        return int(_POPCOUNT_BYTE[bitset.view(np.uint8)].sum(dtype=np.int64))
+
+
+def ids_de_bitset(bitset, n_sorteos):
+    return np.flatnonzero(np.unpackbits(bitset.view(np.uint8), bitorder='little')[:n_sorteos])
+
+
+def _firma_texto(conteos):
+    return '|'.join(f"{c}:{n}" for c, n in zip(CONFEDERACIONES_ORDEN, conteos) if n)
+
+
+def _firma_conteos(firma):
+    conteos = dict.fromkeys(CONFEDERACIONES_ORDEN, 0)
+    for parte in firma.split('|'):
+        if parte:
+            c, n = parte.split(':')
+            conteos[c] = int(n)
+    return conteos
+
+
+class IndiceSorteos:
+    """Índices invertidos de una corrida almacenada."""
+    def __init__(self, directorio):
+        self.lector = LectorResultados(directorio)
+        self.directorio_indice = os.path.join(directorio, 'indice')
+        self.equipos = self.lector.equipos
+        self.n_sorteos = self.lector.n_sorteos
+        self.grupos = self.lector.nombres_grupos  # los del formato de la corrida
+        self._idx = {eq: i for i, eq in enumerate(self.equipos)}
+
+        if not self._cargar():
+            self._construir()
+            self._guardar()
+
+        self.todos = _a_bitset(np.ones(self.n_sorteos, dtype=bool))
+
+    def _construir(self):
+        n_palabras = (self.n_sorteos + 63) // 64
+        self.equipo_grupo = np.zeros((len(self.equipos), len(self.grupos), n_palabras), dtype=np.uint64)
+
+        #Conteo de confederaciones por (grupo, confederación, sorteo)
+        conteos = np.zeros((len(self.grupos), len(CONFEDERACIONES_ORDEN), self.n_sorteos), dtype=np.int8)
+        for i, eq in enumerate(self.equipos):
+            grupos_eq = self.lector.grupos(eq)
+            c = CONFEDERACIONES_ORDEN.index(CONFEDERACIONES[eq])
+            for g in range(len(self.grupos)):
+                mascara = grupos_eq == g
+                self.equipo_grupo[i, g] = _a_bitset(mascara)
+                conteos[g, c] += mascara
+
+        #Cada combinación de conteos se codifica en base slots + 1 (un grupo tiene como mucho `slots` equipos)
+        base = self.lector.slots_por_grupo + 1
+        pesos = base ** np.arange(len(CONFEDERACIONES_ORDEN), dtype=np.int64)
+        self.firmas = []
+        bitsets = []
+        for g in range(len(self.grupos)):
+            codigos = np.tensordot(pesos, conteos[g].astype(np.int64), axes=1)
+            for codigo in np.unique(codigos):
+                digitos = [(int(codigo) // int(p)) % base for p in pesos]
+                self.firmas.append((self.grupos[g], _firma_texto(digitos)))
+                bitsets.append(_a_bitset(codigos == codigo))
+        self.grupo_firma = np.array(bitsets, dtype=np.uint64).reshape(len(bitsets), n_palabras)
+
+    def _guardar(self):
+        os.makedirs(self.directorio_indice, exist_ok=True)
+        np.save(os.path.join(self.directorio_indice, 'equipo_grupo.npy'), self.equipo_grupo)
+        np.save(os.path.join(self.directorio_indice, 'grupo_firma.npy'), self.grupo_firma)
+        with open(os.path.join(self.directorio_indice, 'indice.json'), 'w', encoding='utf-8') as f:
+            json.dump({'n_sorteos': self.n_sorteos, 'firmas': self.firmas}, f)
+
+    def _cargar(self):
+        ruta_json = os.path.join(self.directorio_indice, 'indice.json')
+        if not os.path.exists(ruta_json):
+            return False
+        with open(ruta_json, encoding='utf-8') as f:
+            meta = json.load(f)
+        #Si la corrida creció desde que se construyó el índice, se reconstruye
+        if meta['n_sorteos'] != self.n_sorteos:
+            return False
+        self.firmas = [tuple(x) for x in meta['firmas']]
+        self.equipo_grupo = np.load(os.path.join(self.directorio_indice, 'equipo_grupo.npy'), mmap_mode='r')
+        self.grupo_firma = np.load(os.path.join(self.directorio_indice, 'grupo_firma.npy'), mmap_mode='r')
+        return True
+
+    # --- Bitsets elementales ---
+
+    def en_grupo(self, equipo, grupo):
+        return self.equipo_grupo[self._idx[equipo], self.grupos.index(grupo)]
+
+    def grupo_con_confederacion(self, grupo, confederacion, minimo=1):
+        """Sorteos en los que `grupo` tiene al menos `minimo` equipos de `confederacion`."""
+        resultado = np.zeros_like(self.todos)
+        for k, (g, firma) in enumerate(self.firmas):
+            if g == grupo and _firma_conteos(firma)[confederacion] >= minimo:
+                resultado |= self.grupo_firma[k]
+        return resultado
+
+    def condicion(self, texto):
+        """Bitset de la condición en texto (ver sintaxis en el docstring del módulo)."""
+        partes = texto.split()
+        equipo = partes[0].upper()
+        if equipo not in self._idx:
+            raise ValueError(f"Equipo desconocido: {equipo}")
+
+        if len(partes) == 3 and partes[1] == 'en':
+            return self.en_grupo(equipo, partes[2].upper())
+
+        if len(partes) in (3, 4) and partes[1] == 'con':
+            minimo = int(partes[2]) if len(partes) == 4 else 1
+            objetivo = partes[-1].upper()
+            resultado = np.zeros_like(self.todos)
+            for g in self.grupos:
+                if objetivo in CONFEDERACIONES_ORDEN:
+                    resultado |= self.en_grupo(equipo, g) & self.grupo_con_confederacion(g, objetivo, minimo)
+                elif objetivo in self._idx:
+                    resultado |= self.en_grupo(equipo, g) & self.en_grupo(objetivo, g)
+                else:
+                    raise ValueError(f"Equipo o confederación desconocidos: {objetivo}")
+            return resultado
+
+        raise ValueError(f"Condición no reconocida: '{texto}'")
+
+    def consultar(self, condiciones):
+        """Intersección de todas las condiciones (lista de textos)."""
+        resultado = self.todos.copy()
+        for texto in condiciones:
+            resultado &= self.condicion(texto)
+        return resultado
+
+    # --- Consultas de alto nivel ---
+
+    def probabilidad(self, evento, dado=()):
+        """P(evento | dado), con `evento` y `dado` en texto."""
+        base = self.consultar(dado)
+        n_base = contar_bits(base)
+        if n_base == 0:
+            return float('nan'), 0
+        return contar_bits(base & self.condicion(evento)) / n_base, n_base
+
+    def rivales_probables(self, equipo, dado=()):
+        """Probabilidad condicional de cada rival de compartir grupo con `equipo`."""
+        base = self.consultar(dado)
+        n_base = contar_bits(base)
+        conteo = np.zeros(len(self.equipos), dtype=np.int64)
+        grupos = np.zeros(len(self.grupos), dtype=np.int64)
+        if n_base:
+            i_eq = self._idx[equipo]
+            for g in range(len(self.grupos)):
+                en_g = base & self.equipo_grupo[i_eq, g]
+                grupos[g] = contar_bits(en_g)
+                if grupos[g] == 0:
+                    continue
+                for j in range(len(self.equipos)):
+                    if j != i_eq:
+                        conteo[j] += contar_bits(en_g & self.equipo_grupo[j, g])
+
+        df = pd.DataFrame({
+            'rival': self.equipos,
+            'confederacion': [CONFEDERACIONES[eq] for eq in self.equipos],
+            'probabilidad': conteo / max(n_base, 1),
+        })
+        df = df[df['rival'] != equipo].sort_values(by='probabilidad', ascending=False)
+        df.attrs['n_condicionados'] = n_base
+        df.attrs['grupos'] = dict(zip(self.grupos, grupos / max(n_base, 1)))
+        return df.reset_index(drop=True)
+
+
+@lru_cache(maxsize=4)
+def indice_para(directorio):
+    """Índice compartido por proceso (la GUI lo reutiliza entre sesiones)."""
+    return IndiceSorteos(directorio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probabilidades condicionales sobre sorteos almacenados")
+    parser.add_argument('directorio', help="Corrida escrita por almacen_resultados.py")
+    parser.add_argument('--dado', action='append', default=[],
+                        help='Condición, repetible. Ej: --dado "MEX con UEFA" --dado "ARG en C"')
+    parser.add_argument('--rivales', help="Equipo del que listar rivales probables")
+    parser.add_argument('--evento', help='Evento del que calcular la probabilidad. Ej: "ARG con ESP"')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    indice = indice_para(args.directorio)
+    t_indice = time.perf_counter() - t0
+    print(f"Índice de {indice.n_sorteos} sorteos listo en {t_indice * 1000:.0f} ms")
+
+    if args.evento:
+        t0 = time.perf_counter()
+        prob, n_base = indice.probabilidad(args.evento, args.dado)
+        print(f"P({args.evento} | {' y '.join(args.dado) or 'nada'}) = {prob:.4f} "
+              f"({n_base} sorteos condicionados, {1000 * (time.perf_counter() - t0):.1f} ms)")
+
+    if args.rivales:
+        t0 = time.perf_counter()
+        df = indice.rivales_probables(args.rivales.upper(), args.dado)
+        print(f"\n--- Rivales probables de {args.rivales.upper()} | {' y '.join(args.dado) or 'nada'} "
+              f"({df.attrs['n_condicionados']} sorteos, {1000 * (time.perf_counter() - t0):.1f} ms) ---")
+        print(df.head(args.top).round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
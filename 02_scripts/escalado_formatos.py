@@ -0,0 +1,160 @@
+"""
+Benchmark de escalado: cómo crecen el tiempo de sorteo y el coste de factibilidad con el tamaño
+del torneo, sobre los formatos de `formato_torneo` (48, 64 y 96 equipos).
+
+Para cada formato (equipos reales en `wc2026`, sintéticos en el resto) mide:
+- `lookahead` (simular_sorteo_func): búsqueda en profundidad sin cota. Se cuentan los nodos
+  por sorteo con `instrumentacion` y se corta en `LIMITE_NODOS`; un sorteo cortado se reporta
+  aparte, porque su tiempo no está acotado.
+- `sorteo_rapido`: condición de Hall sobre confederaciones. Se cuentan las comprobaciones de
+  factibilidad por sorteo y el tiempo de cada una (como mucho 2^6 - 1 subconjuntos, con
+  máscaras de grupos del tamaño del formato).
+- `nucleo_sorteo`: el mismo procedimiento compilado (Numba si está instalado), por lote.
+
+La última columna de cada motor es el factor respecto del primer formato de la lista.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/escalado_formatos.py
+    python 02_scripts/escalado_formatos.py --formatos wc2026 sintetico_96 --sorteos-lookahead 10
+"""
+
+import time
+import random
+import argparse
+from contextlib import contextmanager, nullcontext
+from statistics import median
+
+import numpy as np
+
+import instrumentacion
+import sorteo_rapido
+import formato_torneo
+from nucleo_sorteo import NucleoSorteo
+from simular_bombos import df_bombos
+from simular_sorteo_func import sortear_mundial
+from estres_lookahead import confederaciones_de
+
+SEED = 2026
+LIMITE_NODOS = 200_000       # corte del lookahead por sorteo (~2 s)
+SORTEOS_LOOKAHEAD = 10
+SORTEOS_RAPIDO = 300
+SORTEOS_NUCLEO = 20_000
+
+
+def tabla_de(formato):
+    """Equipos del formato: los reales para el 2026, sintéticos para el resto."""
+    if formato.composicion is None:
+        return df_bombos
+    return formato_torneo.equipos_sinteticos(formato)
+
+
+@contextmanager
+def contar_factible():
+    """Cuenta las llamadas a `sorteo_rapido.factible` y el tiempo dentro de ellas mientras dura el bloque."""
+    original = sorteo_rapido.factible
+    conteo = {'llamadas': 0, 'segundos': 0.0}
+
+    def contado(*args):
+        t0 = time.perf_counter()
+        try:
+            return original(*args)
+        finally:
+            conteo['segundos'] += time.perf_counter() - t0
+            conteo['llamadas'] += 1
+
+    sorteo_rapido.factible = contado
+    try:
+        yield conteo
+    finally:
+        sorteo_rapido.factible = original
+
+
+def medir_lookahead(df, formato, n_sorteos, limite_nodos=LIMITE_NODOS):
+    tiempos, nodos, cortados = [], [], 0
+    for i in range(n_sorteos):
+        random.seed(SEED + i)
+        np.random.seed(SEED + i)
+        t0 = time.perf_counter()
+        try:
+            with instrumentacion.medir(limite_nodos) as c:
+                sortear_mundial(df, formato=formato)
+        except instrumentacion.LimiteNodosExcedido:
+            cortados += 1
+            continue
+        tiempos.append(time.perf_counter() - t0)
+        nodos.append(c.nodos)
+    return {
+        'ms_sorteo': median(tiempos) * 1e3 if tiempos else float('nan'),
+        'nodos_sorteo': median(nodos) if nodos else float('nan'),
+        'cortados': cortados,
+    }
+
+
+def medir_rapido(tabla, n_sorteos):
+    t0 = time.perf_counter()
+    for i in range(n_sorteos):
+        sorteo_rapido.sortear(tabla, random.Random(SEED + i))
+    segundos = time.perf_counter() - t0
+    with contar_factible() as conteo:
+        for i in range(n_sorteos):
+            sorteo_rapido.sortear(tabla, random.Random(SEED + i))
+    return {
+        'ms_sorteo': segundos / n_sorteos * 1e3,
+        'comprobaciones_sorteo': conteo['llamadas'] / n_sorteos,
+        'us_comprobacion': conteo['segundos'] / max(conteo['llamadas'], 1) * 1e6,
+    }
+
+
+def medir_nucleo(tabla, n_sorteos):
+    nucleo = NucleoSorteo(tabla)
+    nucleo.sortear_lote(1, seed=SEED)  # compilación o caché en disco
+    t0 = time.perf_counter()
+    nucleo.sortear_lote(n_sorteos, seed=SEED)
+    return {'us_sorteo': (time.perf_counter() - t0) / n_sorteos * 1e6}
+
+
+def medir(formato, sorteos_lookahead=SORTEOS_LOOKAHEAD, sorteos_rapido=SORTEOS_RAPIDO, sorteos_nucleo=SORTEOS_NUCLEO):
+    df = tabla_de(formato)
+    with confederaciones_de(df) if formato.composicion is not None else nullcontext():
+        tabla = sorteo_rapido.TablaSorteo(df, formato)
+        return {
+            'lookahead': medir_lookahead(df, formato, sorteos_lookahead),
+            'sorteo_rapido': medir_rapido(tabla, sorteos_rapido),
+            'nucleo_sorteo': medir_nucleo(tabla, sorteos_nucleo),
+        }
+
+
+def _factor(valor, base):
+    if base != base or valor != valor or not base:  # NaN: sin sorteos completos
+        return '-'
+    return f"x{valor / base:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de sorteo y coste de factibilidad según el tamaño del torneo")
+    parser.add_argument('--formatos', nargs='+', default=list(formato_torneo.cargar_formatos()))
+    parser.add_argument('--sorteos-lookahead', type=int, default=SORTEOS_LOOKAHEAD)
+    parser.add_argument('--sorteos-rapido', type=int, default=SORTEOS_RAPIDO)
+    parser.add_argument('--sorteos-nucleo', type=int, default=SORTEOS_NUCLEO)
+    args = parser.parse_args()
+
+    print(f"{'':<20} {'':>7} | {'lookahead (sin cota)':^38} | {'sorteo_rapido (Hall)':^40} | {'nucleo_sorteo':^18}")
+    print(f"{'formato':<20} {'equipos':>7} | {'ms/sorteo':>10} {'nodos':>9} {'cortados':>8} {'':>7} | "
+          f"{'ms/sorteo':>10} {'compr.':>8} {'µs/compr.':>10} {'':>7} | {'µs/sorteo':>10} {'':>7}")
+    base = None
+    for nombre in args.formatos:
+        formato = formato_torneo.formato(nombre)
+        r = medir(formato, args.sorteos_lookahead, args.sorteos_rapido, args.sorteos_nucleo)
+        la, ra, nu = r['lookahead'], r['sorteo_rapido'], r['nucleo_sorteo']
+        base = base or r
+        cortados = f"{la['cortados']}/{args.sorteos_lookahead}"
+        print(f"{nombre:<20} {formato.n_equipos:>7} | {la['ms_sorteo']:>10.1f} {la['nodos_sorteo']:>9.0f} {cortados:>8} "
+              f"{_factor(la['ms_sorteo'], base['lookahead']['ms_sorteo']):>7} | "
+              f"{ra['ms_sorteo']:>10.2f} {ra['comprobaciones_sorteo']:>8.0f} {ra['us_comprobacion']:>10.1f} "
+              f"{_factor(ra['ms_sorteo'], base['sorteo_rapido']['ms_sorteo']):>7} | "
+              f"{nu['us_sorteo']:>10.1f} {_factor(nu['us_sorteo'], base['nucleo_sorteo']['us_sorteo']):>7}")
+    print(f"\nlookahead: mediana de los sorteos completos; 'cortados' pasaron de {LIMITE_NODOS} nodos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Generador adversarial de casos de estrés para el lookahead del sorteo.
+
+`lookahead` (simular_sorteo_func) es una búsqueda en profundidad sin cota: si colocar una
+bolita deja sin solución al resto del bombo, recorre todo el árbol antes de descartar el grupo.
+Con los bombos reales son unos cientos de nodos por sorteo, pero nada acota el peor caso con
+otros bombos (muchos UEFA, varios ganadores de repechaje de CONCACAF...).
+
+Este script busca esos peores casos:
+- Tablas sintéticas con el esquema de df_bombos (codigo, confederacion, bombo): los anfitriones
+  reales en el bombo 1 y 45 equipos `Z01`...`Z45` con confederaciones sorteadas según un perfil
+  (`PERFILES`) y los topes globales del reglamento (24 UEFA, 12 de cada otra confederación).
+  El perfil 'real' parte de df_bombos y solo cambia el orden de las bolitas.
+- Sobre cada tabla, ascenso de colinas sobre el orden de las bolitas y la composición de los
+  bombos, maximizando los nodos del lookahead en un sorteo completo (`instrumentacion`).
+  Mutaciones: intercambiar dos bolitas de un bombo, cambiar de bombo a dos equipos o cambiar la
+  confederación de uno. Los nodos no dependen de la máquina; el tiempo se guarda aparte.
+- Las tablas en las que el procedimiento se queda sin grupo válido (el lookahead solo mira el
+  bombo en curso) no son sorteos posibles y se descartan.
+
+Los peores casos de cada perfil se guardan en `RUTA_CORPUS` (versionado con el repo y mezclado
+con lo que ya hubiera). `benchmarks_sorteo` cronometra el peor de cada perfil con el lookahead
+acotado, y `verificar` exige que cada solver de producción de `SOLVERS` termine cada caso en menos
+de `PRESUPUESTO_S`. El lookahead sin cota (`REFERENCIAS`) se mide y se muestra como referencia,
+fuera del aprobado: no termina los casos sintéticos, que es justamente lo que buscan. Ambos
+corren con el corte de `LIMITE_NODOS` activo para que un caso sin cota no los cuelgue; un sorteo
+cortado de un solver de producción cuenta como fuera de presupuesto. Los motores enteros (`sorteo_rapido`, `nucleo_sorteo`) sacan las bolitas con su propio generador, así que
+para ellos el caso fija la tabla pero no el orden.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/estres_lookahead.py buscar --segundos 300 --seed 0
+    python 02_scripts/estres_lookahead.py verificar
+    python 02_scripts/estres_lookahead.py verificar --solver lookahead_acotado --presupuesto 0.5
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime
+from statistics import median
+from contextlib import contextmanager
+from collections import Counter
+
+import pandas as pd
+
+import instrumentacion
+import sorteo_rapido
+from simular_bombos import df_bombos, CONFEDERACIONES, CONFEDERACIONES_ORDEN
+from simular_sorteo_func import sortear_mundial, ANFITRIONES, VERSION_REGLAS
+from nucleo_sorteo import NucleoSorteo
+from factibilidad_acotada import ComprobadorAcotado
+
+RUTA_CORPUS = '01_datos_brutos/casos_estres_lookahead.json'
+PRESUPUESTO_S = 0.5         # segundos por sorteo completo de un caso, para cualquier solver
+LIMITE_NODOS = 100_000      # corte del lookahead (~1 s, ya fuera de presupuesto); el caso se guarda igual
+PASOS_POR_REINICIO = 150    # mutaciones evaluadas antes de empezar otra tabla
+CASOS_POR_PERFIL = 3        # peores casos que se guardan de cada perfil
+
+#Peso de cada confederación al sortear los 45 equipos sintéticos (1 si no aparece)
+PERFILES = {
+    'real': None,
+    'aleatorio': {},
+    'uefa_pesado': {'UEFA': 8},
+    'concacaf_repechaje': {'CONCACAF': 5, 'UEFA': 3},
+}
+TOPES = {c: len(sorteo_rapido.GRUPOS) * sorteo_rapido.MAXIMO_POR_GRUPO.get(c, 1) for c in CONFEDERACIONES_ORDEN}
+
+
+# --- Tablas y casos ---
+
+def tabla_de(caso):
+    """df con el esquema de df_bombos (codigo, confederacion, bombo) a partir de un caso."""
+    return pd.DataFrame(caso['equipos'], columns=['codigo', 'confederacion', 'bombo'])
+
+
+@contextmanager
+def confederaciones_de(df):
+    """
+    Da de alta en `CONFEDERACIONES` los equipos de `df` mientras dura el bloque: los solvers
+    consultan la confederación por código en ese dict (compartido por todos los módulos).
+    """
+    previas = {eq: CONFEDERACIONES[eq] for eq in df['codigo'] if eq in CONFEDERACIONES}
+    try:
+        CONFEDERACIONES.update(zip(df['codigo'], df['confederacion']))
+        yield df
+    finally:
+        for eq in df['codigo']:
+            if eq in previas:
+                CONFEDERACIONES[eq] = previas[eq]
+            else:
+                CONFEDERACIONES.pop(eq, None)
+
+
+def _dentro_de_topes(equipos):
+    conteo = Counter(conf for _, conf, _ in equipos)
+    return all(conteo[c] <= TOPES[c] for c in conteo)
+
+
+def caso_inicial(perfil, rng):
+    """Tabla del perfil con un orden de bolitas al azar."""
+    if PERFILES[perfil] is None:
+        equipos = [[eq, conf, int(b)] for eq, conf, b in
+                   df_bombos[['codigo', 'confederacion', 'bombo']].itertuples(index=False)]
+    else:
+        pesos = [PERFILES[perfil].get(c, 1) for c in CONFEDERACIONES_ORDEN]
+        anfitriones = [[eq, CONFEDERACIONES[eq], 1] for eq in ANFITRIONES]
+        bombos = [1] * (12 - len(anfitriones)) + [2] * 12 + [3] * 12 + [4] * 12
+        while True:
+            rng.shuffle(bombos)
+            confs = rng.choices(CONFEDERACIONES_ORDEN, weights=pesos, k=len(bombos))
+            equipos = anfitriones + [[f"Z{k + 1:02d}", c, b] for k, (c, b) in enumerate(zip(confs, bombos))]
+            if _dentro_de_topes(equipos):
+                break
+    orden = [eq for eq, _, _ in equipos if eq not in ANFITRIONES]
+    rng.shuffle(orden)
+    return {'perfil': perfil, 'equipos': equipos, 'orden': orden}
+
+
+def mutar(caso, rng):
+    """Copia de `caso` con una mutación; la tabla del perfil 'real' no se toca."""
+    equipos = [list(e) for e in caso['equipos']]
+    orden = list(caso['orden'])
+    fila = {e[0]: e for e in equipos}
+    r = rng.random()
+    if r < 0.5 or PERFILES[caso['perfil']] is None:
+        #Dos bolitas del mismo bombo cambian de turno
+        a = rng.randrange(len(orden))
+        mismo_bombo = [k for k, eq in enumerate(orden) if fila[eq][2] == fila[orden[a]][2] and k != a]
+        b = rng.choice(mismo_bombo)
+        orden[a], orden[b] = orden[b], orden[a]
+    elif r < 0.8:
+        #Dos equipos de bombos distintos intercambian bombo (cada uno toma el turno del otro)
+        a, b = rng.sample(orden, 2)
+        fila[a][2], fila[b][2] = fila[b][2], fila[a][2]
+    else:
+        #Un equipo cambia de confederación (dentro de los topes)
+        eq = rng.choice(orden)  # los anfitriones no están en `orden`
+        fila[eq][1] = rng.choice(CONFEDERACIONES_ORDEN)
+        if not _dentro_de_topes(equipos):
+            return mutar(caso, rng)
+    return {'perfil': caso['perfil'], 'equipos': equipos, 'orden': orden}
+
+
+def evaluar(caso, limite_nodos=LIMITE_NODOS):
+    """
+    Reproduce el sorteo del caso con el solver original instrumentado.
+    Devuelve las métricas, o None si el procedimiento se queda sin grupo válido.
+    """
+    df = tabla_de(caso)
+    random.seed(0)  # solo decide los slots, que no afectan al lookahead
+    limite_alcanzado = False
+    t0 = time.perf_counter()
+    with confederaciones_de(df), instrumentacion.medir(limite_nodos) as c:
+        try:
+            sortear_mundial(df, orden_bolas=caso['orden'])
+        except ValueError:
+            return None
+        except instrumentacion.LimiteNodosExcedido:
+            limite_alcanzado = True
+    resumen = c.resumen()
+    return {
+        'nodos': c.nodos,
+        'backtracks': c.backtracks,
+        'lookaheads': c.lookaheads,
+        'segundos': round(time.perf_counter() - t0, 4),
+        'bola_max_s': round(resumen['bola_max_s'], 4),
+        'bola_max_equipo': resumen['bola_max_equipo'],
+        'limite_alcanzado': limite_alcanzado,
+    }
+
+
+# --- Búsqueda ---
+
+def ascenso(perfil, rng, pasos=PASOS_POR_REINICIO, t_fin=float('inf')):
+    """Ascenso de colinas desde una tabla nueva del perfil; devuelve el peor caso encontrado."""
+    while True:
+        actual = caso_inicial(perfil, rng)
+        metricas = evaluar(actual)
+        if metricas is not None:
+            break
+    actual.update(metricas)
+
+    for _ in range(pasos):
+        if actual['limite_alcanzado'] or time.perf_counter() > t_fin:
+            break
+        candidato = mutar(actual, rng)
+        metricas = evaluar(candidato)
+        #Se aceptan empates para poder cruzar mesetas
+        if metricas is not None and metricas['nodos'] >= actual['nodos']:
+            candidato.update(metricas)
+            actual = candidato
+    return actual
+
+
+def buscar(segundos, seed=0, perfiles=None, corpus=None, por_perfil=CASOS_POR_PERFIL, pasos=PASOS_POR_REINICIO):
+    """Reinicios de `ascenso` por perfil hasta agotar `segundos`; mezcla con `corpus` y se queda con los peores."""
+    rng = random.Random(seed)
+    perfiles = perfiles or list(PERFILES)
+    candidatos = [c for c in (corpus or []) if c['perfil'] in perfiles]
+    t_fin = time.perf_counter() + segundos
+    reinicios = 0
+    while time.perf_counter() < t_fin:
+        perfil = perfiles[reinicios % len(perfiles)]
+        caso = ascenso(perfil, rng, pasos, t_fin)
+        reinicios += 1
+        candidatos.append(caso)
+        print(f"reinicio {reinicios:>4} {perfil:<20} {caso['nodos']:>10} nodos {caso['segundos']:>8.3f} s")
+
+    peores = []
+    for perfil in perfiles:
+        del_perfil = sorted((c for c in candidatos if c['perfil'] == perfil), key=lambda c: (-c['nodos'], -c['segundos']))
+        vistos = set()
+        for caso in del_perfil:
+            clave = (json.dumps(caso['equipos']), tuple(caso['orden']))
+            if clave not in vistos:
+                vistos.add(clave)
+                peores.append(caso)
+            if len(vistos) == por_perfil:
+                break
+    for k, caso in enumerate(peores):
+        caso['nombre'] = f"{caso['perfil']}_{sum(c['perfil'] == caso['perfil'] for c in peores[:k]) + 1}"
+    return peores
+
+
+# --- Corpus ---
+
+def cargar_corpus(ruta=RUTA_CORPUS):
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding='utf-8') as f:
+        datos = json.load(f)
+    if datos.get('version_reglas') != VERSION_REGLAS:
+        print(f"Aviso: corpus generado con reglas {datos.get('version_reglas')}, actuales {VERSION_REGLAS}")
+    return datos['casos']
+
+
+def guardar_corpus(casos, ruta=RUTA_CORPUS):
+    #Un caso por línea: el archivo se versiona y así los diffs quedan legibles
+    claves = ['nombre', 'perfil', 'nodos', 'backtracks', 'lookaheads', 'segundos', 'bola_max_s',
+              'bola_max_equipo', 'limite_alcanzado', 'equipos', 'orden']
+    lineas = ',\n'.join('    ' + json.dumps({k: caso[k] for k in claves}, ensure_ascii=False) for caso in casos)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write('{\n')
+        f.write(f'  "version_reglas": {json.dumps(VERSION_REGLAS)},\n')
+        f.write(f'  "fecha": {json.dumps(datetime.now().isoformat(timespec="seconds"))},\n')
+        f.write(f'  "casos": [\n{lineas}\n  ]\n}}\n')
+
+
+def peores_por_perfil(casos):
+    """El caso con más nodos de cada perfil (los que cronometra `benchmarks_sorteo`)."""
+    peores = {}
+    for caso in casos:
+        if caso['perfil'] not in peores or caso['nodos'] > peores[caso['perfil']]['nodos']:
+            peores[caso['perfil']] = caso
+    return list(peores.values())
+
+
+# --- Solvers y presupuesto ---
+
+def _sortear_lookahead(df, caso):
+    sortear_mundial(df, orden_bolas=caso['orden'])
+
+
+def _sortear_lookahead_acotado(df, caso):
+    sortear_mundial(df, orden_bolas=caso['orden'], factibilidad=ComprobadorAcotado())
+
+
+def _sortear_rapido(df, caso):
+    sorteo_rapido.sortear(sorteo_rapido.TablaSorteo(df), random.Random(0))
+
+
+def _sortear_nucleo(df, caso):
+    NucleoSorteo(sorteo_rapido.TablaSorteo(df)).sortear_lote(1)
+
+
+#Nombre -> función(df, caso) que hace un sorteo completo del caso. Un solver nuevo se agrega aquí.
+SOLVERS = {
+    'lookahead': _sortear_lookahead,
+    'lookahead_acotado': _sortear_lookahead_acotado,
+    'sorteo_rapido': _sortear_rapido,
+    'nucleo_sorteo': _sortear_nucleo,
+}
+#Solvers que se miden como referencia, sin presupuesto: el lookahead sin cota no termina los casos sintéticos
+REFERENCIAS = {'lookahead'}
+
+
+def reproducir(caso, solver='lookahead'):
+    """
+    Un sorteo completo del caso con `solver`. Quedarse sin grupo válido también es terminar.
+    Devuelve False si el lookahead superó `LIMITE_NODOS` (el sorteo no terminó).
+    """
+    df = tabla_de(caso)
+    with confederaciones_de(df), instrumentacion.medir(LIMITE_NODOS):
+        random.seed(0)
+        try:
+            SOLVERS[solver](df, caso)
+        except ValueError:
+            pass
+        except instrumentacion.LimiteNodosExcedido:
+            return False
+    return True
+
+
+def verificar(casos, solvers=None, presupuesto=PRESUPUESTO_S, repeticiones=3):
+    """
+    Mediana del tiempo de cada (caso, solver); devuelve los de producción que se pasan de
+    `presupuesto`. Los de `REFERENCIAS` se muestran sin contar.
+    """
+    excedidos = []
+    for caso in casos:
+        for solver in solvers or list(SOLVERS):
+            terminado = reproducir(caso, solver)  # calentamiento (compilación de Numba, cachés)
+            tiempos = []
+            for _ in range(repeticiones if terminado else 0):
+                t0 = time.perf_counter()
+                reproducir(caso, solver)
+                tiempos.append(time.perf_counter() - t0)
+            segundos = median(tiempos) if terminado else float('inf')
+            marca = ''
+            if solver in REFERENCIAS:
+                marca = '  (referencia' + ('' if terminado else f', > límite de {LIMITE_NODOS} nodos') + ')'
+            elif not terminado:
+                marca = f'  <-- NO TERMINA (más de {LIMITE_NODOS} nodos)'
+                excedidos.append((caso['nombre'], solver, segundos))
+            elif segundos > presupuesto:
+                marca = '  <-- FUERA DE PRESUPUESTO'
+                excedidos.append((caso['nombre'], solver, segundos))
+            tiempo = f"{segundos * 1e3:>10.2f} ms" if terminado else f"{'-':>10}   "
+            print(f"{caso['nombre']:<24} {solver:<15} {tiempo}{marca}")
+    return excedidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Casos adversariales para el lookahead del sorteo")
+    parser.add_argument('accion', nargs='?', default='buscar', choices=['buscar', 'verificar'])
+    parser.add_argument('--corpus', default=RUTA_CORPUS)
+    parser.add_argument('--segundos', type=float, default=120, help="Tiempo de búsqueda")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--perfil', action='append', choices=list(PERFILES),
+                        help="Perfiles a buscar (se puede repetir; por defecto todos)")
+    parser.add_argument('--pasos', type=int, default=PASOS_POR_REINICIO, help="Mutaciones por reinicio")
+    parser.add_argument('--por-perfil', type=int, default=CASOS_POR_PERFIL)
+    parser.add_argument('--solver', action='append', choices=list(SOLVERS),
+                        help="Solvers a verificar (se puede repetir; por defecto todos)")
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO_S, help="Segundos por sorteo")
+    args = parser.parse_args()
+
+    corpus = cargar_corpus(args.corpus)
+    if args.accion == 'buscar':
+        peores = buscar(args.segundos, args.seed, args.perfil, corpus, args.por_perfil, args.pasos)
+        #Los perfiles que no se buscaron se conservan tal cual
+        otros = [c for c in corpus if c['perfil'] not in (args.perfil or list(PERFILES))]
+        guardar_corpus(otros + peores, args.corpus)
+        print(f"\n--- Corpus ({len(otros) + len(peores)} casos) en {args.corpus} ---")
+        for caso in otros + peores:
+            print(f"{caso['nombre']:<24} {caso['nodos']:>10} nodos {caso['segundos']:>8.3f} s"
+                  f"{'  (límite de nodos)' if caso['limite_alcanzado'] else ''}")
+    else:
+        if not corpus:
+            print(f"No hay casos en {args.corpus}; corre primero la búsqueda.")
+            sys.exit(1)
+        excedidos = verificar(corpus, args.solver, args.presupuesto)
+        if excedidos:
+            print(f"\n{len(excedidos)} caso(s) por encima de {args.presupuesto} s")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Comprobación de factibilidad con tiempo acotado para los sorteos animados.
+
+En la GUI, cada grupo candidato de una bolita pasa por `lookahead`, que corre en el event loop:
+un lookahead lento congela la animación (y a las demás sesiones) todo lo que tarde. Con los
+casos de `estres_lookahead` eso llega a segundos por bolita.
+
+`ComprobadorAcotado` tiene la misma firma que `lookahead` y responde siempre en tiempo acotado:
+1. Caché por estado canónico (`CacheFactibilidad`, compartida entre sesiones): la respuesta solo
+   depende de qué grupos siguen abiertos, qué confederaciones tiene cada uno y las que faltan
+   sacar, no de los nombres de los equipos ni de las letras de los grupos.
+2. `lookahead` con plazo: cada bolita tiene `PLAZO_BOLA_S` de lookahead exacto repartido entre
+   sus grupos candidatos. Dentro del plazo la respuesta es la de siempre.
+3. Vencido el plazo, la condición de Hall de `sorteo_rapido.factible` sobre el mismo estado:
+   también exacta (los equipos de una confederación son intercambiables) y con un coste fijo
+   de a lo sumo 2^6 - 1 comprobaciones.
+
+Así el solver de una bolita tarda como mucho PLAZO_BOLA_S más 12 respaldos (~1 ms), con la
+misma decisión que el lookahead sin plazo. El plazo cuenta solo tiempo de solver: entre grupo y
+grupo la GUI anima los rechazos. Por eso hay un comprobador por sorteo y no uno global.
+
+Uso desde consola (compara contra el lookahead sin plazo sobre el corpus de estrés, desde la raíz del repo):
+    python 02_scripts/factibilidad_acotada.py --plazo 0.05
+"""
+
+import time
+import argparse
+from collections import Counter, OrderedDict
+
+import sorteo_rapido
+from simular_bombos import CONFEDERACIONES, CONFEDERACIONES_ORDEN
+from simular_sorteo_func import lookahead, PlazoVencido
+from formato_torneo import WC2026
+
+PLAZO_BOLA_S = 0.05     # segundos de lookahead exacto por bolita (sumando sus grupos candidatos)
+TAMANO_CACHE = 4096     # estados canónicos guardados
+
+
+def estado_canonico(grupo_target, equipo_actual, equipos_restantes, grupos_dict, numero_de_bombo, formato=WC2026):
+    """
+    Clave del estado tras poner `equipo_actual` en `grupo_target`: (cupo de cada confederación
+    en el formato, bombo, confederaciones de cada grupo abierto ordenadas, confederaciones
+    restantes ordenadas).
+    """
+    abiertos = []
+    for g, equipos in grupos_dict.items():
+        confs = [e['conf'] for e in equipos]
+        if g == grupo_target:
+            confs.append(CONFEDERACIONES[equipo_actual])
+        if len(confs) < numero_de_bombo:
+            abiertos.append(tuple(sorted(confs)))
+    restantes = tuple(sorted(CONFEDERACIONES[eq] for eq in equipos_restantes))
+    cupo = tuple(formato.cupo(c) for c in CONFEDERACIONES_ORDEN)
+    return cupo, numero_de_bombo, tuple(sorted(abiertos)), restantes
+
+
+def factible_hall(clave):
+    """Respuesta exacta para un estado canónico con la condición de Hall del motor rápido."""
+    cupo, numero_de_bombo, abiertos, restantes = clave
+    conteo = []
+    for confs in abiertos:
+        por_conf = Counter(confs)
+        conteo.append([por_conf[c] for c in CONFEDERACIONES_ORDEN])
+    tamano = [0] * len(abiertos)  # solo se listan los grupos abiertos: todos admiten uno más
+    confs_restantes = [CONFEDERACIONES_ORDEN.index(c) for c in restantes]
+    return sorteo_rapido.factible(confs_restantes, 1, tamano, conteo, list(cupo), len(CONFEDERACIONES_ORDEN))
+
+
+class CacheFactibilidad:
+    """LRU de respuestas por estado canónico, con el origen de cada respuesta dada."""
+    def __init__(self, maximo=TAMANO_CACHE):
+        self.maximo = maximo
+        self._datos = OrderedDict()
+        self.origenes = Counter()  # 'cache', 'exacta' o 'respaldo' -> respuestas dadas
+
+    def __len__(self):
+        return len(self._datos)
+
+    def get(self, clave):
+        respuesta = self._datos.get(clave)
+        if respuesta is not None:
+            self._datos.move_to_end(clave)
+        return respuesta
+
+    def put(self, clave, respuesta):
+        self._datos[clave] = respuesta
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.maximo:
+            self._datos.popitem(last=False)
+
+
+class ComprobadorAcotado:
+    """Reemplazo de `lookahead` para un sorteo: caché, plazo por bolita y respaldo exacto."""
+    def __init__(self, cache=None, plazo_bola=PLAZO_BOLA_S):
+        self.cache = CacheFactibilidad() if cache is None else cache
+        self.plazo_bola = plazo_bola
+        self._bola = None
+        self._gastado = 0.0  # segundos de lookahead ya usados por la bolita en curso
+
+    def __call__(self, grupo_target, equipo_actual, equipos_restantes, grupos_dict, bombos_slots, numero_de_bombo,
+                 formato=WC2026):
+        if equipo_actual != self._bola:
+            self._bola, self._gastado = equipo_actual, 0.0
+
+        clave = estado_canonico(grupo_target, equipo_actual, equipos_restantes, grupos_dict, numero_de_bombo, formato)
+        respuesta = self.cache.get(clave)
+        if respuesta is not None:
+            self.cache.origenes['cache'] += 1
+            return respuesta
+
+        t0 = time.perf_counter()
+        try:
+            if self._gastado >= self.plazo_bola:
+                raise PlazoVencido("sin plazo restante para la bolita")
+            respuesta = lookahead(grupo_target, equipo_actual, equipos_restantes, grupos_dict, bombos_slots,
+                                  numero_de_bombo, plazo=t0 + self.plazo_bola - self._gastado, formato=formato)
+            self.cache.origenes['exacta'] += 1
+        except PlazoVencido:
+            respuesta = factible_hall(clave)
+            self.cache.origenes['respaldo'] += 1
+        self._gastado += time.perf_counter() - t0
+
+        self.cache.put(clave, respuesta)
+        return respuesta
+
+
+def main():
+    import random
+    import estres_lookahead
+    from simular_sorteo_func import sortear_mundial
+    import instrumentacion
+
+    parser = argparse.ArgumentParser(description="Factibilidad con plazo vs lookahead sin plazo (corpus de estrés)")
+    parser.add_argument('--plazo', type=float, default=PLAZO_BOLA_S, help="Segundos de lookahead por bolita")
+    args = parser.parse_args()
+
+    print(f"{'caso':<24} {'sin plazo':>12} {'con plazo':>12} {'bolita máx':>12}  iguales  origenes")
+    for caso in estres_lookahead.cargar_corpus():
+        df = estres_lookahead.tabla_de(caso)
+        with estres_lookahead.confederaciones_de(df):
+            random.seed(0)
+            t0 = time.perf_counter()
+            try:
+                with instrumentacion.medir(estres_lookahead.LIMITE_NODOS):
+                    original = sortear_mundial(df, orden_bolas=caso['orden'])[1]
+                sin_plazo = f"{(time.perf_counter() - t0) * 1e3:>9.1f} ms"
+            except instrumentacion.LimiteNodosExcedido:
+                original, sin_plazo = None, f"{'> límite':>12}"
+
+            comprobador = ComprobadorAcotado(plazo_bola=args.plazo)
+            random.seed(0)
+            with instrumentacion.medir() as c:
+                t0 = time.perf_counter()
+                acotado = sortear_mundial(df, orden_bolas=caso['orden'], factibilidad=comprobador)[1]
+                con_plazo = time.perf_counter() - t0
+            bola_max = max(t for _, _, t in c.tiempos_bola)
+        iguales = '-' if original is None else ('sí' if original == acotado else 'NO')
+        print(f"{caso['nombre']:<24} {sin_plazo:>12} {con_plazo * 1e3:>9.1f} ms {bola_max * 1e3:>9.1f} ms"
+              f"  {iguales:>7}  {dict(comprobador.cache.origenes)}")
+
+
+if __name__ == "__main__":
+    main()
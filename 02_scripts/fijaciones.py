@@ -0,0 +1,499 @@
+"""
+"¿Qué pasaría si...?": fijar equipos a mano y ver cómo termina el sorteo.
+
+Se fija una parte del sorteo (en texto, o con un `asignaciones_sorteo` / `grupos_dict` a medias
+del repo) y se obtiene al instante:
+1. Si es legal. Primero las reglas que se ven directo (anfitriones, slot 1 solo para el bombo 1,
+   un equipo por bombo y por slot en cada grupo, cupos por confederación) y la condición de Hall
+   por bombo (`sorteo_rapido.factible`), por confederación y por grupo. Si pasa, un completado
+   del procedimiento lo prueba legal; si el procedimiento se atasca, una búsqueda exacta sobre
+   confederaciones (`existe_completado`) decide.
+2. Sorteos completados desde lo fijado con `nucleo_sorteo` durante un presupuesto de tiempo
+   (`probabilidades_vivo.estimar`): P(grupo) de cada equipo sin fijar y rivales probables.
+3. Un completado de ejemplo (`sorteo_rapido.completar`) como `grupos_dict`.
+
+Los completados tratan a los fijados como si hubieran salido primero de su bombo: se cuentan para
+los cupos desde el principio y el resto del sorteo sigue el procedimiento FIFA. No es el
+condicionamiento exacto del procedimiento sobre el evento "estos equipos cayeron ahí" (eso
+exigiría descartar casi todos los sorteos completos), pero es exacto en lo que dice qué es legal.
+Si el procedimiento se queda sin grupo válido en algún bombo, ese sorteo se descarta y se cuenta.
+
+Sintaxis del texto (condiciones separadas con ';', como en `consultas_sorteos`):
+    "BRA en C"     BRA en el Grupo C (slot al azar entre los libres de su bombo)
+    "CRO en E2"    CRO en el slot E2
+    "NOR con MEX"  NOR en el grupo de MEX (que tiene que ser anfitrión o estar fijado)
+
+`evaluar` es una función de módulo con argumentos simples para poder correr en el pool de
+procesos de NiceGUI (`run.cpu_bound`). `instalar(app)` agrega `POST /api/que-pasaria`.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/fijaciones.py "BRA en C; NOR con MEX" --equipo BRA
+"""
+
+import math
+import time
+import random
+import argparse
+
+import sorteo_rapido
+import probabilidades_vivo
+from probabilidades_vivo import tabla
+from simular_bombos import CONFEDERACIONES, CONFEDERACIONES_ORDEN
+
+PRESUPUESTO = 0.15         # segundos de sorteos completados por evaluación
+PRESUPUESTO_MAXIMO = 2.0   # tope para el presupuesto pedido por la API
+LIMITE_NODOS = 2000        # nodos de `existe_completado` antes de darse por vencida (~0.5 s)
+INTENTOS_EJEMPLO = 20      # completados de `sorteo_rapido` probados para el ejemplo
+RIVALES_MOSTRADOS = 12
+
+
+# --- Entrada ---
+
+def _grupo_y_slot(t, texto):
+    """'C' -> (2, -1); 'E2' -> (4, 1)."""
+    texto = texto.upper()
+    if not texto or texto[0] not in t.grupos:
+        raise ValueError(f"Grupo desconocido: {texto}")
+    g = t.grupos.index(texto[0])
+    if len(texto) == 1:
+        return g, -1
+    if not texto[1:].isdigit() or not 1 <= int(texto[1:]) <= t.slots_por_grupo:
+        raise ValueError(f"Slot desconocido: {texto}")
+    return g, int(texto[1:]) - 1
+
+
+def _equipo(t, codigo):
+    codigo = codigo.upper()
+    if codigo not in t.idx:
+        raise ValueError(f"Equipo desconocido: {codigo}")
+    return t.idx[codigo]
+
+
+def parsear(texto, t=None):
+    """
+    {equipo: (grupo, slot)} de un texto de fijaciones (slot -1 si solo se fija el grupo).
+    Las condiciones "con" toman el grupo del otro equipo, que puede venir de otra condición.
+    """
+    t = t or tabla()
+    fijos = {}
+    juntos = []
+    for condicion in (c.strip() for c in texto.split(';')):
+        if not condicion:
+            continue
+        partes = condicion.split()
+        if len(partes) != 3 or partes[1] not in ('en', 'con'):
+            raise ValueError(f"Condición no reconocida: '{condicion}'")
+        i = _equipo(t, partes[0])
+        if partes[1] == 'en':
+            nuevo = _grupo_y_slot(t, partes[2])
+            if fijos.get(i, nuevo) != nuevo:
+                raise ValueError(f"{t.equipos[i]} fijado dos veces en lugares distintos")
+            fijos[i] = nuevo
+        else:
+            juntos.append((i, _equipo(t, partes[2])))
+
+    #Los anfitriones tienen grupo aunque no se fijen; "con" se resuelve hasta que no cambie nada
+    grupo_conocido = {i: g for i, (g, _) in t.anfitriones.items()}
+    grupo_conocido.update({i: g for i, (g, _) in fijos.items()})
+    pendientes = juntos
+    while pendientes:
+        quedan = []
+        for a, b in pendientes:
+            if a in grupo_conocido and b in grupo_conocido:
+                if grupo_conocido[a] != grupo_conocido[b]:
+                    raise ValueError(f"{t.equipos[a]} y {t.equipos[b]} ya están fijados en grupos distintos")
+            elif a in grupo_conocido or b in grupo_conocido:
+                g = grupo_conocido.get(a, grupo_conocido.get(b))
+                for i in (a, b):
+                    if i not in grupo_conocido:
+                        grupo_conocido[i] = g
+                        fijos[i] = (g, -1)
+            else:
+                quedan.append((a, b))
+        if len(quedan) == len(pendientes):
+            a, b = quedan[0]
+            raise ValueError(f"'{t.equipos[a]} con {t.equipos[b]}': ninguno de los dos tiene grupo; "
+                             f"fijá el grupo de uno de ellos")
+        pendientes = quedan
+    return fijos
+
+
+def desde_asignaciones(asignaciones, t=None):
+    """
+    {equipo: (grupo, slot)} de un `asignaciones_sorteo` ({eq: {'grupo': 'C', 'slot': 'C2'}}, el
+    slot es opcional) o de un `grupos_dict` a medias.
+    """
+    t = t or tabla()
+    if not isinstance(asignaciones, dict):
+        raise ValueError("Las asignaciones tienen que ser un objeto")
+    if all(isinstance(v, list) for v in asignaciones.values()):
+        for grupo, equipos in asignaciones.items():
+            if not all(isinstance(e, dict) and isinstance(e.get('codigo'), str) for e in equipos):
+                raise ValueError(f"Grupo {grupo}: cada equipo tiene que ser un objeto con 'codigo' "
+                                 f"(y 'slot' opcional), como en grupos_dict")
+        asignaciones = {e['codigo']: {'grupo': grupo, 'slot': e.get('slot')}
+                        for grupo, equipos in asignaciones.items() for e in equipos}
+    fijos = {}
+    for codigo, info in asignaciones.items():
+        if not isinstance(info, dict) or not all(isinstance(info.get(k), (str, type(None))) for k in ('grupo', 'slot')) \
+                or not (info.get('grupo') or info.get('slot')):
+            raise ValueError(f"{codigo}: se esperaba {{'grupo': 'C', 'slot': 'C2'}} (slot opcional), "
+                             f"no {info!r}")
+        i = _equipo(t, codigo)
+        g, s = _grupo_y_slot(t, info.get('slot') or info['grupo'])
+        if info.get('grupo') and info['grupo'].upper() != t.grupos[g]:
+            raise ValueError(f"{codigo}: el slot {info['slot']} no es del grupo {info['grupo']}")
+        fijos[i] = (g, s)
+    return fijos
+
+
+# --- Legalidad ---
+
+def _hall_bombo(t, n, pendientes, tiene, conteo):
+    """Condición de Hall del bombo n: sus equipos sin grupo en los grupos que no tienen uno de ese bombo."""
+    confs = [c for c in range(t.n_conf) for _ in range(pendientes[n][c])]
+    if not confs:
+        return True
+    abiertos = [0 if not tiene[g] >> n & 1 else 1 for g in range(t.n_grupos)]
+    return sorteo_rapido.factible(confs, 1, abiertos, conteo, t.cupo, t.n_conf)
+
+
+def _hall_confederacion(t, c, pendientes, tiene, conteo):
+    """
+    Condición de Hall de la confederación c entre bombos: para todo conjunto S de bombos, sus
+    equipos de c sin grupo no superan lo que aceptan los grupos (en cada grupo, lo que le queda
+    de cupo o la cantidad de bombos de S que le faltan, lo que sea menor).
+    """
+    bombos = [n for n in pendientes if pendientes[n][c]]
+    for subconjunto in range(1, 1 << len(bombos)):
+        S = [n for j, n in enumerate(bombos) if subconjunto >> j & 1]
+        capacidad = 0
+        for g in range(t.n_grupos):
+            faltan = sum(1 for n in S if not tiene[g] >> n & 1)
+            capacidad += min(t.cupo[c] - conteo[g][c], faltan)
+        if capacidad < sum(pendientes[n][c] for n in S):
+            return False
+    return True
+
+
+def _hall_grupo(t, g, pendientes, tiene, conteo):
+    """
+    Condición de Hall del grupo g: para todo conjunto S de bombos que le faltan, las
+    confederaciones que quedan en S (cada una hasta lo que le queda de cupo en g) alcanzan.
+    """
+    faltan = [n for n in pendientes if not tiene[g] >> n & 1]
+    for subconjunto in range(1, 1 << len(faltan)):
+        S = [n for j, n in enumerate(faltan) if subconjunto >> j & 1]
+        capacidad = 0
+        for c in range(t.n_conf):
+            capacidad += min(t.cupo[c] - conteo[g][c], sum(1 for n in S if pendientes[n][c]))
+        if capacidad < len(S):
+            return False
+    return True
+
+
+def _estado(t, fijos):
+    """(conteo, tiene, pendientes) con anfitriones y fijados: `tiene[g]` es una máscara de bombos."""
+    conteo = [[0] * t.n_conf for _ in range(t.n_grupos)]
+    tiene = [0] * t.n_grupos
+    pendientes = {n: [0] * t.n_conf for n in range(1, t.n_bombos + 1)}
+    for i in range(t.n_equipos):
+        if i in fijos:
+            g = fijos[i][0]
+            conteo[g][t.conf[i]] += 1
+            tiene[g] |= 1 << t.bombo[i]
+        else:
+            pendientes[t.bombo[i]][t.conf[i]] += 1
+    return conteo, tiene, pendientes
+
+
+def validar(t, fijos):
+    """
+    Motivo por el que `fijos` ({equipo: (grupo, slot)}) no puede ser parte de un sorteo, o None.
+    Reglas directas y las condiciones de Hall; no busca un completado (ver `existe_completado`).
+    """
+    fijos = dict(fijos)
+    for i, (g, s) in t.anfitriones.items():
+        if i in fijos and (fijos[i][0] != g or fijos[i][1] not in (-1, s)):
+            return f"{t.equipos[i]} es anfitrión: va en {t.grupos[g]}{s + 1}"
+        fijos[i] = (g, s)
+
+    ocupados = {}
+    bombo_en_grupo = {}
+    for i, (g, s) in fijos.items():
+        if s >= 0:
+            if (s == 0) != (t.bombo[i] == 1):
+                return (f"{t.equipos[i]} es del bombo {t.bombo[i]}: el slot {t.grupos[g]}1 es de las cabezas de serie"
+                        if s == 0 else f"{t.equipos[i]} es cabeza de serie: solo puede ir en {t.grupos[g]}1")
+            if (g, s) in ocupados:
+                return f"{t.equipos[ocupados[g, s]]} y {t.equipos[i]} en el mismo slot {t.grupos[g]}{s + 1}"
+            ocupados[g, s] = i
+        if (g, t.bombo[i]) in bombo_en_grupo:
+            return (f"{t.equipos[bombo_en_grupo[g, t.bombo[i]]]} y {t.equipos[i]} son del bombo {t.bombo[i]}: "
+                    f"no pueden estar los dos en el Grupo {t.grupos[g]}")
+        bombo_en_grupo[g, t.bombo[i]] = i
+
+    conteo, tiene, pendientes = _estado(t, fijos)
+    for g in range(t.n_grupos):
+        for c in range(t.n_conf):
+            if conteo[g][c] > t.cupo[c]:
+                equipos = [t.equipos[i] for i, (h, _) in fijos.items() if h == g and t.conf[i] == c]
+                return (f"Grupo {t.grupos[g]}: {', '.join(equipos)} superan el máximo de "
+                        f"{t.cupo[c]} de {CONFEDERACIONES[equipos[0]]} por grupo")
+    for n in range(1, t.n_bombos + 1):
+        if not _hall_bombo(t, n, pendientes, tiene, conteo):
+            return f"Los equipos que quedan del bombo {n} no entran en los grupos que les quedan"
+    for c, conf in enumerate(CONFEDERACIONES_ORDEN):
+        if not _hall_confederacion(t, c, pendientes, tiene, conteo):
+            return f"Los equipos de {conf} que quedan no entran en los grupos sin superar el cupo"
+    for g in range(t.n_grupos):
+        if not _hall_grupo(t, g, pendientes, tiene, conteo):
+            return f"El Grupo {t.grupos[g]} no se puede completar con los equipos que quedan"
+    return None
+
+
+def _hall_todas(t, pendientes, tiene, conteo):
+    """Las tres condiciones de Hall: por bombo, por confederación y por grupo."""
+    return (all(_hall_bombo(t, n, pendientes, tiene, conteo) for n in pendientes)
+            and all(_hall_confederacion(t, c, pendientes, tiene, conteo) for c in range(t.n_conf))
+            and all(_hall_grupo(t, g, pendientes, tiene, conteo) for g in range(t.n_grupos)))
+
+
+class _LimiteNodos(Exception):
+    pass
+
+
+def existe_completado(t, fijos, limite_nodos=LIMITE_NODOS):
+    """
+    True si hay un sorteo legal que contiene a `fijos`, False si no hay ninguno y None si la
+    búsqueda pasó de `limite_nodos`. `fijos` tiene que haber pasado `validar`.
+
+    Búsqueda en profundidad sobre confederaciones: en cada paso se coloca un equipo del par
+    (bombo, confederación) con menos grupos posibles, de cualquier bombo. Los grupos con la
+    misma firma (confederaciones y bombos que ya tiene) son intercambiables y se prueba uno
+    solo; los estados sin salida se memorizan por firma.
+    """
+    fijos = dict(fijos)
+    fijos.update({i: gs for i, gs in t.anfitriones.items()})
+    conteo, tiene, pendientes = _estado(t, fijos)
+    sin_salida = set()
+    nodos = [0]
+
+    def firma():
+        grupos = tuple(sorted((tiene[g], tuple(conteo[g])) for g in range(t.n_grupos)))
+        return grupos, tuple(tuple(pendientes[n]) for n in sorted(pendientes))
+
+    def candidatos(n, c):
+        vistos = set()
+        for g in range(t.n_grupos):
+            if tiene[g] >> n & 1 or conteo[g][c] >= t.cupo[c]:
+                continue
+            clave = (tiene[g], tuple(conteo[g]))
+            if clave not in vistos:
+                vistos.add(clave)
+                yield g
+
+    def buscar():
+        if not any(any(p) for p in pendientes.values()):
+            return True
+        clave = firma()
+        if clave in sin_salida:
+            return False
+        nodos[0] += 1
+        if nodos[0] > limite_nodos:
+            raise _LimiteNodos()
+
+        grupos_de = {(n, c): list(candidatos(n, c)) for n in pendientes for c in range(t.n_conf) if pendientes[n][c]}
+        n, c = min(grupos_de, key=lambda nc: len(grupos_de[nc]))
+        for g in grupos_de[n, c]:
+            pendientes[n][c] -= 1
+            conteo[g][c] += 1
+            tiene[g] |= 1 << n
+            ok = _hall_todas(t, pendientes, tiene, conteo) and buscar()
+            pendientes[n][c] += 1
+            conteo[g][c] -= 1
+            tiene[g] &= ~(1 << n)
+            if ok:
+                return True
+        sin_salida.add(clave)
+        return False
+
+    try:
+        return buscar()
+    except _LimiteNodos:
+        return None
+
+
+# --- Completados ---
+
+def resolver_slots(t, fijos, rng):
+    """(grupo_de, slot_de) con los fijados; a los que solo tienen grupo se les da un slot libre al azar."""
+    grupo_de = [-1] * t.n_equipos
+    slot_de = [-1] * t.n_equipos
+    for i, (g, s) in fijos.items():
+        grupo_de[i], slot_de[i] = g, s
+    for i, (g, s) in sorted(fijos.items()):
+        if s >= 0:
+            continue
+        if t.bombo[i] == 1:
+            slot_de[i] = 0
+            continue
+        ocupados = {slot_de[j] for j in range(t.n_equipos) if grupo_de[j] == g}
+        slot_de[i] = rng.choice([s for s in range(1, t.slots_por_grupo) if s not in ocupados])
+    return grupo_de, slot_de
+
+
+def ejemplo(t, grupo_de, slot_de, rng, intentos=INTENTOS_EJEMPLO):
+    """Un sorteo completo desde lo fijado con `sorteo_rapido.completar`, o None si todos se atascan."""
+    for _ in range(intentos):
+        try:
+            return sorteo_rapido.completar(t, grupo_de, slot_de, rng)
+        except ValueError:
+            continue
+    return None
+
+
+def presupuesto_valido(presupuesto):
+    """Segundos de sorteos pedidos, como float positivo y finito (acotado a `PRESUPUESTO_MAXIMO`)."""
+    try:
+        presupuesto = float(presupuesto)
+    except (ValueError, TypeError):
+        raise ValueError(f"El presupuesto tiene que ser un número de segundos, no {presupuesto!r}") from None
+    if not math.isfinite(presupuesto) or presupuesto <= 0:
+        raise ValueError(f"El presupuesto tiene que ser un número de segundos mayor que 0, no {presupuesto}")
+    return min(presupuesto, PRESUPUESTO_MAXIMO)
+
+
+def evaluar(fijar, equipo=None, presupuesto=PRESUPUESTO, seed=0):
+    """
+    Evalúa unas fijaciones (texto, `asignaciones_sorteo` o `grupos_dict`). Devuelve un dict con:
+    - estado: 'legal', 'ilegal', 'sin_completar' (la búsqueda no decidió y el procedimiento no
+      encontró un completado) o 'invalido' (equipo, grupo o condición desconocidos), y `motivo`
+      si es ilegal o inválido;
+    - fijados: {equipo: slot} con los slots resueltos;
+    - grupos, probabilidad: P(grupo) de cada equipo en el orden de `grupos`;
+    - rivales: los más probables de `equipo`, si se pidió;
+    - ejemplo: un `grupos_dict` completo;
+    - n_sorteos, atascados, segundos.
+    Los errores de entrada vuelven como estado 'invalido' y no como excepción: en el pool de
+    procesos una excepción llega envuelta en otro tipo.
+    """
+    t = tabla()
+    t0 = time.perf_counter()
+    resultado = {'estado': 'ilegal', 'motivo': None, 'fijados': {}, 'grupos': list(t.grupos),
+                 'probabilidad': {}, 'rivales': [], 'ejemplo': None, 'n_sorteos': 0, 'atascados': 0}
+    try:
+        presupuesto = presupuesto_valido(presupuesto)
+        fijos = parsear(fijar, t) if isinstance(fijar, str) else desde_asignaciones(fijar, t)
+        if equipo is not None:
+            equipo = t.equipos[_equipo(t, equipo)]
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        resultado.update(estado='invalido', motivo=str(e), segundos=time.perf_counter() - t0)
+        return resultado
+
+    resultado['motivo'] = validar(t, fijos)
+    if resultado['motivo']:
+        resultado['segundos'] = time.perf_counter() - t0
+        return resultado
+
+    rng = random.Random(seed)
+    grupo_de, slot_de = resolver_slots(t, fijos, rng)
+    resultado['fijados'] = {t.equipos[i]: f"{t.grupos[grupo_de[i]]}{slot_de[i] + 1}" for i in sorted(fijos)}
+    #Un completado del procedimiento ya prueba que es legal; la búsqueda exacta solo hace falta si no aparece
+    completo = ejemplo(t, grupo_de, slot_de, rng)
+    existe = True if completo is not None else existe_completado(t, fijos)
+    if existe is False:
+        resultado['motivo'] = "Las reglas se cumplen por separado, pero no hay ningún sorteo completo que las cumpla todas"
+        resultado['segundos'] = time.perf_counter() - t0
+        return resultado
+    if completo is not None:
+        resultado['ejemplo'] = sorteo_rapido.a_grupos_dict(t, *completo)[0]
+    resultado['estado'] = 'legal' if existe else 'sin_completar'
+
+    codificado = tuple(g * t.slots_por_grupo + s if g >= 0 else -1 for g, s in zip(grupo_de, slot_de))
+    p = probabilidades_vivo.estimar(codificado, presupuesto=presupuesto, permitir_atascos=True)
+    resultado['n_sorteos'], resultado['atascados'] = p.n_sorteos, p.atascados
+    if p.grupo is not None:
+        resultado['probabilidad'] = {eq: [round(float(x), 4) for x in p.grupo[i]]
+                                     for i, eq in enumerate(t.equipos)}
+        if equipo is not None:
+            rivales = p.rivales[t.idx[equipo]]
+            orden = [j for j in rivales.argsort()[::-1] if rivales[j] > 0][:RIVALES_MOSTRADOS]
+            resultado['rivales'] = [{'rival': t.equipos[j], 'confederacion': CONFEDERACIONES[t.equipos[j]],
+                                     'probabilidad': round(float(rivales[j]), 4)} for j in orden]
+    resultado['segundos'] = time.perf_counter() - t0
+    return resultado
+
+
+def instalar(app, ruta='/api/que-pasaria', ejecutar=None):
+    """
+    Agrega `POST {ruta}` a la app. El cuerpo es JSON con `fijar` (texto) o `asignaciones`
+    (`asignaciones_sorteo` o `grupos_dict`), y opcionalmente `equipo` y `presupuesto` (segundos).
+    `ejecutar(funcion, *args)` corre `evaluar` fuera del event loop (en la GUI, `run.cpu_bound`);
+    por defecto en el pool de hilos de Starlette.
+    """
+    from fastapi import Body
+    from fastapi.responses import JSONResponse
+    from starlette.concurrency import run_in_threadpool
+    import metricas
+
+    ejecutar = ejecutar or run_in_threadpool
+    respuestas = metricas.Contador('que_pasaria_respuestas_total', "Evaluaciones de fijaciones por estado", ('estado',))
+    latencia = metricas.Histograma('que_pasaria_segundos', "Tiempo de una evaluación de fijaciones")
+
+    @app.post(ruta)
+    async def que_pasaria(pedido: dict = Body(...)):
+        if 'fijar' not in pedido and 'asignaciones' not in pedido:
+            respuestas.inc(estado='invalido')
+            return JSONResponse({'error': "Falta `fijar` (texto) o `asignaciones` (objeto)"}, status_code=400)
+        fijar = pedido['fijar'] if 'fijar' in pedido else pedido['asignaciones']
+        t0 = time.perf_counter()
+        try:
+            presupuesto = presupuesto_valido(pedido.get('presupuesto', PRESUPUESTO))
+        except ValueError as e:
+            respuestas.inc(estado='invalido')
+            return JSONResponse({'error': str(e)}, status_code=400)
+        if not isinstance(fijar, (str, dict)):
+            respuestas.inc(estado='invalido')
+            return JSONResponse({'error': "`fijar` tiene que ser texto y `asignaciones` un objeto"},
+                                status_code=400)
+        resultado = await ejecutar(evaluar, fijar, pedido.get('equipo'), presupuesto)
+        respuestas.inc(estado=resultado['estado'])
+        if resultado['estado'] == 'invalido':
+            return JSONResponse({'error': resultado['motivo']}, status_code=400)
+        latencia.observe(time.perf_counter() - t0)
+        return resultado
+
+    return que_pasaria
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legalidad y probabilidades de un sorteo con equipos fijados a mano")
+    parser.add_argument('fijar', help="Condiciones separadas con ';', ej: 'BRA en C; NOR con MEX'")
+    parser.add_argument('--equipo', default=None, help="Equipo del que mostrar P(grupo) y rivales")
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    r = evaluar(args.fijar, args.equipo, args.presupuesto, args.seed)
+    if r['estado'] == 'invalido':
+        parser.error(r['motivo'])
+    print(f"Estado: {r['estado']}" + (f" ({r['motivo']})" if r['motivo'] else ''))
+    if r['fijados']:
+        print("Fijados: " + ', '.join(f"{eq} {s}" for eq, s in r['fijados'].items()))
+    print(f"{r['n_sorteos']} sorteos completados, {r['atascados']} descartados por atascarse, "
+          f"{r['segundos'] * 1000:.0f} ms")
+    if args.equipo and r['probabilidad']:
+        equipo = args.equipo.upper()
+        print(f"\nP({equipo} en cada grupo): " + '  '.join(
+            f"{g} {100 * p:.0f}%" for g, p in zip(r['grupos'], r['probabilidad'][equipo])))
+        print(f"Rivales más probables de {equipo}: " + ', '.join(
+            f"{x['rival']} {100 * x['probabilidad']:.1f}%" for x in r['rivales'][:8]))
+    if r['ejemplo']:
+        print("\nEjemplo de sorteo completo:")
+        for g, equipos in r['ejemplo'].items():
+            print(f"  {g}: " + '  '.join(f"{e['slot']} {e['codigo']}" for e in sorted(equipos, key=lambda e: e['slot'])))
+
+
+if __name__ == "__main__":
+    main()
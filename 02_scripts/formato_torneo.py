@@ -0,0 +1,143 @@
+"""
+Forma del torneo como configuración declarativa.
+
+Un formato fija lo que antes estaba escrito a mano en los motores de sorteo:
+- cantidad de grupos (letras A, B, ...) y de bombos, que es también la cantidad de equipos por
+  grupo: cada bombo tiene un equipo por grupo;
+- anfitriones con su slot fijo en el bombo 1 (`{"MEX": "A1", ...}`);
+- máximo de equipos de cada confederación en un grupo (1 si no aparece).
+
+Los formatos están en `RUTA_FORMATOS`:
+- `wc2026`: el Mundial 2026, con los equipos reales de `simular_bombos`;
+- `sintetico_*`: formatos más grandes (64 y 96 equipos) con una `composicion` por bombo
+  (confederación -> equipos, anfitriones incluidos) para generar equipos sintéticos con
+  `equipos_sinteticos`.
+
+`simular_sorteo_func`, `sorteo_rapido` y `nucleo_sorteo` reciben un `FormatoTorneo` (por
+defecto `WC2026`) y leen de él grupos, bombos, anfitriones y cupos.
+
+Uso desde consola (lista los formatos, desde la raíz del repo):
+    python 02_scripts/formato_torneo.py
+"""
+
+import json
+import string
+import argparse
+from functools import lru_cache
+
+import pandas as pd
+
+RUTA_FORMATOS = '01_datos_brutos/formatos_torneo.json'
+MAXIMO_GRUPOS = len(string.ascii_uppercase)  # una letra por grupo
+
+
+class FormatoTorneo:
+    """Grupos, bombos, anfitriones y cupos por confederación de un torneo."""
+    def __init__(self, nombre, grupos, bombos, anfitriones, maximo_por_grupo, composicion=None, descripcion=''):
+        if not 1 <= grupos <= MAXIMO_GRUPOS:
+            raise ValueError(f"{nombre}: entre 1 y {MAXIMO_GRUPOS} grupos, no {grupos}")
+        if grupos * bombos > 127:
+            raise ValueError(f"{nombre}: grupo * bombos + slot tiene que entrar en un int8")
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.grupos = list(string.ascii_uppercase[:grupos])
+        self.n_grupos = grupos
+        self.n_bombos = bombos
+        self.slots_por_grupo = bombos
+        self.n_equipos = grupos * bombos
+        self.anfitriones = dict(anfitriones)
+        self.maximo_por_grupo = dict(maximo_por_grupo)
+        self.composicion = composicion
+
+        grupos_anfitriones = [slot[0] for slot in self.anfitriones.values()]
+        for eq, slot in self.anfitriones.items():
+            if slot[0] not in self.grupos or slot[1:] != '1':
+                raise ValueError(f"{nombre}: el anfitrión {eq} tiene que ir en el slot 1 de un grupo, no en {slot}")
+        if len(set(grupos_anfitriones)) != len(grupos_anfitriones):
+            raise ValueError(f"{nombre}: dos anfitriones en el mismo grupo")
+        if composicion is not None:
+            if len(composicion) != bombos or any(sum(b.values()) != grupos for b in composicion):
+                raise ValueError(f"{nombre}: la composición tiene que tener {bombos} bombos de {grupos} equipos")
+            totales = {}
+            for b in composicion:
+                for conf, n in b.items():
+                    totales[conf] = totales.get(conf, 0) + n
+            for conf, n in totales.items():
+                if n > grupos * self.cupo(conf):
+                    raise ValueError(f"{nombre}: {n} equipos de {conf} no entran con cupo {self.cupo(conf)} por grupo")
+
+    def cupo(self, conf):
+        return self.maximo_por_grupo.get(conf, 1)
+
+    def slots(self, grupo):
+        return [f"{grupo}{i}" for i in range(1, self.slots_por_grupo + 1)]
+
+    def __repr__(self):
+        return f"FormatoTorneo({self.nombre!r}, {self.n_grupos} grupos x {self.n_bombos} bombos)"
+
+
+@lru_cache(maxsize=None)
+def cargar_formatos(ruta=RUTA_FORMATOS):
+    """{nombre: FormatoTorneo} de los presets."""
+    with open(ruta, encoding='utf-8') as f:
+        datos = json.load(f)
+    return {nombre: FormatoTorneo(nombre, **definicion) for nombre, definicion in datos.items()}
+
+
+def formato(nombre):
+    formatos = cargar_formatos()
+    if nombre not in formatos:
+        raise ValueError(f"Formato desconocido: {nombre} (hay {', '.join(formatos)})")
+    return formatos[nombre]
+
+
+WC2026 = formato('wc2026')
+
+
+def equipos_sinteticos(formato):
+    """
+    Tabla con el esquema de df_bombos para un formato con `composicion`: los anfitriones reales
+    en el bombo 1 y el resto con códigos `Z01`, `Z02`... Las confederaciones sintéticas no
+    están en `CONFEDERACIONES`; hay que darlas de alta mientras se sortea
+    (`estres_lookahead.confederaciones_de`).
+    """
+    from simular_bombos import CONFEDERACIONES
+
+    if formato.composicion is None:
+        raise ValueError(f"El formato {formato.nombre} no tiene composición para equipos sintéticos")
+    filas = []
+    for b, por_conf in enumerate(formato.composicion, start=1):
+        faltan = dict(por_conf)
+        if b == 1:
+            for eq in formato.anfitriones:
+                conf = CONFEDERACIONES[eq]
+                if faltan.get(conf, 0) < 1:
+                    raise ValueError(f"{formato.nombre}: el bombo 1 no tiene lugar de {conf} para el anfitrión {eq}")
+                faltan[conf] -= 1
+                filas.append((eq, conf, b, 1))
+        for conf in sorted(faltan):
+            for _ in range(faltan[conf]):
+                filas.append((f"Z{len(filas) + 1:02d}", conf, b, 0))
+
+    df = pd.DataFrame(filas, columns=['codigo', 'confederacion', 'bombo', 'anfitrion'])
+    df.insert(0, 'pais', df['codigo'])
+    df['puntos_totales'] = [float(formato.n_equipos - k) for k in range(len(df))]
+    df['repechaje'] = 0
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Formatos de torneo disponibles")
+    parser.add_argument('--ruta', default=RUTA_FORMATOS)
+    args = parser.parse_args()
+
+    for f in cargar_formatos(args.ruta).values():
+        cupos = ', '.join(f"{c} {n}" for c, n in f.maximo_por_grupo.items())
+        print(f"{f.nombre:<20} {f.n_equipos:>3} equipos, {f.n_grupos:>2} grupos x {f.n_bombos} bombos; "
+              f"anfitriones {', '.join(f'{eq} {s}' for eq, s in f.anfitriones.items())}; cupos {cupos}")
+        if f.descripcion:
+            print(f"{'':<20} {f.descripcion}")
+
+
+if __name__ == "__main__":
+    main()
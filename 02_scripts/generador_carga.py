@@ -0,0 +1,115 @@
+"""
+Generador de carga local para el control de admisión de la GUI.
+
+Simula, con el simulador de usuarios de NiceGUI y en un solo proceso, una ráfaga de clientes
+que llegan escalonados y piden un sorteo animado a la velocidad máxima del slider. Mientras
+tanto se muestrea la ocupación de `GUI_sorteo.ADMISION`. Al final se reporta:
+- sorteos animados vs instantáneos (cola llena)
+- tiempo hasta ver el resultado (p50 / p90 / máx)
+- pico de sorteos activos y de cola
+- lag del event loop (histograma de `metricas`)
+
+Uso desde consola (desde la raíz del repo):
+    WC_MAX_SORTEOS_ANIMADOS=2 WC_MAX_COLA=5 python 02_scripts/generador_carga.py --clientes 30 --llegadas 0.2
+"""
+
+import os
+import time
+import asyncio
+import argparse
+
+os.environ['NICEGUI_USER_SIMULATION'] = 'true'
+
+import numpy as np
+import httpx
+from nicegui import core, ui
+from nicegui.testing.general import prepare_simulation
+from nicegui.testing.user import User
+
+import GUI_sorteo
+import metricas
+
+VELOCIDAD_MAXIMA = 1.85  # extremo "Rápido" del slider de la página
+
+
+async def cliente(http, limite):
+    user = User(http)
+    await user.open('/')
+    for slider in user.find(ui.slider).elements:
+        slider.value = VELOCIDAD_MAXIMA
+    t0 = time.perf_counter()
+    user.find('Iniciar Sorteo').click()
+    while time.perf_counter() - t0 < limite:
+        try:
+            await user.should_see('Sorteo finalizado', retries=1)
+            return time.perf_counter() - t0
+        except AssertionError:
+            await asyncio.sleep(0.2)
+    return float('nan')
+
+
+async def muestrear_admision(picos, detener):
+    while not detener.is_set():
+        picos['activos'] = max(picos['activos'], GUI_sorteo.ADMISION.activos)
+        picos['cola'] = max(picos['cola'], len(GUI_sorteo.ADMISION.cola))
+        await asyncio.sleep(0.05)
+
+
+def percentil_histograma(histograma, q):
+    """Cota superior del percentil q a partir de los buckets de un `metricas.Histograma`."""
+    conteos, total = np.zeros(len(histograma.buckets)), 0
+    for serie in histograma.series.values():
+        conteos += serie[0]
+        total += serie[2]
+    if total == 0:
+        return float('nan')
+    i = int(np.searchsorted(np.cumsum(conteos), q * total))
+    return histograma.buckets[min(i, len(histograma.buckets) - 1)]
+
+
+async def correr(n_clientes, llegadas, limite):
+    prepare_simulation()
+    ui.run(storage_secret='carga')
+    picos = {'activos': 0, 'cola': 0}
+    detener = asyncio.Event()
+    async with core.app.router.lifespan_context(core.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(core.app), base_url='http://carga') as http:
+            muestreo = asyncio.create_task(muestrear_admision(picos, detener))
+            tareas = []
+            for _ in range(n_clientes):
+                tareas.append(asyncio.create_task(cliente(http, limite)))
+                await asyncio.sleep(llegadas)
+            tiempos = await asyncio.gather(*tareas)
+            detener.set()
+            await muestreo
+    return np.array(tiempos), picos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga local sobre el control de admisión de la GUI")
+    parser.add_argument('--clientes', type=int, default=30)
+    parser.add_argument('--llegadas', type=float, default=0.2, help="Segundos entre llegadas de clientes")
+    parser.add_argument('--limite', type=float, default=600, help="Segundos máximos de espera por cliente")
+    args = parser.parse_args()
+
+    print(f"Admisión: {GUI_sorteo.ADMISION.max_concurrentes} sorteos animados simultáneos, "
+          f"cola de {GUI_sorteo.ADMISION.max_cola}")
+    t0 = time.perf_counter()
+    tiempos, picos = asyncio.run(correr(args.clientes, args.llegadas, args.limite))
+
+    completados = metricas.SORTEOS_COMPLETADOS.valores
+    print(f"\n--- {args.clientes} clientes en {time.perf_counter() - t0:.0f} s ---")
+    print(f"Animados:     {completados.get(('animado',), 0)}")
+    print(f"Instantáneos: {completados.get(('instantaneo',), 0)}")
+    print(f"Sin terminar: {int(np.isnan(tiempos).sum())}")
+    validos = tiempos[~np.isnan(tiempos)]
+    if len(validos):
+        print(f"Tiempo hasta el resultado: p50 {np.percentile(validos, 50):.1f} s, "
+              f"p90 {np.percentile(validos, 90):.1f} s, máx {validos.max():.1f} s")
+    print(f"Pico de sorteos activos: {picos['activos']}, pico de cola: {picos['cola']}")
+    print(f"Lag del event loop: p50 <= {percentil_histograma(metricas.LAG_EVENT_LOOP, 0.5)} s, "
+          f"p99 <= {percentil_histograma(metricas.LAG_EVENT_LOOP, 0.99)} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Contadores del solver del sorteo (lookahead y bucle de grupos).
+
+Mientras no haya contadores activos, las funciones instrumentadas solo leen `instrumentacion.actual`
+una vez por llamada y comparan contra None, así que el coste desactivado es despreciable.
+
+Uso:
+    with instrumentacion.medir() as c:
+        sortear_mundial(df_bombos)
+    print(c.resumen())
+
+En la GUI (varias sesiones sobre el mismo event loop) se activa un contador por sesión solo
+alrededor de llamadas síncronas con `activar(contadores)`, así nunca se mezclan sesiones.
+
+Uso desde consola (histogramas sobre un Monte Carlo, desde la raíz del repo):
+    python 02_scripts/instrumentacion.py --sorteos 500
+"""
+
+import time
+import argparse
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+#Contadores activos (None = instrumentación desactivada)
+actual = None
+
+
+class LimiteNodosExcedido(RuntimeError):
+    """El lookahead superó `ContadoresSolver.limite_nodos` (se corta la búsqueda)."""
+
+
+class ContadoresSolver:
+    """Contadores de un sorteo (o de un tramo de él)."""
+    __slots__ = ('nodos', 'profundidad_max', 'backtracks', 'lookaheads',
+                 'rechazos_confederacion', 'rechazos_lookahead', 'tiempos_bola', 'tiempos_bombo',
+                 'limite_nodos')
+
+    def __init__(self, limite_nodos=None):
+        self.nodos = 0                   # llamadas a asignar_restantes
+        self.profundidad_max = 0         # equipos colocados en la rama más profunda
+        self.backtracks = 0              # asignaciones temporales deshechas
+        self.lookaheads = 0              # llamadas a lookahead
+        self.rechazos_confederacion = 0  # grupos descartados por checker_validez_grupo
+        self.rechazos_lookahead = 0      # grupos descartados por lookahead
+        self.tiempos_bola = []           # (bombo, equipo, segundos de checker + lookahead)
+        self.tiempos_bombo = {}          # bombo -> suma de tiempos_bola (bombos 2-4)
+        self.limite_nodos = limite_nodos  # si se supera, lookahead lanza LimiteNodosExcedido
+
+    def registrar_bola(self, bombo, equipo, segundos):
+        self.tiempos_bola.append((bombo, equipo, segundos))
+
+    def registrar_bombo(self, bombo, segundos):
+        self.tiempos_bombo[bombo] = self.tiempos_bombo.get(bombo, 0.0) + segundos
+
+    def resumen(self):
+        peor = max(self.tiempos_bola, key=lambda t: t[2], default=(None, None, 0.0))
+        return {
+            'nodos': self.nodos,
+            'profundidad_max': self.profundidad_max,
+            'backtracks': self.backtracks,
+            'lookaheads': self.lookaheads,
+            'rechazos_confederacion': self.rechazos_confederacion,
+            'rechazos_lookahead': self.rechazos_lookahead,
+            'bola_max_s': peor[2],
+            'bola_max_equipo': peor[1],
+            **{f'bombo_{b}_s': s for b, s in sorted(self.tiempos_bombo.items())},
+        }
+
+
+@contextmanager
+def activar(contadores):
+    """Activa `contadores` dentro del bloque y restaura los anteriores al salir."""
+    global actual
+    previos = actual
+    actual = contadores
+    try:
+        yield contadores
+    finally:
+        actual = previos
+
+
+def medir(limite_nodos=None):
+    """Atajo: activa un `ContadoresSolver` nuevo."""
+    return activar(ContadoresSolver(limite_nodos))
+
+
+class HistogramasSolver:
+    """Acumula el resumen de cada sorteo de un Monte Carlo."""
+    def __init__(self):
+        self.filas = []
+
+    def agregar(self, contadores):
+        self.filas.append(contadores.resumen())
+
+    def tabla(self):
+        return pd.DataFrame(self.filas)
+
+    def histograma(self, metrica, bins=20):
+        return np.histogram(self.tabla()[metrica].astype(float), bins=bins)
+
+    def percentiles(self):
+        df = self.tabla().select_dtypes('number')
+        return df.quantile([0.5, 0.9, 0.99, 1.0]).T.rename(columns={0.5: 'p50', 0.9: 'p90', 0.99: 'p99', 1.0: 'max'})
+
+
+def perfil_monte_carlo(df_bombos, n_sorteos, seed=0):
+    """Corre `n_sorteos` sorteos instrumentados (sembrados como simular_sorteos)."""
+    import random
+    from simular_sorteo_func import sortear_mundial
+
+    histogramas = HistogramasSolver()
+    for i in range(n_sorteos):
+        random.seed(seed + i)
+        np.random.seed(seed + i)
+        with medir() as c:
+            sortear_mundial(df_bombos)
+        histogramas.agregar(c)
+    return histogramas
+
+
+def main():
+    #Al ejecutarse como script este archivo es `__main__`; el solver lee los contadores del
+    #módulo `instrumentacion` importado, así que trabajamos sobre ese
+    import instrumentacion
+    from simular_bombos import df_bombos
+
+    parser = argparse.ArgumentParser(description="Histogramas de los contadores del solver")
+    parser.add_argument('--sorteos', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--metrica', default='nodos', help="Métrica para el histograma detallado")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    histogramas = instrumentacion.perfil_monte_carlo(df_bombos, args.sorteos, seed=args.seed)
+    print(f"--- {args.sorteos} sorteos instrumentados en {time.perf_counter() - t0:.1f} s ---")
+    print(histogramas.percentiles().round(4))
+
+    conteos, bordes = histogramas.histograma(args.metrica)
+    print(f"\n--- Histograma de {args.metrica} ---")
+    ancho = max(conteos.max(), 1)
+    for n, a, b in zip(conteos, bordes[:-1], bordes[1:]):
+        print(f"{a:>10.4g} - {b:<10.4g} {'#' * int(40 * n / ancho)} {n}")
+
+
+if __name__ == "__main__":
+    main()
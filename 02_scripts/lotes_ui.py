@@ -0,0 +1,60 @@
+"""
+Agrupación de actualizaciones de UI (estilos y textos) por ventana de tiempo.
+
+Cada `card.style(...)` o cambio de texto en NiceGUI encola una actualización del elemento, y el
+outbox del cliente envía un mensaje de websocket por cada vuelta del event loop en la que hubo
+cambios. Las animaciones del sorteo separan esos cambios con sleeps cortos, así que cada bolita
+generaba varios mensajes pequeños por cliente.
+
+`LoteUI` guarda el estado final pedido para cada elemento y lo aplica todo junto al cerrar la
+ventana (`VENTANA_LOTE`): cambios que se pisan dentro de la ventana salen como uno solo, y los
+que vuelven al estado actual (resaltar y restaurar) no salen.
+"""
+
+import asyncio
+
+from nicegui.style import Style
+
+VENTANA_LOTE = 0.1  # segundos
+
+
+def _estilo_texto(estilo):
+    return '; '.join(f"{k}: {v}" for k, v in estilo.items())
+
+
+class LoteUI:
+    """Cambios de estilo y texto pendientes de una sesión."""
+    def __init__(self, ventana=VENTANA_LOTE):
+        self.ventana = ventana
+        self._estilos = {}  # id de elemento -> (elemento, estilo final como dict)
+        self._textos = {}   # id de elemento -> (elemento, texto final)
+        self._programado = None
+
+    def estilo(self, elemento, estilo):
+        """Como `elemento.style(estilo)`, aplicado al cerrar la ventana."""
+        base = self._estilos.get(elemento.id, (elemento, dict(elemento.style)))[1]
+        self._estilos[elemento.id] = (elemento, Style.update_dict(base, estilo))
+        self._programar()
+
+    def texto(self, elemento, texto):
+        """Como `elemento.set_text(texto)`, aplicado al cerrar la ventana."""
+        self._textos[elemento.id] = (elemento, texto)
+        self._programar()
+
+    def _programar(self):
+        if self._programado is None:
+            self._programado = asyncio.get_running_loop().call_later(self.ventana, self.vaciar)
+
+    def vaciar(self):
+        """Aplica ya los cambios pendientes (todos en la misma vuelta del loop: un solo mensaje)."""
+        if self._programado is not None:
+            self._programado.cancel()
+            self._programado = None
+        for elemento, estilo in self._estilos.values():
+            if not elemento.is_deleted and dict(elemento.style) != estilo:
+                elemento.style(replace=_estilo_texto(estilo))
+        for elemento, texto in self._textos.values():
+            if not elemento.is_deleted and elemento.text != texto:
+                elemento.set_text(texto)
+        self._estilos.clear()
+        self._textos.clear()
@@ -0,0 +1,108 @@
+"""
+Mensajes y bytes de websocket por sorteo animado, por cliente.
+
+Con el simulador de usuarios de NiceGUI se abre '/', se pone el slider en la velocidad
+indicada y se corre un sorteo animado completo, contando cada mensaje que el outbox del
+cliente envía (tipo y tamaño del JSON serializado). Sirve para comparar el efecto de cambios
+en la forma de actualizar la UI (por ejemplo `lotes_ui`).
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/medir_mensajes.py --sorteos 2 --velocidad 1.85
+"""
+
+import os
+import importlib
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+
+os.environ['NICEGUI_USER_SIMULATION'] = 'true'
+
+import numpy as np
+import httpx
+from nicegui import core, ui
+from nicegui.testing.general import prepare_simulation
+from nicegui.testing.user import User
+
+# Solo por el efecto de importarlo: registra las páginas (@ui.page) de la GUI en la app
+importlib.import_module('GUI_sorteo')
+
+
+def contar_mensajes(cliente):
+    """Envuelve el envío del outbox del cliente; devuelve los contadores (por tipo) que va llenando."""
+    mensajes, bytes_ = Counter(), Counter()
+    emit_original = cliente.outbox._emit
+
+    async def emit(mensaje):
+        _, tipo, datos = mensaje
+        mensajes[tipo] += 1
+        bytes_[tipo] += len(json.dumps(datos, default=str, separators=(',', ':')))
+        await emit_original(mensaje)
+
+    cliente.outbox._emit = emit
+    return mensajes, bytes_
+
+
+async def un_sorteo(http, velocidad, seed):
+    user = User(http)
+    cliente = await user.open('/')
+    for slider in user.find(ui.slider).elements:
+        slider.value = velocidad
+    await asyncio.sleep(0.2)  # deja salir los mensajes de la carga inicial
+
+    mensajes, bytes_ = contar_mensajes(cliente)
+    random.seed(seed)
+    np.random.seed(seed)
+    t0 = time.perf_counter()
+    user.find('Iniciar Sorteo').click()
+    while True:
+        try:
+            await user.should_see('Sorteo finalizado', retries=1)
+            break
+        except AssertionError:
+            await asyncio.sleep(0.2)
+    await asyncio.sleep(0.2)
+    duracion = time.perf_counter() - t0
+    cliente.delete()
+    return mensajes, bytes_, duracion
+
+
+async def correr(n_sorteos, velocidad, seed):
+    prepare_simulation()
+    ui.run(storage_secret='mensajes')
+    resultados = []
+    async with core.app.router.lifespan_context(core.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(core.app), base_url='http://mensajes') as http:
+            for k in range(n_sorteos):
+                resultados.append(await un_sorteo(http, velocidad, seed + k))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mensajes y bytes de websocket por sorteo animado")
+    parser.add_argument('--sorteos', type=int, default=2)
+    parser.add_argument('--velocidad', type=float, default=1.85, help="Valor del slider (0.15 lento - 1.85 rápido)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    resultados = asyncio.run(correr(args.sorteos, args.velocidad, args.seed))
+
+    total_mensajes, total_bytes = Counter(), Counter()
+    for mensajes, bytes_, duracion in resultados:
+        total_mensajes.update(mensajes)
+        total_bytes.update(bytes_)
+        print(f"sorteo: {sum(mensajes.values()):>6} mensajes, {sum(bytes_.values()) / 1024:>8.1f} KiB, {duracion:.1f} s")
+
+    n = len(resultados)
+    print(f"\n--- Promedio por sorteo ({n} sorteos) ---")
+    for tipo in sorted(total_mensajes):
+        print(f"{tipo:<20} {total_mensajes[tipo] / n:>8.1f} mensajes {total_bytes[tipo] / n / 1024:>10.1f} KiB")
+    print(f"{'total':<20} {sum(total_mensajes.values()) / n:>8.1f} mensajes "
+          f"{sum(total_bytes.values()) / n / 1024:>10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Métricas del servidor en formato de texto de Prometheus (sin dependencias externas).
+
+Tipos soportados, con etiquetas opcionales:
+- `Contador`: solo crece (sorteos iniciados, mensajes enviados...); el nombre termina en `_total`.
+- `Medidor`: valor instantáneo.
+Ambos pueden calcularse al momento del scrape con `funcion` (p. ej. un contador que ya lleva otro
+objeto); si `funcion` devuelve None la muestra se omite (valor que todavía no existe).
+- `Histograma`: buckets acumulados, suma y conteo (latencias).
+
+Todas las métricas se registran en `REGISTRO` y `exponer()` genera el texto de `/metrics`.
+`instalar(app)` agrega a la app de NiceGUI/FastAPI la ruta `/metrics`, el monitor de lag del
+event loop y el conteo de mensajes del websocket.
+
+Uso:
+    SORTEOS_INICIADOS.inc(modo='animado')
+    with LATENCIA_BOLA.cronometrar():
+        ...
+"""
+
+import os
+import time
+import asyncio
+import resource
+from contextlib import contextmanager
+
+PREFIJO = 'sorteo_'
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+INTERVALO_LAG = 0.25  # segundos entre mediciones del lag del event loop
+
+
+def _etiquetas_texto(claves, valores):
+    if not claves:
+        return ''
+    pares = ','.join(f'{k}="{str(v)}"' for k, v in zip(claves, valores))
+    return '{' + pares + '}'
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=(), registro=None):
+        self.nombre = PREFIJO + nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        (REGISTRO if registro is None else registro).append(self)
+
+    def _clave(self, etiquetas):
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f"{self.nombre} espera las etiquetas {self.etiquetas}, no {tuple(etiquetas)}")
+        return tuple(etiquetas[k] for k in self.etiquetas)
+
+    def cabecera(self):
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+class _MetricaSimple(_Metrica):
+    """Un valor por combinación de etiquetas, guardado o calculado por `funcion` al hacer scrape."""
+    def __init__(self, nombre, ayuda, etiquetas=(), registro=None, funcion=None):
+        """`funcion` (opcional) devuelve el valor, o un dict etiquetas -> valor, al hacer scrape."""
+        super().__init__(nombre, ayuda, etiquetas, registro)
+        self.valores = {}
+        self.funcion = funcion
+
+    def lineas(self):
+        valores = self.valores
+        if self.funcion is not None:
+            resultado = self.funcion()
+            valores = resultado if isinstance(resultado, dict) else {(): resultado}
+        return [f"{self.nombre}{_etiquetas_texto(self.etiquetas, k)} {_numero(v)}"
+                for k, v in sorted(valores.items()) if v is not None]
+
+
+class Contador(_MetricaSimple):
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), registro=None, funcion=None):
+        if not nombre.endswith('_total'):
+            raise ValueError(f"El nombre de un contador termina en '_total': {nombre}")
+        super().__init__(nombre, ayuda, etiquetas, registro, funcion)
+
+    def inc(self, cantidad=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        self.valores[clave] = self.valores.get(clave, 0) + cantidad
+
+
+class Medidor(_MetricaSimple):
+    tipo = 'gauge'
+
+    def set(self, valor, **etiquetas):
+        self.valores[self._clave(etiquetas)] = valor
+
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), registro=None, buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas, registro)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.series = {}  # clave -> [conteos por bucket, suma, total]
+
+    def observe(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        serie = self.series.get(clave)
+        if serie is None:
+            serie = self.series[clave] = [[0] * len(self.buckets), 0.0, 0]
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                serie[0][i] += 1
+                break
+        serie[1] += valor
+        serie[2] += 1
+
+    @contextmanager
+    def cronometrar(self, **etiquetas):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **etiquetas)
+
+    def lineas(self):
+        lineas = []
+        for clave, (conteos, suma, total) in sorted(self.series.items()):
+            acumulado = 0
+            for limite, n in zip(self.buckets, conteos):
+                acumulado += n
+                etiquetas = _etiquetas_texto(self.etiquetas + ('le',), clave + (_numero(limite),))
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            etiquetas = _etiquetas_texto(self.etiquetas, clave)
+            lineas.append(f"{self.nombre}_sum{etiquetas} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {total}")
+        return lineas
+
+
+REGISTRO = []
+
+
+def exponer(registro=None):
+    """Texto de todas las métricas registradas (formato de exposición 0.0.4 de Prometheus)."""
+    lineas = []
+    for metrica in (REGISTRO if registro is None else registro):
+        lineas += metrica.cabecera() + metrica.lineas()
+    return '\n'.join(lineas) + '\n'
+
+
+# --- Métricas del proceso ---
+
+def rss_bytes():
+    """RSS actual (Linux: /proc/self/statm); en otros sistemas, el máximo que reporta getrusage."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maximo if os.uname().sysname == 'Darwin' else maximo * 1024
+
+
+RSS = Medidor('proceso_rss_bytes', "Memoria residente del proceso", funcion=rss_bytes)
+LAG_EVENT_LOOP = Histograma('event_loop_lag_segundos', "Retraso del event loop respecto al sleep pedido",
+                            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+# --- Métricas del sorteo ---
+
+SORTEOS_INICIADOS = Contador('sorteos_iniciados_total', "Sorteos iniciados por modo", ('modo',))
+SORTEOS_COMPLETADOS = Contador('sorteos_completados_total', "Sorteos completados por modo", ('modo',))
+LATENCIA_BOLA = Histograma('solver_bola_segundos', "Tiempo de solver (checker + lookahead) por bolita", ('bombo',))
+LATENCIA_SORTEO = Histograma('solver_sorteo_segundos', "Tiempo de solver por sorteo completo", ('modo',))
+MENSAJES_WEBSOCKET = Contador('websocket_mensajes_total', "Mensajes enviados por websocket a los clientes")
+MENSAJES_POR_SORTEO = Histograma('websocket_mensajes_por_sorteo', "Mensajes de websocket enviados durante un sorteo",
+                                 ('modo',), buckets=(10, 25, 50, 100, 250, 500, 1000, 2500, 5000))
+
+#Mensajes por id de cliente (NiceGUI usa el id del cliente como sala de socket.io)
+mensajes_por_cliente = {}
+
+
+def sesiones_activas():
+    from nicegui import Client
+    return sum(1 for c in Client.instances.values() if c.has_socket_connection)
+
+
+SESIONES_ACTIVAS = Medidor('sesiones_activas', "Clientes con websocket conectado", funcion=sesiones_activas)
+
+
+def registrar_cache(nombre, funcion_cache):
+    """Expone aciertos, fallos y tasa de acierto de una función con `functools.lru_cache`."""
+    def info():
+        ci = funcion_cache.cache_info()
+        return ci.hits, ci.misses
+
+    Contador(f'cache_{nombre}_aciertos_total', f"Aciertos de la caché {nombre}", funcion=lambda: info()[0])
+    Contador(f'cache_{nombre}_fallos_total', f"Fallos de la caché {nombre}", funcion=lambda: info()[1])
+    Medidor(f'cache_{nombre}_tasa_acierto', f"Tasa de acierto de la caché {nombre}",
+            funcion=lambda: info()[0] / max(sum(info()), 1))
+
+
+@contextmanager
+def medir_sorteo(modo, cliente_id=None):
+    """Cuenta un sorteo iniciado/completado y los mensajes de websocket enviados a `cliente_id`."""
+    SORTEOS_INICIADOS.inc(modo=modo)
+    mensajes_antes = mensajes_por_cliente.get(cliente_id, 0)
+    yield
+    SORTEOS_COMPLETADOS.inc(modo=modo)
+    if cliente_id is not None:
+        MENSAJES_POR_SORTEO.observe(mensajes_por_cliente.get(cliente_id, 0) - mensajes_antes, modo=modo)
+
+
+async def monitorear_event_loop(intervalo=INTERVALO_LAG):
+    """Mide cuánto se atrasa un `asyncio.sleep` (tareas síncronas largas bloqueando el loop)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(intervalo)
+        LAG_EVENT_LOOP.observe(max(loop.time() - t0 - intervalo, 0.0))
+
+
+def _contar_mensajes_websocket():
+    from nicegui import core
+
+    emit_original = core.sio.emit
+
+    async def emit(event, data=None, *args, room=None, **kwargs):
+        MENSAJES_WEBSOCKET.inc()
+        if room is not None:
+            mensajes_por_cliente[room] = mensajes_por_cliente.get(room, 0) + 1
+        return await emit_original(event, data, *args, room=room, **kwargs)
+
+    core.sio.emit = emit
+
+
+def instalar(app, ruta='/metrics'):
+    """Agrega `/metrics` a la app de NiceGUI y arranca los monitores al iniciar el servidor."""
+    from fastapi.responses import PlainTextResponse
+    from nicegui import background_tasks
+
+    @app.get(ruta, include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(exponer(), media_type='text/plain; version=0.0.4')
+
+    def al_iniciar():
+        _contar_mensajes_websocket()
+        background_tasks.create(monitorear_event_loop(), name='monitor lag event loop')
+
+    app.on_startup(al_iniciar)
+
+    #Olvida el conteo de mensajes de los clientes que se eliminan
+    app.on_delete(lambda cliente: mensajes_por_cliente.pop(cliente.id, None))
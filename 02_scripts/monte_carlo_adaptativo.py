@@ -0,0 +1,322 @@
+"""
+Monte Carlo de precisión adaptativa, estratificado por escenario de repechaje.
+
+En vez de fijar a ojo el número de sorteos, se fija la precisión: "toda probabilidad de pareja
+(dos equipos en el mismo grupo) con semiancho <= 0.2% al 95%". Los sorteos se generan por lotes
+con `nucleo_sorteo` (Numba si está instalado); tras cada lote se actualizan los intervalos de confianza y se
+para en cuanto la pareja más imprecisa cumple el objetivo.
+
+Estratificación:
+- Cada escenario de repechaje (un ganador por llave de `Repechaje_UEFA` y `Repechaje_FIFA`) tiene
+  la probabilidad del modelo de partidos de `simular_bombos` (cuadro sembrado por ranking, como en
+  `asignar_bombos` sin clasificados fijos) o la misma para todos con `--modelo-repechaje uniforme`.
+- El motor solo distingue equipos por bombo y confederación, así que los escenarios se agrupan
+  por la confederación de cada ganador (firma). Con la misma firma los bombos tienen la misma
+  forma y los ganadores solo cambian de nombre: se usa un núcleo de sorteo por firma y cada
+  sorteo elige un escenario del estrato al azar y renombra a los ganadores.
+- Asignación proporcional: tras cada lote, el estrato h lleva round(W_h * n) sorteos (y al menos
+  `MINIMO_POR_ESTRATO`), con W_h la probabilidad del estrato. Dentro del estrato el escenario de
+  cada sorteo se elige con su probabilidad condicional.
+- Estimador: p = sum_h W_h p_h, con varianza sum_h W_h^2 p_h (1 - p_h) / n_h. La variación entre
+  estratos (qué confederaciones entran por repechaje) no aporta varianza, a diferencia del
+  muestreo ingenuo (`--sin-estratificar`), que juega las llaves de repechaje de todo el lote de
+  una vez (`LlavesRepechaje.simular`) y sortea con el escenario que salió en cada sorteo.
+
+Para la varianza se usa p_h = (x + 1) / (n_h + 2): una pareja que aún no apareció en un estrato
+no cuenta como estimada con precisión perfecta.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/monte_carlo_adaptativo.py --precision 0.002 --confianza 0.95 --workers 4
+    python 02_scripts/monte_carlo_adaptativo.py --precision 0.005 --sin-estratificar
+    python 02_scripts/monte_carlo_adaptativo.py --precision 0.005 --modelo-repechaje uniforme
+"""
+
+import time
+import argparse
+from statistics import NormalDist
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from simular_bombos import (df_clasificados, df_repechaje_uefa, df_repechaje_fifa, asignar_bombos,
+                            escenarios_repechaje, probabilidades_escenarios, LlavesRepechaje, CONFEDERACIONES)
+import sorteo_rapido
+from sorteo_rapido import GRUPOS, SLOTS_POR_GRUPO
+from nucleo_sorteo import NucleoSorteo
+
+TAMANO_LOTE = 5000            # sorteos por lote (se reparten entre los estratos)
+MINIMO_POR_ESTRATO = 200      # sorteos de cada estrato antes de evaluar la precisión
+SORTEOS_POR_TRABAJO = 1000    # sorteos por tarea enviada a un worker
+EQUIPOS = list(CONFEDERACIONES)  # clasificados + todos los candidatos de repechaje
+_IDX = {eq: i for i, eq in enumerate(EQUIPOS)}
+
+
+def firma_escenario(escenario):
+    """Confederación del ganador de cada llave: escenarios con la misma firma son un estrato."""
+    ganadores_uefa, ganadores_fifa = escenario
+    return (tuple(CONFEDERACIONES[eq] for eq in ganadores_uefa),
+            tuple(CONFEDERACIONES[eq] for eq in ganadores_fifa))
+
+
+@lru_cache(maxsize=None)
+def forma_de_firma(firma):
+    """
+    (núcleo de sorteo, índices en EQUIPOS de sus equipos, posiciones de los ganadores de repechaje)
+    de un escenario cualquiera con esa firma: todos comparten bombos y orden, solo cambian los ganadores.
+    """
+    for u, f in escenarios_repechaje():
+        if firma_escenario((u, f)) == firma:
+            df_b = asignar_bombos(df_clasificados, clasificados_uefa=list(u), clasificados_fifa=list(f))
+            tabla = sorteo_rapido.TablaSorteo(df_b)
+            indices = np.array([_IDX[eq] for eq in tabla.equipos], dtype=np.int64)
+            posiciones = np.array([tabla.idx[eq] for eq in (*u, *f)], dtype=np.int64)
+            return NucleoSorteo(tabla), indices, posiciones
+    raise ValueError(f"Ningún escenario de repechaje tiene la firma {firma}")
+
+
+class Estrato:
+    """Conjunto de escenarios de repechaje con sus probabilidades (condicionales al estrato)."""
+    def __init__(self, escenarios, probabilidades):
+        self.peso = float(np.sum(probabilidades))
+        self.probabilidades = np.asarray(probabilidades) / self.peso
+        firmas = [firma_escenario(e) for e in escenarios]
+        self.firmas = list(dict.fromkeys(firmas))
+        self.id_firma = np.array([self.firmas.index(f) for f in firmas], dtype=np.int64)
+        #Ganadores de cada escenario como índices de EQUIPOS (llaves UEFA y luego FIFA)
+        self.ganadores = np.array([[_IDX[eq] for eq in (*u, *f)] for u, f in escenarios], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ganadores)
+
+
+@lru_cache(maxsize=4)
+def estratos(estratificar=True, modelo='ranking'):
+    """
+    Estratos (en orden fijo) y sus pesos W_h. Sin estratificar hay uno solo con todos los
+    escenarios, en el orden de `escenarios_repechaje`.
+    """
+    por_firma = {}
+    for escenario, p in zip(escenarios_repechaje(), probabilidades_escenarios(modelo=modelo)):
+        clave = firma_escenario(escenario) if estratificar else None
+        escenarios, probabilidades = por_firma.setdefault(clave, ([], []))
+        escenarios.append(escenario)
+        probabilidades.append(p)
+    lista = [Estrato(*e) for e in por_firma.values()]
+    return lista, np.array([e.peso for e in lista])
+
+
+@lru_cache(maxsize=1)
+def _llaves():
+    return LlavesRepechaje(df_repechaje_uefa), LlavesRepechaje(df_repechaje_fifa)
+
+
+def jugar_escenarios(n, rng, modelo='ranking'):
+    """
+    Índice en `escenarios_repechaje` de `n` escenarios jugados llave por llave, todos a la vez:
+    unas pocas operaciones con arrays por partido en lugar de un groupby por sorteo.
+    """
+    posiciones, tamanos = [], []
+    for llaves in _llaves():
+        tamanos += [len(llave) for llave in llaves.llaves]
+        if modelo == 'uniforme':
+            posiciones.append(rng.integers(0, [len(llave) for llave in llaves.llaves], size=(n, len(llaves.llaves))))
+        else:
+            posiciones.append(llaves.simular(n, rng))
+    return np.ravel_multi_index(tuple(np.hstack(posiciones).T), tamanos)
+
+
+def _trabajo_estrato(args):
+    """Sortea `n` veces en el estrato h; devuelve conteos de grupos y de parejas sobre EQUIPOS."""
+    h, estratificar, modelo, n, semilla = args
+    estrato = estratos(estratificar, modelo)[0][h]
+    rng = np.random.default_rng(semilla)
+    if estratificar:
+        elegidos = rng.choice(len(estrato), size=n, p=estrato.probabilidades)
+    else:
+        elegidos = jugar_escenarios(n, rng, modelo)
+    grupo_de = np.empty((n, len(df_clasificados) + estrato.ganadores.shape[1]), dtype=np.int64)
+    equipo_de = np.empty_like(grupo_de)
+    for j, firma in enumerate(estrato.firmas):
+        ks = np.flatnonzero(estrato.id_firma[elegidos] == j)
+        if len(ks) == 0:
+            continue
+        nucleo, indices, posiciones = forma_de_firma(firma)
+        grupo_de[ks] = nucleo.sortear_lote(len(ks), seed=semilla * 64 + j).T // SLOTS_POR_GRUPO
+        equipo_de[ks] = indices
+        equipo_de[ks[:, None], posiciones] = estrato.ganadores[elegidos[ks]]
+
+    #One-hot (grupo, sorteo, equipo): la co-ocurrencia en un grupo es un producto de matrices
+    unos = np.zeros((len(GRUPOS), n, len(EQUIPOS)), dtype=np.float32)
+    unos[grupo_de, np.arange(n)[:, None], equipo_de] = 1.0
+    conteo_grupos = unos.sum(axis=1).T.astype(np.int64)
+    conteo_parejas = np.rint(np.matmul(unos.transpose(0, 2, 1), unos).sum(axis=0)).astype(np.int64)
+    np.fill_diagonal(conteo_parejas, 0)
+    return h, n, conteo_grupos, conteo_parejas
+
+
+class EstimadorEstratificado:
+    """Conteos por estrato y estimación estratificada con su semiancho de confianza."""
+    def __init__(self, pesos):
+        self.pesos = np.asarray(pesos)
+        n_estratos = len(self.pesos)
+        self.n = np.zeros(n_estratos, dtype=np.int64)
+        self.grupos = np.zeros((n_estratos, len(EQUIPOS), len(GRUPOS)), dtype=np.int64)
+        self.parejas = np.zeros((n_estratos, len(EQUIPOS), len(EQUIPOS)), dtype=np.int64)
+
+    def agregar(self, h, n, conteo_grupos, conteo_parejas):
+        self.n[h] += n
+        self.grupos[h] += conteo_grupos
+        self.parejas[h] += conteo_parejas
+
+    def asignacion(self, tamano_lote):
+        """Sorteos por estrato en el próximo lote (asignación proporcional acumulada, con mínimo)."""
+        objetivo = np.rint(self.pesos * (self.n.sum() + tamano_lote)).astype(np.int64)
+        #Un estrato improbable (el repechaje de dos equipos débiles) también llega al mínimo
+        objetivo = np.maximum(objetivo, MINIMO_POR_ESTRATO)
+        return np.maximum(objetivo - self.n, 0)
+
+    def _estimar(self, conteos):
+        forma = (-1,) + (1,) * (conteos.ndim - 1)
+        n = self.n.reshape(forma)
+        w = self.pesos.reshape(forma)
+        p = (w * conteos / np.maximum(n, 1)).sum(axis=0)
+        p_var = (conteos + 1) / (n + 2)
+        var = (w ** 2 * p_var * (1 - p_var) / np.maximum(n, 1)).sum(axis=0)
+        return p, np.sqrt(var)
+
+    def efecto_de_diseno(self):
+        """
+        Varianza estratificada / varianza del muestreo ingenuo con los mismos sorteos, por pareja.
+        La ingenua suma la varianza entre estratos: sum_h W_h (p_h - p)^2 / n.
+        """
+        n = self.n.reshape(-1, 1, 1)
+        w = self.pesos.reshape(-1, 1, 1)
+        p_h = self.parejas / np.maximum(n, 1)
+        p = (w * p_h).sum(axis=0)
+        dentro = (w * p_h * (1 - p_h)).sum(axis=0)
+        entre = (w * (p_h - p) ** 2).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(dentro + entre > 0, dentro / (dentro + entre), np.nan)
+
+    def parejas_con_error(self, z):
+        p, sd = self._estimar(self.parejas)
+        return p, z * sd
+
+    def grupos_con_error(self, z):
+        p, sd = self._estimar(self.grupos)
+        return p, z * sd
+
+
+def correr(precision=0.002, confianza=0.95, estratificar=True, seed=0, workers=1,
+           tamano_lote=TAMANO_LOTE, max_sorteos=5_000_000, al_lote=None, modelo='ranking'):
+    """
+    Genera lotes hasta que toda pareja tenga semiancho <= `precision` al nivel `confianza`.
+
+    Returns:
+        (EstimadorEstratificado, historial): historial con (sorteos, semiancho máximo, segundos) por lote.
+    """
+    lista, pesos = estratos(estratificar, modelo)
+    z = NormalDist().inv_cdf(0.5 + confianza / 2)
+    estimador = EstimadorEstratificado(pesos)
+    triangulo = np.triu_indices(len(EQUIPOS), k=1)
+    historial = []
+    t0 = time.perf_counter()
+
+    ejecutor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        lote = 0
+        while estimador.n.sum() < max_sorteos:
+            tamano = max(tamano_lote, MINIMO_POR_ESTRATO * len(lista)) if lote == 0 else tamano_lote
+            trabajos = []
+            for h, n_h in enumerate(estimador.asignacion(tamano)):
+                #Partes de tamaño fijo: el resultado no depende del número de workers
+                partes = max(1, -(-int(n_h) // SORTEOS_POR_TRABAJO))
+                for k, n_parte in enumerate(np.array_split(np.arange(n_h), partes)):
+                    if len(n_parte):
+                        semilla = int(np.random.SeedSequence(seed, spawn_key=(lote, h, k)).generate_state(1)[0])
+                        trabajos.append((h, estratificar, modelo, len(n_parte), semilla))
+            resultados = ejecutor.map(_trabajo_estrato, trabajos) if ejecutor else map(_trabajo_estrato, trabajos)
+            for resultado in resultados:
+                estimador.agregar(*resultado)
+            lote += 1
+
+            _, semiancho = estimador.parejas_con_error(z)
+            maximo = float(semiancho[triangulo].max())
+            historial.append((int(estimador.n.sum()), maximo, time.perf_counter() - t0))
+            if al_lote:
+                al_lote(*historial[-1])
+            if maximo <= precision and estimador.n.min() >= MINIMO_POR_ESTRATO:
+                break
+    finally:
+        if ejecutor:
+            ejecutor.shutdown()
+    return estimador, historial
+
+
+def tabla_parejas(estimador, confianza=0.95):
+    """
+    DataFrame (equipo_a, equipo_b, probabilidad, semiancho, efecto_diseno) de las parejas posibles.
+    efecto_diseno < 1: fracción de sorteos que necesita el estratificado respecto del ingenuo.
+    """
+    z = NormalDist().inv_cdf(0.5 + confianza / 2)
+    p, semiancho = estimador.parejas_con_error(z)
+    deff = estimador.efecto_de_diseno()
+    a, b = np.triu_indices(len(EQUIPOS), k=1)
+    df = pd.DataFrame({
+        'equipo_a': np.array(EQUIPOS)[a],
+        'equipo_b': np.array(EQUIPOS)[b],
+        'probabilidad': p[a, b],
+        'semiancho': semiancho[a, b],
+        'efecto_diseno': deff[a, b],
+    })
+    return df[df['probabilidad'] > 0].sort_values(by='probabilidad', ascending=False).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo con precisión objetivo, estratificado por repechaje")
+    parser.add_argument('--precision', type=float, default=0.002, help="Semiancho máximo por pareja (0.002 = ±0.2%%)")
+    parser.add_argument('--confianza', type=float, default=0.95)
+    parser.add_argument('--sin-estratificar', action='store_true',
+                        help="Muestreo ingenuo: el escenario de repechaje se sortea en cada sorteo")
+    parser.add_argument('--modelo-repechaje', choices=['ranking', 'uniforme'], default='ranking',
+                        help="Probabilidad de los ganadores de repechaje: partidos según ranking o todos iguales")
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE)
+    parser.add_argument('--max-sorteos', type=int, default=5_000_000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Ruta CSV donde guardar las probabilidades de parejas con su semiancho")
+    args = parser.parse_args()
+
+    estratificar = not args.sin_estratificar
+    lista, pesos = estratos(estratificar, args.modelo_repechaje)
+    print(f"{len(lista)} estrato(s) sobre {sum(len(e) for e in lista)} escenarios de repechaje "
+          f"(modelo {args.modelo_repechaje}, peso mínimo {pesos.min():.4f}); "
+          f"objetivo ±{100 * args.precision:.2f}% al {100 * args.confianza:.0f}%")
+
+    def al_lote(n, maximo, segundos):
+        print(f"{n:>9} sorteos  semiancho máx {100 * maximo:.3f}%  ({segundos:.0f} s)")
+
+    estimador, historial = correr(args.precision, args.confianza, estratificar, args.seed,
+                                  args.workers, args.lote, args.max_sorteos, al_lote, args.modelo_repechaje)
+    n, maximo, segundos = historial[-1]
+    estado = "cumplido" if maximo <= args.precision else "NO cumplido (límite de sorteos)"
+    print(f"\nObjetivo {estado}: {n} sorteos en {segundos:.0f} s")
+
+    df = tabla_parejas(estimador, args.confianza)
+    if args.output:
+        df.to_csv(args.output, index=False)
+    print("\n--- Parejas más probables ---")
+    print(df.head(10).round(4).to_string(index=False))
+    print("\n--- Parejas menos precisas ---")
+    print(df.sort_values(by='semiancho', ascending=False).head(5).round(4).to_string(index=False))
+    if estratificar:
+        print(f"\nEfecto de diseño (varianza estratificada / ingenua): mediana "
+              f"{df['efecto_diseno'].median():.3f}, pareja menos precisa "
+              f"{df.loc[df['semiancho'].idxmax(), 'efecto_diseno']:.3f}")
+        print(df.sort_values(by='efecto_diseno').head(5).round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+"""
+Núcleo del sorteo sobre arreglos de enteros, compilado con Numba si está instalado.
+
+Mismo procedimiento que `sorteo_rapido` (anfitriones fijos, bombo 1 en orden A→L, el resto de los
+bombos al primer grupo válido con lookahead por la condición de Hall y slot al azar), pero escrito
+solo con índices y aritmética entera para que Numba lo compile. Sirve para cualquier formato de
+`formato_torneo` de hasta `MAXIMO_GRUPOS` grupos:
+- Chequeo de confederación: `conteo[g * n_conf + c] < cupo[c]`.
+- Factibilidad: condición de Hall sobre máscaras de grupos (`_factible`).
+- Selección de slot: se saca un slot libre al azar del grupo asignado.
+
+Backends:
+- 'numba': las funciones del núcleo se compilan con `numba.njit(cache=True)`; la compilación
+  queda en disco (`__pycache__`, o `NUMBA_CACHE_DIR`), así que solo el primer arranque la paga.
+- 'python': las mismas funciones sin compilar, sobre listas de Python.
+Se elige 'numba' si se puede importar (forzable con `WC_MOTOR_SORTEO=python`).
+
+Como `random.Random` no existe dentro de Numba, el núcleo usa su propio generador
+(xoroshiro64** sembrado con murmur3 a partir de (seed, índice de sorteo)), con productos de
+32 bits partidos en mitades para no desbordar int64. Con la misma seed ambos backends dan
+exactamente los mismos sorteos.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/nucleo_sorteo.py --sorteos 100000 --comparar
+"""
+
+import os
+import time
+import types
+import argparse
+
+import numpy as np
+
+import sorteo_rapido
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+M32 = 0xFFFFFFFF
+M16 = 0xFFFF
+MAXIMO_GRUPOS = 32  # máscaras de grupos en dos mitades de 16 bits (`_bits`)
+MOTOR_POR_DEFECTO = os.getenv('WC_MOTOR_SORTEO', 'numba' if numba is not None else 'python')
+
+
+# --- Generador (mismos enteros en Python y en Numba) ---
+
+def _mul32(a, b):
+    """(a * b) mod 2^32 sin productos mayores a 2^48."""
+    return (a * (b & 0xFFFF) + (((a * (b >> 16)) & 0xFFFF) << 16)) & M32
+
+
+def _rotl32(x, k):
+    return ((x << k) | (x >> (32 - k))) & M32
+
+
+def _mezclar(h):
+    """Finalizador de murmur3 (32 bits)."""
+    h ^= h >> 16
+    h = _mul32(h, 0x85EBCA6B)
+    h ^= h >> 13
+    h = _mul32(h, 0xC2B2AE35)
+    h ^= h >> 16
+    return h
+
+
+def _sembrar(estado, seed, k):
+    """Estado inicial del sorteo k de la semilla `seed` (0 <= seed < 2^63)."""
+    s0 = _mezclar((seed & M32) ^ _mezclar((k & M32) ^ 0x243F6A88))
+    s1 = _mezclar(((seed >> 32) & M32) ^ _mezclar(((k >> 32) & M32) ^ s0 ^ 0x85A308D3))
+    if s0 == 0 and s1 == 0:
+        s1 = 1
+    estado[0] = s0
+    estado[1] = s1
+
+
+def _siguiente(estado):
+    """xoroshiro64**: siguiente entero de 32 bits."""
+    s0 = estado[0]
+    s1 = estado[1]
+    resultado = _mul32(_rotl32(_mul32(s0, 0x9E3779BB), 5), 5)
+    s1 ^= s0
+    estado[0] = _rotl32(s0, 26) ^ s1 ^ ((s1 << 9) & M32)
+    estado[1] = _rotl32(s1, 13)
+    return resultado
+
+
+def _aleatorio_menor(estado, n):
+    """Entero uniforme en [0, n) (rechazo del sesgo del módulo)."""
+    umbral = ((M32 + 1) - n) % n
+    while True:
+        x = _siguiente(estado)
+        if x >= umbral:
+            return x % n
+
+
+# --- Procedimiento del sorteo ---
+
+def _sacar(arreglo, inicio, n, k):
+    """Saca el elemento k de arreglo[inicio:inicio + n] corriendo el resto (como list.pop(k))."""
+    valor = arreglo[inicio + k]
+    for j in range(inicio + k, inicio + n - 1):
+        arreglo[j] = arreglo[j + 1]
+    return valor
+
+
+def _quitar_slot(libres, n_libres, g, s):
+    slots = len(libres) // len(n_libres)
+    for k in range(n_libres[g]):
+        if libres[g * slots + k] == s:
+            _sacar(libres, g * slots, n_libres[g], k)
+            n_libres[g] -= 1
+            return
+
+
+def _bits(popcount, mascara):
+    """Bits en 1 de una máscara de hasta 32 grupos, con la tabla de 16 bits."""
+    return popcount[mascara & M16] + popcount[mascara >> 16]
+
+
+def _factible(bolas, n_bolas, conf, n_bombo, tamano, conteo, cupo, n_conf, n_grupos,
+              popcount, demanda, pres_demanda, pres_mascara):
+    """Condición de Hall para las bolas restantes del bombo (ver `sorteo_rapido.factible`)."""
+    for c in range(n_conf):
+        demanda[c] = 0
+    for j in range(n_bolas):
+        demanda[conf[bolas[j]]] += 1
+
+    k = 0
+    for c in range(n_conf):
+        if demanda[c]:
+            mascara = 0
+            for g in range(n_grupos):
+                if tamano[g] < n_bombo and conteo[g * n_conf + c] < cupo[c]:
+                    mascara |= 1 << g
+            if _bits(popcount, mascara) < demanda[c]:
+                return False
+            pres_demanda[k] = demanda[c]
+            pres_mascara[k] = mascara
+            k += 1
+
+    for subconjunto in range(3, 1 << k):
+        if subconjunto & (subconjunto - 1) == 0:
+            continue
+        total = 0
+        union = 0
+        for j in range(k):
+            if subconjunto >> j & 1:
+                total += pres_demanda[j]
+                union |= pres_mascara[j]
+        if _bits(popcount, union) < total:
+            return False
+    return True
+
+
+def _colocar(i, g, s, conf, n_conf, grupo_de, slot_de, conteo, tamano, libres, n_libres):
+    grupo_de[i] = g
+    slot_de[i] = s
+    conteo[g * n_conf + conf[i]] += 1
+    tamano[g] += 1
+    _quitar_slot(libres, n_libres, g, s)
+
+
+def _tamano_hasta(bombos, inicio_bombo, n, grupo_de, tamano, n_grupos):
+    """Equipos de los bombos 1..n colocados en cada grupo (ver `sorteo_rapido._tamano_hasta`)."""
+    for g in range(n_grupos):
+        tamano[g] = 0
+    for j in range(inicio_bombo[0], inicio_bombo[n]):
+        g = grupo_de[bombos[j]]
+        if g >= 0:
+            tamano[g] += 1
+
+
+def _cabeza_valida(k, g, bolas, n_bolas, conf, tamano, conteo, cupo, n_conf, n_grupos,
+                   popcount, demanda, pres_demanda, pres_mascara):
+    """¿Puede bolas[k] ir al grupo g sin dejar al resto del bombo 1 sin lugar? (`sorteo_rapido._cabeza_valida`)"""
+    i = bolas[k]
+    c = conf[i]
+    if conteo[g * n_conf + c] >= cupo[c]:
+        return False
+    conteo[g * n_conf + c] += 1
+    tamano[g] += 1
+    #Se deja la bola al final para pasarle a `_factible` solo las demás, y se vuelve a su lugar
+    bolas[k] = bolas[n_bolas - 1]
+    bolas[n_bolas - 1] = i
+    ok = _factible(bolas, n_bolas - 1, conf, 1, tamano, conteo, cupo, n_conf, n_grupos,
+                   popcount, demanda, pres_demanda, pres_mascara)
+    bolas[n_bolas - 1] = bolas[k]
+    bolas[k] = i
+    conteo[g * n_conf + c] -= 1
+    tamano[g] -= 1
+    return ok
+
+
+def _completar(conf, cupo, bombos, inicio_bombo, anf_equipo, anf_grupo, anf_slot, n_grupos, n_conf,
+               popcount, grupo_de, slot_de, estado, conteo, tamano, libres, n_libres, bolas,
+               demanda, pres_demanda, pres_mascara):
+    """
+    Completa en el lugar `grupo_de`/`slot_de` (-1 = sin grupo), con equipos fijados en
+    cualquier bombo como en `sorteo_rapido.completar`. Devuelve el equipo que quedó sin grupo
+    válido, o -1 si el sorteo terminó.
+    """
+    n_equipos = len(conf)
+    slots = len(libres) // n_grupos
+    for g in range(n_grupos):
+        n_libres[g] = slots
+        for s in range(slots):
+            libres[g * slots + s] = s
+        for c in range(n_conf):
+            conteo[g * n_conf + c] = 0
+    for i in range(n_equipos):
+        g = grupo_de[i]
+        if g >= 0:
+            conteo[g * n_conf + conf[i]] += 1
+            _quitar_slot(libres, n_libres, g, slot_de[i])
+
+    # --- BOMBO 1: anfitriones fijos y el resto a los grupos libres en orden ---
+    for a in range(len(anf_equipo)):
+        if grupo_de[anf_equipo[a]] < 0:
+            _colocar(anf_equipo[a], anf_grupo[a], anf_slot[a], conf, n_conf, grupo_de, slot_de,
+                     conteo, tamano, libres, n_libres)
+
+    _tamano_hasta(bombos, inicio_bombo, 1, grupo_de, tamano, n_grupos)
+    n_bolas = 0
+    for j in range(inicio_bombo[0], inicio_bombo[1]):
+        if grupo_de[bombos[j]] < 0:
+            bolas[n_bolas] = bombos[j]
+            n_bolas += 1
+    fijados_despues = False
+    for j in range(inicio_bombo[1], inicio_bombo[len(inicio_bombo) - 1]):
+        if grupo_de[bombos[j]] >= 0:
+            fijados_despues = True
+    for g in range(n_grupos):
+        if tamano[g] > 0 or n_bolas == 0:
+            continue
+        if fijados_despues:
+            validos = 0
+            for k in range(n_bolas):
+                if _cabeza_valida(k, g, bolas, n_bolas, conf, tamano, conteo, cupo, n_conf, n_grupos,
+                                  popcount, demanda, pres_demanda, pres_mascara):
+                    validos += 1
+            if validos == 0:
+                return bolas[0]
+            r = _aleatorio_menor(estado, validos)
+            k = 0
+            while True:
+                if _cabeza_valida(k, g, bolas, n_bolas, conf, tamano, conteo, cupo, n_conf, n_grupos,
+                                  popcount, demanda, pres_demanda, pres_mascara):
+                    if r == 0:
+                        break
+                    r -= 1
+                k += 1
+        else:
+            k = _aleatorio_menor(estado, n_bolas)
+        i = _sacar(bolas, 0, n_bolas, k)
+        n_bolas -= 1
+        _colocar(i, g, 0, conf, n_conf, grupo_de, slot_de, conteo, tamano, libres, n_libres)
+
+    # --- BOMBOS 2 EN ADELANTE ---
+    for n in range(2, len(inicio_bombo)):
+        _tamano_hasta(bombos, inicio_bombo, n, grupo_de, tamano, n_grupos)
+        n_bolas = 0
+        for j in range(inicio_bombo[n - 1], inicio_bombo[n]):
+            if grupo_de[bombos[j]] < 0:
+                bolas[n_bolas] = bombos[j]
+                n_bolas += 1
+        while n_bolas > 0:
+            i = _sacar(bolas, 0, n_bolas, _aleatorio_menor(estado, n_bolas))
+            n_bolas -= 1
+            c = conf[i]
+
+            asignado = -1
+            for g in range(n_grupos):
+                if tamano[g] >= n or conteo[g * n_conf + c] >= cupo[c]:
+                    continue
+                conteo[g * n_conf + c] += 1
+                tamano[g] += 1
+                ok = _factible(bolas, n_bolas, conf, n, tamano, conteo, cupo, n_conf, n_grupos,
+                               popcount, demanda, pres_demanda, pres_mascara)
+                conteo[g * n_conf + c] -= 1
+                tamano[g] -= 1
+                if ok:
+                    asignado = g
+                    break
+            if asignado < 0:
+                return i
+
+            s = libres[asignado * slots + _aleatorio_menor(estado, n_libres[asignado])]
+            _colocar(i, asignado, s, conf, n_conf, grupo_de, slot_de, conteo, tamano, libres, n_libres)
+    return -1
+
+
+def _lote(conf, cupo, bombos, inicio_bombo, anf_equipo, anf_grupo, anf_slot, n_grupos, n_conf,
+          popcount, grupo_inicial, slot_inicial, n_sorteos, seed, salida, grupo_de, slot_de, estado,
+          conteo, tamano, libres, n_libres, bolas, demanda, pres_demanda, pres_mascara):
+    """
+    `n_sorteos` sorteos completados desde (grupo_inicial, slot_inicial), el k-ésimo sembrado con
+    (seed, k). `salida` es plana, equipo por equipo: salida[i * n_sorteos + k] = grupo * slots + slot.
+    Un sorteo que se queda sin grupo válido queda en -1 y se sigue con el siguiente.
+    Devuelve -1, o el índice del primer equipo que quedó sin grupo válido.
+    """
+    n_equipos = len(conf)
+    slots = len(libres) // n_grupos
+    primer_atascado = -1
+    for k in range(n_sorteos):
+        for i in range(n_equipos):
+            grupo_de[i] = grupo_inicial[i]
+            slot_de[i] = slot_inicial[i]
+        _sembrar(estado, seed, k)
+        atascado = _completar(conf, cupo, bombos, inicio_bombo, anf_equipo, anf_grupo, anf_slot,
+                              n_grupos, n_conf, popcount, grupo_de, slot_de, estado, conteo, tamano,
+                              libres, n_libres, bolas, demanda, pres_demanda, pres_mascara)
+        if atascado >= 0:
+            if primer_atascado < 0:
+                primer_atascado = atascado
+            for i in range(n_equipos):
+                salida[i * n_sorteos + k] = -1
+            continue
+        for i in range(n_equipos):
+            salida[i * n_sorteos + k] = grupo_de[i] * slots + slot_de[i]
+    return primer_atascado
+
+
+_FUNCIONES_NUCLEO = ('_mul32', '_rotl32', '_mezclar', '_sembrar', '_siguiente', '_aleatorio_menor',
+                     '_sacar', '_quitar_slot', '_bits', '_factible', '_tamano_hasta', '_cabeza_valida', '_colocar', '_completar', '_lote')
+
+
+def _compilar():
+    """
+    Copias compiladas de las funciones del núcleo. Cada copia ve a las demás compiladas (en un
+    espacio de nombres propio), mientras que las originales siguen siendo Python puro.
+    """
+    espacio = dict(globals())
+    for nombre in _FUNCIONES_NUCLEO:
+        f = globals()[nombre]
+        copia = types.FunctionType(f.__code__, espacio, nombre, f.__defaults__, f.__closure__)
+        copia.__module__ = __name__
+        copia.__qualname__ = f.__qualname__
+        espacio[nombre] = numba.njit(cache=True, nogil=True)(copia)
+    return espacio['_lote']
+
+
+_LOTE_COMPILADO = _compilar() if numba is not None else None
+
+
+class NucleoSorteo:
+    """Datos de una `TablaSorteo` como arreglos planos para el núcleo."""
+    def __init__(self, tabla):
+        if tabla.n_grupos > MAXIMO_GRUPOS:
+            raise ValueError(f"El núcleo admite hasta {MAXIMO_GRUPOS} grupos, no {tabla.n_grupos}")
+        self.tabla = tabla
+        self.n_equipos = tabla.n_equipos
+        self.slots_por_grupo = tabla.slots_por_grupo
+        bombos = range(1, tabla.n_bombos + 1)
+        orden = [i for n in bombos for i in tabla.bombos[n]]
+        inicio = [0]
+        for n in bombos:
+            inicio.append(inicio[-1] + len(tabla.bombos[n]))
+        anfitriones = list(tabla.anfitriones.items())
+        self.datos = {
+            'conf': list(tabla.conf),
+            'cupo': list(tabla.cupo),
+            'bombos': orden,
+            'inicio_bombo': inicio,
+            'anf_equipo': [i for i, _ in anfitriones],
+            'anf_grupo': [g for _, (g, _) in anfitriones],
+            'anf_slot': [s for _, (_, s) in anfitriones],
+        }
+        self.n_grupos = tabla.n_grupos
+        self.n_conf = tabla.n_conf
+        self.popcount = [bin(m).count('1') for m in range(1 << min(tabla.n_grupos, 16))]
+        self.max_bombo = max(len(tabla.bombos[n]) for n in bombos)
+
+    def completar_lote(self, grupo_de, slot_de, n_sorteos, seed=0, motor=None, permitir_atascos=False):
+        """
+        `n_sorteos` sorteos completados desde un estado a medias (-1 = sin grupo), codificados
+        como int8 `grupo * 4 + slot` con forma (n_equipos, n_sorteos).
+
+        Si un sorteo se queda sin grupo válido (posible con equipos fijados fuera del orden del
+        procedimiento) lanza ValueError, o con `permitir_atascos` deja esa columna en -1.
+        """
+        motor = motor or MOTOR_POR_DEFECTO
+        if motor == 'numba':
+            if _LOTE_COMPILADO is None:
+                raise RuntimeError("Numba no está instalado")
+            nuevo = lambda valores: np.array(valores, dtype=np.int64)
+            ceros = lambda n: np.zeros(n, dtype=np.int64)
+            lote = _LOTE_COMPILADO
+        elif motor == 'python':
+            nuevo = list
+            ceros = lambda n: [0] * n
+            lote = _lote
+        else:
+            raise ValueError(f"Motor desconocido: {motor}")
+
+        n_conf = self.n_conf
+        salida = ceros(self.n_equipos * n_sorteos)
+        d = self.datos
+        atascado = lote(
+            nuevo(d['conf']), nuevo(d['cupo']), nuevo(d['bombos']), nuevo(d['inicio_bombo']),
+            nuevo(d['anf_equipo']), nuevo(d['anf_grupo']), nuevo(d['anf_slot']),
+            self.n_grupos, n_conf, nuevo(self.popcount),
+            nuevo(list(grupo_de)), nuevo(list(slot_de)), n_sorteos, int(seed), salida,
+            ceros(self.n_equipos), ceros(self.n_equipos), ceros(2),
+            ceros(self.n_grupos * n_conf), ceros(self.n_grupos), ceros(self.n_grupos * self.slots_por_grupo), ceros(self.n_grupos),
+            ceros(self.max_bombo), ceros(n_conf), ceros(n_conf), ceros(n_conf),
+        )
+        if atascado >= 0 and not permitir_atascos:
+            raise ValueError(f"No hay grupo válido para {self.tabla.equipos[atascado]}. Revisa constraints!")
+        return np.asarray(salida, dtype=np.int8).reshape(self.n_equipos, n_sorteos)
+
+    def sortear_lote(self, n_sorteos, seed=0, motor=None):
+        """Como `sorteo_rapido.sortear_lote` (misma codificación), con el generador del núcleo."""
+        vacio = [-1] * self.n_equipos
+        return self.completar_lote(vacio, vacio, n_sorteos, seed=seed, motor=motor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Núcleo de sorteo (Numba / Python puro)")
+    parser.add_argument('--sorteos', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--comparar', action='store_true',
+                        help="Corre ambos backends sobre los primeros sorteos y verifica que coinciden")
+    args = parser.parse_args()
+
+    nucleo = NucleoSorteo(sorteo_rapido.TablaSorteo())
+    print(f"Motor por defecto: {MOTOR_POR_DEFECTO}")
+
+    t0 = time.perf_counter()
+    nucleo.sortear_lote(1, seed=args.seed)  # compila (o carga de la caché en disco)
+    print(f"Primera llamada (compilación o caché): {time.perf_counter() - t0:.2f} s")
+
+    t0 = time.perf_counter()
+    nucleo.sortear_lote(args.sorteos, seed=args.seed)
+    segundos = time.perf_counter() - t0
+    print(f"{args.sorteos} sorteos en {segundos:.2f} s ({1e6 * segundos / args.sorteos:.1f} µs por sorteo)")
+
+    if args.comparar:
+        if numba is None:
+            print("Sin Numba no hay otro backend con el que comparar.")
+            return
+        n = min(args.sorteos, 2000)
+        iguales = np.array_equal(nucleo.sortear_lote(n, seed=args.seed, motor='numba'),
+                                 nucleo.sortear_lote(n, seed=args.seed, motor='python'))
+        print(f"numba vs python en {n} sorteos: {'idénticos' if iguales else 'DISTINTOS'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Perfilador por muestreo para el servidor en vivo (solo biblioteca estándar).
+
+Un hilo aparte lee `sys._current_frames()` cada `intervalo` segundos y cuenta las pilas de
+llamadas de los demás hilos. No instrumenta cada llamada (a diferencia de cProfile o
+`sys.setprofile`), así que el coste es proporcional a la frecuencia de muestreo y no a la carga
+del servidor. Como NiceGUI corre todo en el hilo del event loop, las muestras de ese hilo
+reparten el tiempo entre `lookahead`, `refresh_groups_ui`, las llamadas de pandas, etc.
+
+Formatos de salida:
+- colapsado: una línea "hilo;f1;f2;...;fn conteo" por pila (flamegraph.pl, speedscope, inferno).
+- speedscope: JSON "sampled" importable en https://www.speedscope.app.
+
+En la GUI, `instalar(app)` agrega `GET /admin/perfil?segundos=10&formato=colapsado`, protegido
+con el token de la variable de entorno WC_ADMIN_TOKEN (cabecera X-Admin-Token). Sin esa variable
+el endpoint responde 404.
+
+Uso desde consola (perfila sorteos completos, desde la raíz del repo):
+    python 02_scripts/perfilador.py --sorteos 50 --formato speedscope --salida perfil.json
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import asyncio
+import argparse
+import threading
+from collections import Counter
+
+INTERVALO_MUESTREO = 0.005   # segundos entre muestras
+SEGUNDOS_MAXIMOS = 60        # duración máxima de un perfil pedido por HTTP
+FORMATOS = ('colapsado', 'speedscope')
+
+
+def _nombre_marco(codigo):
+    return f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+
+
+class PerfiladorMuestreo:
+    """Muestrea las pilas de todos los hilos (menos el propio) en un hilo en segundo plano."""
+    def __init__(self, intervalo=INTERVALO_MUESTREO):
+        self.intervalo = intervalo
+        self.pilas = Counter()  # tupla de marcos (raíz primero) -> muestras
+        self.n_muestras = 0
+        self.duracion = 0.0
+        self._detener = threading.Event()
+        self._hilo = None
+        self._t0 = None
+
+    def iniciar(self):
+        self._detener.clear()
+        self._t0 = time.perf_counter()
+        self._hilo = threading.Thread(target=self._muestrear, name='perfilador', daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+        self.duracion = time.perf_counter() - self._t0
+        return self
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        while not self._detener.wait(self.intervalo):
+            nombres_hilos = {h.ident: h.name for h in threading.enumerate()}
+            for ident, marco in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                pila = []
+                while marco is not None:
+                    pila.append(_nombre_marco(marco.f_code))
+                    marco = marco.f_back
+                pila.append(nombres_hilos.get(ident, f'hilo-{ident}'))
+                self.pilas[tuple(reversed(pila))] += 1
+            self.n_muestras += 1
+
+    # --- Salidas ---
+
+    def colapsado(self):
+        """Formato de pilas colapsadas: 'raíz;...;hoja conteo' por línea."""
+        return '\n'.join(f"{';'.join(pila)} {n}" for pila, n in self.pilas.most_common()) + '\n'
+
+    def speedscope(self, nombre='wc-sorteo'):
+        """Perfil 'sampled' de speedscope (un perfil por hilo, pesos en segundos)."""
+        marcos = []
+        indices = {}
+        por_hilo = {}
+        for pila, n in self.pilas.items():
+            hilo, funciones = pila[0], pila[1:]
+            ids = []
+            for f in funciones:
+                if f not in indices:
+                    indices[f] = len(marcos)
+                    marcos.append({'name': f})
+                ids.append(indices[f])
+            muestras, pesos = por_hilo.setdefault(hilo, ([], []))
+            muestras.append(ids)
+            pesos.append(n * self.intervalo)
+
+        perfiles = [{
+            'type': 'sampled', 'name': hilo, 'unit': 'seconds',
+            'startValue': 0, 'endValue': sum(pesos), 'samples': muestras, 'weights': pesos,
+        } for hilo, (muestras, pesos) in por_hilo.items()]
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': nombre, 'exporter': 'perfilador.py', 'activeProfileIndex': 0,
+            'shared': {'frames': marcos}, 'profiles': perfiles,
+        }
+
+    def resumen_funciones(self, top=20):
+        """Muestras propias (en la hoja) y acumuladas (en cualquier nivel) por función."""
+        propias = Counter()
+        acumuladas = Counter()
+        for pila, n in self.pilas.items():
+            propias[pila[-1]] += n
+            for f in set(pila[1:]):
+                acumuladas[f] += n
+        return [(f, propias[f], n) for f, n in acumuladas.most_common(top)]
+
+
+def token_valido(token, esperado=None):
+    """Compara el token recibido con WC_ADMIN_TOKEN en tiempo constante."""
+    esperado = os.getenv('WC_ADMIN_TOKEN') if esperado is None else esperado
+    return bool(esperado) and token is not None and hmac.compare_digest(token, esperado)
+
+
+def instalar(app, ruta='/admin/perfil'):
+    """Agrega el endpoint de perfilado a la app de NiceGUI/FastAPI."""
+    from fastapi import Header, HTTPException, Query
+    from fastapi.responses import JSONResponse, PlainTextResponse
+
+    en_curso = asyncio.Lock()
+
+    @app.get(ruta, include_in_schema=False)
+    async def perfil(segundos: float = Query(10.0, gt=0, le=SEGUNDOS_MAXIMOS),
+                     formato: str = Query('colapsado'),
+                     intervalo: float = Query(INTERVALO_MUESTREO, ge=0.001, le=0.1),
+                     x_admin_token: str = Header(None)):
+        #Sin token configurado el endpoint no existe; con token incorrecto, 403
+        if not os.getenv('WC_ADMIN_TOKEN'):
+            raise HTTPException(status_code=404)
+        if not token_valido(x_admin_token):
+            raise HTTPException(status_code=403, detail="Token de administrador inválido")
+        if formato not in FORMATOS:
+            raise HTTPException(status_code=400, detail=f"Formato debe ser uno de {FORMATOS}")
+        if en_curso.locked():
+            raise HTTPException(status_code=409, detail="Ya hay un perfil en curso")
+
+        async with en_curso:
+            perfilador = PerfiladorMuestreo(intervalo).iniciar()
+            try:
+                await asyncio.sleep(segundos)  # el event loop sigue atendiendo a los clientes
+            finally:
+                perfilador.detener()
+
+        print(f"[perfilador] {perfilador.n_muestras} muestras en {perfilador.duracion:.1f} s")
+        if formato == 'speedscope':
+            return JSONResponse(perfilador.speedscope())
+        return PlainTextResponse(perfilador.colapsado())
+
+
+def main():
+    from simular_bombos import df_bombos
+    from simular_sorteo_func import sortear_mundial
+
+    parser = argparse.ArgumentParser(description="Perfil por muestreo de sorteos completos")
+    parser.add_argument('--sorteos', type=int, default=50)
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_MUESTREO)
+    parser.add_argument('--formato', choices=FORMATOS, default='colapsado')
+    parser.add_argument('--salida', help="Archivo de salida (por defecto solo el resumen en consola)")
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    with PerfiladorMuestreo(args.intervalo) as perfilador:
+        for _ in range(args.sorteos):
+            sortear_mundial(df_bombos)
+
+    print(f"--- {perfilador.n_muestras} muestras en {perfilador.duracion:.1f} s ---")
+    print(f"{'función':<60} {'propias':>8} {'acumuladas':>11}")
+    for f, propias, acumuladas in perfilador.resumen_funciones(args.top):
+        print(f"{f:<60} {propias:>8} {acumuladas:>11}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as fh:
+            if args.formato == 'speedscope':
+                json.dump(perfilador.speedscope(), fh)
+            else:
+                fh.write(perfilador.colapsado())
+        print(f"\nPerfil guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Enlaces permanentes a sorteos terminados (`/draw/{token}`).
+
+Un sorteo terminado se guarda entero en el token, sin nada del lado del servidor:
+- byte 0: versión del formato (`FORMATO`);
+- bytes 1-2: huella de la tabla (crc32 de `VERSION_REGLAS` y de los códigos de df_bombos en orden,
+  16 bits). Un token de otra tabla u otras reglas se rechaza en vez de mostrar otro sorteo;
+- 36 bytes: 6 bits por equipo con `grupo * 4 + slot` (el código de `almacen_resultados`), en el
+  orden de `TablaSorteo`.
+En base64 url-safe son 52 caracteres.
+
+`instalar(app, banderas)` agrega `GET /draw/{token}`: una página HTML estática de solo lectura
+con las 12 tarjetas de grupo (sin websocket ni estado de sesión). El HTML de cada token se genera
+una sola vez (`lru_cache`) y sale con ETag y Cache-Control; si el navegador o un proxy mandan
+If-None-Match con el mismo ETag se responde 304 sin cuerpo. Un enlace muy compartido cuesta
+una búsqueda en un dict por pedido.
+
+Uso desde consola (token de un sorteo del motor rápido y tiempo de decodificación, desde la raíz del repo):
+    python 02_scripts/permalinks.py --seed 7
+"""
+
+import re
+import html
+import zlib
+import base64
+import random
+import argparse
+from functools import lru_cache
+
+import fijaciones
+import sorteo_rapido
+from sorteo_rapido import GRUPOS, SLOTS_POR_GRUPO
+from simular_bombos import df_bombos, CONFEDERACIONES_ORDEN
+from simular_sorteo_func import VERSION_REGLAS
+
+FORMATO = 1
+VERSION_PAGINA = 1         # cambiarla invalida los ETag de las páginas ya servidas
+BITS_POR_EQUIPO = 6        # 12 grupos x 4 slots = 48 posiciones < 2^6
+MAX_AGE = 86400            # segundos que navegadores y proxies pueden reutilizar la página
+TAMANO_CACHE = 1024        # páginas renderizadas guardadas
+_TOKEN_VALIDO = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+@lru_cache(maxsize=1)
+def tabla():
+    return sorteo_rapido.TablaSorteo(df_bombos)
+
+
+def huella(t):
+    """16 bits que identifican la tabla de equipos y la versión de las reglas."""
+    return zlib.crc32((VERSION_REGLAS + ',' + ','.join(t.equipos)).encode()) & 0xFFFF
+
+
+def _bytes_posiciones(t):
+    return (t.n_equipos * BITS_POR_EQUIPO + 7) // 8
+
+
+def codificar(grupo_de, slot_de, t=None):
+    """Token de un sorteo completo dado como listas `grupo_de`/`slot_de` (índices de `TablaSorteo`)."""
+    t = t or tabla()
+    valor = 0
+    for i in reversed(range(t.n_equipos)):
+        valor = (valor << BITS_POR_EQUIPO) | (grupo_de[i] * SLOTS_POR_GRUPO + slot_de[i])
+    crudo = bytes([FORMATO]) + huella(t).to_bytes(2, 'big') + valor.to_bytes(_bytes_posiciones(t), 'little')
+    return base64.urlsafe_b64encode(crudo).rstrip(b'=').decode()
+
+
+def token_de(grupos_dict, t=None):
+    """Token de un `grupos_dict` completo de la GUI o de `simular_sorteo_func`."""
+    t = t or tabla()
+    grupo_de, slot_de = sorteo_rapido.desde_grupos_dict(t, grupos_dict)
+    if -1 in grupo_de:
+        raise ValueError("El sorteo no está completo")
+    return codificar(grupo_de, slot_de, t)
+
+
+def decodificar(token, t=None):
+    """
+    (grupo_de, slot_de) de un token. Lanza ValueError si el token está mal formado, es de otra
+    tabla o reglas, o el sorteo que describe no cumple las reglas (las de `fijaciones.validar`:
+    un equipo de cada bombo por grupo, cabezas de serie en el slot 1, anfitriones y cupos de
+    confederación).
+    """
+    t = t or tabla()
+    largo = 3 + _bytes_posiciones(t)
+    if len(token) != (largo * 4 + 2) // 3 or not _TOKEN_VALIDO.match(token):
+        raise ValueError("Token con formato inválido")
+    crudo = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    if crudo[0] != FORMATO:
+        raise ValueError(f"Versión de token {crudo[0]} no soportada")
+    if int.from_bytes(crudo[1:3], 'big') != huella(t):
+        raise ValueError("El token es de otra tabla de equipos o de otra versión de las reglas")
+
+    valor = int.from_bytes(crudo[3:], 'little')
+    mascara = (1 << BITS_POR_EQUIPO) - 1
+    posiciones = [(valor >> (BITS_POR_EQUIPO * i)) & mascara for i in range(t.n_equipos)]
+    if len(set(posiciones)) != t.n_equipos or max(posiciones) >= len(GRUPOS) * SLOTS_POR_GRUPO:
+        raise ValueError("El token no describe un sorteo válido")
+    grupo_de = [p // SLOTS_POR_GRUPO for p in posiciones]
+    slot_de = [p % SLOTS_POR_GRUPO for p in posiciones]
+    motivo = fijaciones.validar(t, {i: (grupo_de[i], slot_de[i]) for i in range(t.n_equipos)})
+    if motivo:
+        raise ValueError(f"El token no describe un sorteo válido: {motivo}")
+    return grupo_de, slot_de
+
+
+# --- Página estática ---
+
+_ESTILO = """
+body { background-color: #d1d1d1; font-family: Roboto, Arial, sans-serif; margin: 0; }
+h1 { text-align: center; color: #6101eb; margin: 24px 0 8px; }
+p.nota { text-align: center; color: #555; margin: 0 0 16px; }
+.grilla { display: grid; grid-template-columns: repeat(4, 1fr); gap: 16px; max-width: 1400px; margin: 0 auto; padding: 16px; }
+.tarjeta { min-width: 150px; background-color: #f5f5f5; border-radius: 10px; padding: 10px; border: 2.5px solid #00c752; }
+.tarjeta h2 { font-size: 1.2em; color: #333; margin: 0 0 5px; }
+.slot { display: flex; align-items: center; padding: 4px 0; }
+.slot b.pos { min-width: 25px; margin-right: 6px; color: #555; }
+.slot img { width: 24px; margin-right: 8px; border-radius: 2px; box-shadow: 0 1px 2px rgba(0,0,0,0.2); }
+.slot small { color: #666; margin-left: 4px; }
+"""
+
+
+def renderizar(grupo_de, slot_de, banderas, t=None):
+    """HTML completo de la página de un sorteo (mismo aspecto que las tarjetas de la GUI)."""
+    t = t or tabla()
+    ocupantes = {(grupo_de[i], slot_de[i]): i for i in range(t.n_equipos)}
+    tarjetas = []
+    for g, letra in enumerate(GRUPOS):
+        filas = []
+        for s in range(SLOTS_POR_GRUPO):
+            i = ocupantes[(g, s)]
+            codigo = t.equipos[i]
+            conf = CONFEDERACIONES_ORDEN[t.conf[i]]
+            iso = banderas.get(codigo, '').lower()
+            bandera = f'<img src="https://flagcdn.com/h24/{iso}.png" alt="">' if iso else ''
+            filas.append(f'<div class="slot"><b class="pos">{letra}{s + 1}</b>{bandera}'
+                         f'<b>{html.escape(codigo)}</b><small>({conf})</small></div>')
+        tarjetas.append(f'<div class="tarjeta"><h2>Grupo {letra}</h2>{"".join(filas)}</div>')
+    return (
+        '<!DOCTYPE html><html lang="es"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f'<title>Sorteo FIFA 2026 compartido</title><style>{_ESTILO}</style></head><body>'
+        '<h1>Sorteo FIFA World Cup 2026™</h1>'
+        f'<p class="nota">Sorteo compartido (reglas {VERSION_REGLAS}) · <a href="/">Hacer mi propio sorteo</a></p>'
+        f'<div class="grilla">{"".join(tarjetas)}</div></body></html>'
+    )
+
+
+def instalar(app, banderas, ruta='/draw'):
+    """
+    Agrega `GET {ruta}/{token}` a la app. Devuelve la función cacheada que genera cada página
+    (para `metricas.registrar_cache`).
+    """
+    from fastapi import Header
+    from fastapi.responses import HTMLResponse, Response
+    import metricas
+
+    respuestas = metricas.Contador('permalinks_respuestas_total', "Respuestas de /draw por código HTTP", ('codigo',))
+
+    @lru_cache(maxsize=TAMANO_CACHE)
+    def pagina(token):
+        grupo_de, slot_de = decodificar(token)
+        return renderizar(grupo_de, slot_de, banderas), f'"p{VERSION_PAGINA}-{token}"'
+
+    @app.get(ruta + '/{token}', include_in_schema=False)
+    def sorteo_compartido(token: str, if_none_match: str = Header(None)):
+        try:
+            contenido, etag = pagina(token)
+        except ValueError as e:
+            respuestas.inc(codigo=404)
+            return HTMLResponse(f"<p>Enlace de sorteo inválido: {html.escape(str(e))}</p>", status_code=404)
+        cabeceras = {'ETag': etag, 'Cache-Control': f'public, max-age={MAX_AGE}'}
+        if if_none_match and etag in [e.strip() for e in if_none_match.split(',')]:
+            respuestas.inc(codigo=304)
+            return Response(status_code=304, headers=cabeceras)
+        respuestas.inc(codigo=200)
+        return HTMLResponse(contenido, headers=cabeceras)
+
+    return pagina
+
+
+def main():
+    import timeit
+
+    parser = argparse.ArgumentParser(description="Token de un sorteo y tiempo de decodificación")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    t = tabla()
+    grupo_de, slot_de = sorteo_rapido.sortear(t, random.Random(args.seed))
+    token = codificar(grupo_de, slot_de, t)
+    print(f"Token ({len(token)} caracteres): {token}")
+    print(f"Ruta: /draw/{token}")
+    assert decodificar(token, t) == (grupo_de, slot_de)
+
+    n = 20000
+    segundos = timeit.timeit(lambda: decodificar(token, t), number=n)
+    print(f"Decodificar: {segundos / n * 1e6:.1f} µs por token")
+    segundos = timeit.timeit(lambda: renderizar(grupo_de, slot_de, {}, t), number=200)
+    print(f"Renderizar HTML: {segundos / 200 * 1e3:.2f} ms por página (una vez por token)")
+
+
+if __name__ == "__main__":
+    main()
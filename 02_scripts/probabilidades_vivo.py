@@ -0,0 +1,169 @@
+"""
+Probabilidades condicionales en vivo a partir de un sorteo a medias.
+
+Durante un sorteo animado, después de cada bolita se estima para los equipos que faltan:
+- P(equipo cae en el grupo g | lo ya sorteado)
+- P(dos equipos comparten grupo | lo ya sorteado)
+
+La estimación completa el sorteo muchas veces desde el estado actual con `nucleo_sorteo` (mismo
+procedimiento FIFA que la animación; compilado con Numba si está instalado) durante un
+presupuesto de tiempo fijo, así que cada actualización tarda lo mismo sin importar en qué punto
+del sorteo se esté.
+La semilla sale del propio estado: el mismo estado da siempre la misma respuesta, y
+`CacheProbabilidades` la reutiliza entre sesiones (los primeros estados de todos los sorteos
+animados son iguales: anfitriones colocados, primeras cabezas de serie...).
+
+`estimar` es una función de módulo con argumentos simples para poder correr en el pool de
+procesos de NiceGUI (`run.cpu_bound`) sin bloquear el event loop.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/probabilidades_vivo.py --equipo ARG --presupuesto 0.15
+"""
+
+import time
+import zlib
+import random
+import argparse
+from functools import lru_cache
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+import sorteo_rapido
+from nucleo_sorteo import NucleoSorteo
+
+PRESUPUESTO = 0.12     # segundos de simulación por actualización
+MINIMO_SORTEOS = 64    # se simulan al menos estos aunque se pase el presupuesto
+MAXIMO_SORTEOS = 10000  # ±1% al 95% en el peor caso; más sorteos encarecen el post-proceso
+PRIMER_BLOQUE = 16     # sorteos del primer bloque; los siguientes se ajustan al tiempo restante
+TAMANO_CACHE = 512     # estados guardados en `CacheProbabilidades`
+
+Probabilidades = namedtuple('Probabilidades', ['grupo', 'rivales', 'n_sorteos', 'segundos', 'atascados'],
+                            defaults=(0,))
+Probabilidades.__doc__ = """
+grupo[i, g]: probabilidad de que el equipo i termine en el grupo g (índices de `TablaSorteo`).
+rivales[i, j]: probabilidad de que i y j terminen en el mismo grupo.
+atascados: sorteos descartados por quedarse sin grupo válido (solo con `permitir_atascos`).
+"""
+
+
+@lru_cache(maxsize=1)
+def tabla():
+    """`TablaSorteo` por proceso (en los workers del pool se construye una sola vez)."""
+    return sorteo_rapido.TablaSorteo()
+
+
+@lru_cache(maxsize=1)
+def nucleo():
+    return NucleoSorteo(tabla())
+
+
+def codificar(grupos_dict):
+    """Estado de un sorteo a medias como tupla `grupo * 4 + slot` por equipo (-1 sin grupo)."""
+    grupo_de, slot_de = sorteo_rapido.desde_grupos_dict(tabla(), grupos_dict)
+    return tuple(g * sorteo_rapido.SLOTS_POR_GRUPO + s if g >= 0 else -1 for g, s in zip(grupo_de, slot_de))
+
+
+def estimar(codificado, presupuesto=PRESUPUESTO, minimo=MINIMO_SORTEOS, maximo=MAXIMO_SORTEOS, permitir_atascos=False):
+    """
+    Completa el sorteo `codificado` tantas veces como quepan en `presupuesto` segundos.
+
+    Con `permitir_atascos` (estados con equipos fijados a mano, ver `fijaciones`) los sorteos
+    que se quedan sin grupo válido se descartan y se cuentan en `atascados`; si se descartan
+    todos, `grupo` y `rivales` son None.
+    """
+    t = tabla()
+    t0 = time.perf_counter()
+    grupo_de = [v // sorteo_rapido.SLOTS_POR_GRUPO if v >= 0 else -1 for v in codificado]
+    slot_de = [v % sorteo_rapido.SLOTS_POR_GRUPO if v >= 0 else -1 for v in codificado]
+    semilla = zlib.crc32(np.array(codificado, dtype=np.int8).tobytes())
+
+    bloques = []
+    n = 0
+    atascados = 0
+    if -1 not in grupo_de:
+        bloques.append(np.array(grupo_de)[:, None])  # sorteo terminado: no hay nada que estimar
+        n = 1
+    else:
+        tamano = PRIMER_BLOQUE
+        while n < maximo and (n + atascados < minimo or time.perf_counter() - t0 < presupuesto):
+            t_bloque = time.perf_counter()
+            #Cada bloque con su propia semilla: los sorteos k de bloques distintos no se repiten
+            lote = nucleo().completar_lote(grupo_de, slot_de, tamano, seed=semilla * 4096 + len(bloques),
+                                           permitir_atascos=permitir_atascos)
+            if permitir_atascos:
+                completos = lote[0] >= 0
+                atascados += tamano - int(completos.sum())
+                lote = lote[:, completos]
+            bloques.append(lote // sorteo_rapido.SLOTS_POR_GRUPO)
+            n += lote.shape[1]
+            por_sorteo = (time.perf_counter() - t_bloque) / tamano
+            restante = presupuesto - (time.perf_counter() - t0)
+            tamano = int(min(max(restante / por_sorteo, PRIMER_BLOQUE), maximo - n, 4 * tamano))
+            tamano = max(tamano, 1)
+    if n == 0:
+        return Probabilidades(None, None, 0, time.perf_counter() - t0, atascados)
+
+    #One-hot (grupo, equipo, sorteo): las marginales son medias y la co-ocurrencia un producto
+    #de matrices por grupo
+    G = np.concatenate(bloques, axis=1).astype(np.int64)
+    unos = np.zeros((t.n_grupos, t.n_equipos, n), dtype=np.float32)
+    np.put_along_axis(unos, G[None, :, :], 1.0, axis=0)
+    grupo = unos.mean(axis=2).T
+    rivales = np.matmul(unos, unos.transpose(0, 2, 1)).sum(axis=0) / n
+    np.fill_diagonal(rivales, 0.0)
+    return Probabilidades(grupo, rivales, n, time.perf_counter() - t0, atascados)
+
+
+class CacheProbabilidades:
+    """LRU de `Probabilidades` por estado codificado, compartida por todas las sesiones."""
+    def __init__(self, maximo=TAMANO_CACHE):
+        self.maximo = maximo
+        self._datos = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def get(self, codificado):
+        resultado = self._datos.get(codificado)
+        if resultado is None:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+            self._datos.move_to_end(codificado)
+        return resultado
+
+    def put(self, codificado, resultado):
+        self._datos[codificado] = resultado
+        self._datos.move_to_end(codificado)
+        while len(self._datos) > self.maximo:
+            self._datos.popitem(last=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probabilidades condicionales desde estados intermedios de un sorteo")
+    parser.add_argument('--equipo', default='ARG')
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    t = tabla()
+    equipo = args.equipo.upper()
+    i_eq = t.idx[equipo]
+    #Un sorteo de referencia, revelado equipo a equipo en el orden de los bombos
+    final_g, final_s = sorteo_rapido.sortear(t, random.Random(args.seed))
+    orden = [i for n in range(1, 5) for i in t.bombos[n]]
+    grupo_de, slot_de = [-1] * t.n_equipos, [-1] * t.n_equipos
+    print(f"{'colocados':>9} {'sorteos':>8} {'ms':>6}  P({equipo} en su grupo final)  rival más probable")
+    for k, i in enumerate(orden):
+        if k % 6 == 0:
+            codificado = tuple(g * sorteo_rapido.SLOTS_POR_GRUPO + s if g >= 0 else -1
+                               for g, s in zip(grupo_de, slot_de))
+            p = estimar(codificado, presupuesto=args.presupuesto)
+            j = int(np.argmax(p.rivales[i_eq]))
+            print(f"{k:>9} {p.n_sorteos:>8} {p.segundos * 1000:>6.0f}  {p.grupo[i_eq, final_g[i_eq]]:>24.3f}  "
+                  f"{t.equipos[j]} ({p.rivales[i_eq, j]:.3f})")
+        grupo_de[i], slot_de[i] = final_g[i], final_s[i]
+
+
+if __name__ == "__main__":
+    main()
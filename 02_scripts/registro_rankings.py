@@ -0,0 +1,269 @@
+"""
+Registro de snapshots del Power Ranking FIFA.
+
+Cada publicación del ranking se guarda en `01_datos_brutos` como `FIFA_PR_DD_MM_YYYY.csv`.
+Este módulo permite:
+- Cargar varios snapshots fechados y compararlos (diferencias de puntos).
+- Detectar qué fronteras entre bombos cambian de un snapshot a otro y qué equipos las cruzan.
+- Mantener una caché de agregados de sorteos (probabilidades por grupo y de rivales) por
+  escenario de repechaje, invalidando solo los escenarios cuya composición de bombos cambia.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/registro_rankings.py                 # compara los dos últimos snapshots
+    python 02_scripts/registro_rankings.py 19_11_2025 18_12_2025
+"""
+
+import os
+import re
+import sys
+import pickle
+import hashlib
+from datetime import datetime
+
+import pandas as pd
+
+from simular_bombos import (df_clasificados, asignar_bombos, cargar_power_ranking,
+                            escenarios_repechaje)
+from simular_sorteo_func import simular_sorteos
+
+DIRECTORIO_DATOS = '01_datos_brutos'
+DIRECTORIO_CACHE = '03_resultados/cache_agregados'
+PATRON_SNAPSHOT = re.compile(r'^FIFA_PR_(\d{2}_\d{2}_\d{4})\.csv$')
+
+#Fronteras entre bombos consecutivos: (1, 2), (2, 3), (3, 4)
+FRONTERAS = [(1, 2), (2, 3), (3, 4)]
+
+
+def firma_bombos(df_bombos):
+    """Firma hashable de la composición de los bombos (independiente del orden de las filas)."""
+    return tuple(
+        frozenset(df_bombos.loc[df_bombos['bombo'] == b, 'codigo'])
+        for b in range(1, 5)
+    )
+
+
+def fronteras_cambiadas(df_bombos_a, df_bombos_b):
+    """
+    Devuelve las fronteras (b, b+1) cuyo conjunto de equipos "por encima" cambia entre
+    dos asignaciones de bombos. Si una frontera no cambia, ningún equipo la cruza.
+    """
+    cambiadas = []
+    for b_sup, _ in FRONTERAS:
+        encima_a = set(df_bombos_a.loc[df_bombos_a['bombo'] <= b_sup, 'codigo'])
+        encima_b = set(df_bombos_b.loc[df_bombos_b['bombo'] <= b_sup, 'codigo'])
+        if encima_a != encima_b:
+            cambiadas.append((b_sup, b_sup + 1))
+    return cambiadas
+
+
+class RegistroRankings:
+    """
+    Registro de snapshots del ranking FIFA disponibles en disco.
+
+    Los CSV se cargan de forma perezosa y los bombos se calculan una sola vez por
+    (fecha, escenario). Para un snapshot nuevo, los bombos solo se recalculan si alguna
+    frontera cambia respecto al snapshot anterior; si no, se reutiliza la asignación previa
+    con los puntos actualizados.
+    """
+    def __init__(self, directorio=DIRECTORIO_DATOS):
+        self.directorio = directorio
+        self.rutas = {}
+        for archivo in os.listdir(directorio):
+            match = PATRON_SNAPSHOT.match(archivo)
+            if match:
+                fecha = datetime.strptime(match.group(1), '%d_%m_%Y').date()
+                self.rutas[fecha] = os.path.join(directorio, archivo)
+        self._rankings = {}
+        self._bombos = {}
+
+    @property
+    def fechas(self):
+        return sorted(self.rutas)
+
+    def _fecha(self, fecha):
+        #Acepta date, 'DD_MM_YYYY' o 'YYYY-MM-DD'
+        if isinstance(fecha, str):
+            formato = '%Y-%m-%d' if '-' in fecha else '%d_%m_%Y'
+            fecha = datetime.strptime(fecha, formato).date()
+        if fecha not in self.rutas:
+            raise KeyError(f"No hay snapshot del ranking para {fecha}")
+        return fecha
+
+    def ranking(self, fecha):
+        fecha = self._fecha(fecha)
+        if fecha not in self._rankings:
+            self._rankings[fecha] = cargar_power_ranking(self.rutas[fecha])
+        return self._rankings[fecha]
+
+    def diferencias(self, fecha_a, fecha_b):
+        """Equipos cuyo puntaje cambia entre dos snapshots."""
+        df_a = self.ranking(fecha_a)[['codigo', 'pais', 'ranking', 'puntos_totales']]
+        df_b = self.ranking(fecha_b)[['codigo', 'ranking', 'puntos_totales']]
+        df = pd.merge(df_a, df_b, on='codigo', how='outer', suffixes=('_a', '_b'))
+        df['delta'] = df['puntos_totales_b'] - df['puntos_totales_a']
+        sin_puntos = df['puntos_totales_a'].isna() & df['puntos_totales_b'].isna()
+        df = df[(df['delta'] != 0) & ~sin_puntos]
+        return df.sort_values(by='delta', key=abs, ascending=False).reset_index(drop=True)
+
+    def bombos(self, fecha, escenario):
+        """
+        Bombos para un snapshot y un escenario de repechaje (ganadores_uefa, ganadores_fifa).
+        """
+        fecha = self._fecha(fecha)
+        clave = (fecha, escenario)
+        if clave in self._bombos:
+            return self._bombos[clave]
+
+        df_ranking = self.ranking(fecha)
+
+        #Buscamos el snapshot anterior ya calculado para el mismo escenario
+        previas = [f for (f, e) in self._bombos if e == escenario and f < fecha]
+        df_previo = self._bombos[(max(previas), escenario)] if previas else None
+
+        if df_previo is not None and not self._cruza_fronteras(df_previo, df_ranking):
+            #Misma composición: solo actualizamos puntos
+            df_nuevo = df_previo.drop(columns=['puntos_totales']).merge(
+                df_ranking[['codigo', 'puntos_totales']], on='codigo', how='left'
+            )[df_previo.columns]
+        else:
+            ganadores_uefa, ganadores_fifa = escenario
+            df_nuevo = asignar_bombos(df_clasificados,
+                                      clasificados_uefa=list(ganadores_uefa),
+                                      clasificados_fifa=list(ganadores_fifa),
+                                      df_ranking=df_ranking)
+
+        self._bombos[clave] = df_nuevo
+        return df_nuevo
+
+    @staticmethod
+    def _cruza_fronteras(df_previo, df_ranking):
+        #Recalcula el orden de los clasificados (no anfitriones, no repechaje) y comprueba
+        #si el corte entre bombos sigue siendo el mismo conjunto de equipos
+        fijos = df_previo[(df_previo['anfitrion'] == 0) & (df_previo['repechaje'] == 0)]
+        puntos = fijos[['codigo', 'bombo']].merge(
+            df_ranking[['codigo', 'puntos_totales']], on='codigo', how='left'
+        ).sort_values(by='puntos_totales', ascending=False)
+        bombos_nuevos = sorted(puntos['bombo'])
+        return list(puntos['bombo']) != bombos_nuevos
+
+    def cruces_de_bombo(self, fecha_a, fecha_b, escenario=None):
+        """
+        Equipos que cambian de bombo entre dos snapshots.
+        Los ganadores de repechaje siempre van al bombo 4, así que basta un escenario.
+        """
+        if escenario is None:
+            escenario = next(escenarios_repechaje())
+        df_a = self.bombos(fecha_a, escenario)
+        df_b = self.bombos(fecha_b, escenario)
+        df = pd.merge(
+            df_a[['codigo', 'pais', 'bombo', 'puntos_totales']],
+            df_b[['codigo', 'bombo', 'puntos_totales']],
+            on='codigo', suffixes=('_a', '_b')
+        )
+        return df[df['bombo_a'] != df['bombo_b']].reset_index(drop=True)
+
+
+class CacheAgregados:
+    """
+    Caché en disco de agregados de sorteos por escenario de repechaje y semilla.
+
+    Cada entrada guarda la firma de bombos con la que se calculó. Al pasar a un snapshot
+    nuevo solo se invalidan los escenarios cuya firma cambia; el resto se reutiliza tal cual.
+    En disco hay un archivo por entrada (`<hash de escenario y semilla>.pkl`): un miss escribe
+    solo su entrada y una invalidación borra solo las afectadas.
+    """
+    def __init__(self, registro, directorio=DIRECTORIO_CACHE, n_sorteos=1000, seed=0):
+        self.registro = registro
+        self.directorio = directorio
+        self.n_sorteos = n_sorteos
+        self.seed = seed
+        self.entradas = {}
+        self.hits = 0
+        self.misses = 0
+        if directorio and os.path.isdir(directorio):
+            for nombre in os.listdir(directorio):
+                if not nombre.endswith('.pkl') or nombre == 'indice.pkl':  # indice.pkl: formato anterior
+                    continue
+                with open(os.path.join(directorio, nombre), 'rb') as f:
+                    entrada = pickle.load(f)
+                self.entradas[(entrada['escenario'], entrada['seed'])] = entrada
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, hashlib.sha1(repr(clave).encode()).hexdigest()[:16] + '.pkl')
+
+    def _guardar(self, clave):
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+            with open(self._ruta(clave), 'wb') as f:
+                pickle.dump(self.entradas[clave], f)
+
+    def _borrar(self, clave):
+        del self.entradas[clave]
+        if self.directorio and os.path.exists(self._ruta(clave)):
+            os.remove(self._ruta(clave))
+
+    def obtener(self, fecha, escenario):
+        df_bombos = self.registro.bombos(fecha, escenario)
+        firma = firma_bombos(df_bombos)
+
+        clave = (escenario, self.seed)
+        entrada = self.entradas.get(clave)
+        if entrada is not None and entrada['firma'] == firma \
+                and entrada['n_sorteos'] >= self.n_sorteos:
+            self.hits += 1
+            return entrada['agregados']
+
+        self.misses += 1
+        agregados = simular_sorteos(df_bombos, self.n_sorteos, seed=self.seed)
+        self.entradas[clave] = {'escenario': escenario, 'seed': self.seed, 'firma': firma,
+                                'n_sorteos': self.n_sorteos, 'agregados': agregados}
+        self._guardar(clave)
+        return agregados
+
+    def invalidar_afectados(self, fecha_nueva):
+        """
+        Elimina los agregados (de todas las semillas) de los escenarios cuya composición de
+        bombos cambia con el snapshot `fecha_nueva`. Devuelve la lista de escenarios invalidados.
+        """
+        invalidados = []
+        firmas = {}
+        for clave, entrada in list(self.entradas.items()):
+            escenario = entrada['escenario']
+            if escenario not in firmas:
+                firmas[escenario] = firma_bombos(self.registro.bombos(fecha_nueva, escenario))
+            if firmas[escenario] != entrada['firma']:
+                self._borrar(clave)
+                if escenario not in invalidados:
+                    invalidados.append(escenario)
+        return invalidados
+
+
+def main():
+    registro = RegistroRankings()
+    fechas = registro.fechas
+    if len(sys.argv) >= 3:
+        fecha_a, fecha_b = sys.argv[1], sys.argv[2]
+    elif len(fechas) >= 2:
+        fecha_a, fecha_b = fechas[-2], fechas[-1]
+    else:
+        print(f"Solo hay {len(fechas)} snapshot(s) en {registro.directorio}. Nada que comparar.")
+        return
+
+    print(f"--- Diferencias de puntos {fecha_a} → {fecha_b} ---")
+    print(registro.diferencias(fecha_a, fecha_b).head(20))
+
+    escenario = next(escenarios_repechaje())
+    df_a = registro.bombos(fecha_a, escenario)
+    df_b = registro.bombos(fecha_b, escenario)
+    cambiadas = fronteras_cambiadas(df_a, df_b)
+    print(f"\n--- Fronteras de bombo que cambian: {cambiadas or 'ninguna'} ---")
+
+    cruces = registro.cruces_de_bombo(fecha_a, fecha_b, escenario)
+    if cruces.empty:
+        print("Ningún equipo cambia de bombo. Los agregados en caché siguen siendo válidos.")
+    else:
+        print(cruces)
+
+
+if __name__ == "__main__":
+    main()
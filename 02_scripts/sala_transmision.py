@@ -0,0 +1,187 @@
+"""
+Sala de transmisión ("watch party"): un único sorteo en el servidor visto por muchos clientes.
+
+El anfitrión inicia, pausa y regula la velocidad del sorteo. Cada evento de
+`simular_sorteo_func` (bolita sorteada, grupo rechazado, equipo colocado...) se calcula una sola
+vez y se reparte a la cola de cada espectador. El solver no corre por espectador, así que cada
+espectador extra solo cuesta actualizar sus propios elementos de UI.
+
+Clientes lentos: la cola de cada espectador es acotada. Si se llena, en lugar de acumular
+atrasos se vacía y se deja una marca `INSTANTANEA`; el espectador vuelve a pintar el estado
+actual completo de la sala (que ya incluye todo lo que se saltó) y sigue con los eventos nuevos.
+Los espectadores que llegan a mitad de sorteo empiezan también con una instantánea.
+
+El sorteo corre en el event loop del servidor, así que usa el lookahead acotado
+(`factibilidad_acotada.ComprobadorAcotado`, con la caché que se le pase) como el sorteo animado
+de la GUI: con el lookahead sin cota una bolita lenta congelaría a todos los clientes.
+
+Anfitrión: `instalar(app)` agrega `POST /sala/anfitrion`, que recibe el token WC_ADMIN_TOKEN
+(cabecera X-Admin-Token, como `/admin/perfil`, o campo `clave` de un formulario) y deja una
+cookie HttpOnly con un HMAC del token. El token nunca va en la URL (logs de acceso, historial,
+Referer); la página de la sala muestra los controles si la cookie es válida (`es_anfitrion`).
+"""
+
+import os
+import hmac
+import asyncio
+
+from simular_sorteo_func import (esqueleto_sorteo, eventos_bombo_1, eventos_bombo_n,
+                                 InicioBombo, BolaSorteada, GrupoRechazado, EquipoColocado)
+from factibilidad_acotada import ComprobadorAcotado
+from formato_torneo import WC2026
+import perfilador
+
+#Marca en la cola de un espectador: pintar el estado completo de la sala
+INSTANTANEA = 'instantanea'
+CAPACIDAD_COLA = 32
+#Segundos entre eventos a velocidad 1.0 (equivalentes a las pausas de la animación individual)
+PAUSAS = {InicioBombo: 0.7, BolaSorteada: 0.7, GrupoRechazado: 0.3, EquipoColocado: 0.85}
+COOKIE_ANFITRION = 'sala_anfitrion'
+
+
+class Espectador:
+    """Cola acotada de eventos de un cliente suscrito a la sala."""
+    __slots__ = ('cola', 'descartados')
+
+    def __init__(self, capacidad=CAPACIDAD_COLA):
+        self.cola = asyncio.Queue(capacidad)
+        self.descartados = 0
+
+    def entregar(self, evento):
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: se descarta su atraso y recibirá el estado completo
+            while not self.cola.empty():
+                self.cola.get_nowait()
+                self.descartados += 1
+            self.cola.put_nowait(INSTANTANEA)
+
+
+class SalaTransmision:
+    """Estado compartido de un sorteo transmitido y reparto de sus eventos."""
+    def __init__(self, df_bombos, capacidad=CAPACIDAD_COLA, cache_factibilidad=None, formato=WC2026):
+        self.df_bombos = df_bombos
+        self.capacidad = capacidad
+        self.cache_factibilidad = cache_factibilidad
+        self.formato = formato
+        self.espectadores = set()
+        self.velocidad = 1.0  # multiplicador de las pausas (menor = más rápido)
+        self.no_pausada = asyncio.Event()
+        self.no_pausada.set()
+        self.tarea = None
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.grupos_dict, self.asignaciones, self.bombos_slots = esqueleto_sorteo(self.formato)
+        self.current_bombo = None
+        self.current_team = None
+        self.finalizado = False
+        self.error = None
+        self.eventos_emitidos = 0
+
+    @property
+    def en_curso(self):
+        return self.tarea is not None and not self.tarea.done()
+
+    @property
+    def pausada(self):
+        return not self.no_pausada.is_set()
+
+    # --- Espectadores ---
+
+    def suscribir(self):
+        espectador = Espectador(self.capacidad)
+        espectador.entregar(INSTANTANEA)
+        self.espectadores.add(espectador)
+        return espectador
+
+    def desuscribir(self, espectador):
+        self.espectadores.discard(espectador)
+
+    def publicar(self, evento):
+        self.eventos_emitidos += 1
+        for espectador in self.espectadores:
+            espectador.entregar(evento)
+
+    # --- Control del anfitrión ---
+
+    def iniciar(self):
+        """Arranca un sorteo nuevo si no hay uno en curso. Devuelve False si ya había uno."""
+        if self.en_curso:
+            return False
+        self.reiniciar()
+        self.no_pausada.set()
+        self.publicar(INSTANTANEA)
+        self.tarea = asyncio.get_running_loop().create_task(self._transmitir())
+        return True
+
+    def alternar_pausa(self):
+        if self.pausada:
+            self.no_pausada.set()
+        else:
+            self.no_pausada.clear()
+
+    def _eventos(self):
+        yield from eventos_bombo_1(self.df_bombos, self.grupos_dict, self.asignaciones, self.bombos_slots,
+                                   formato=self.formato)
+        factibilidad = ComprobadorAcotado(self.cache_factibilidad)
+        for n in range(2, self.formato.n_bombos + 1):
+            yield from eventos_bombo_n(n, self.df_bombos, self.bombos_slots, self.grupos_dict, self.asignaciones,
+                                       factibilidad=factibilidad, formato=self.formato)
+
+    async def _transmitir(self):
+        try:
+            for evento in self._eventos():
+                if isinstance(evento, InicioBombo):
+                    self.current_bombo = evento.bombo
+                    self.current_team = None
+                elif isinstance(evento, BolaSorteada):
+                    self.current_team = evento.equipo
+                self.publicar(evento)
+                await asyncio.sleep(PAUSAS[type(evento)] * self.velocidad)
+                await self.no_pausada.wait()
+            self.finalizado = True
+        except ValueError as e:
+            self.error = str(e)
+        finally:
+            self.current_bombo = None
+            self.current_team = None
+            self.publicar(INSTANTANEA)
+
+
+# --- Anfitrión ---
+
+def sello_anfitrion(token=None):
+    """Valor de la cookie del anfitrión: HMAC de WC_ADMIN_TOKEN (None si no hay token configurado)."""
+    token = os.getenv('WC_ADMIN_TOKEN') if token is None else token
+    if not token:
+        return None
+    return hmac.new(token.encode(), COOKIE_ANFITRION.encode(), 'sha256').hexdigest()
+
+
+def es_anfitrion(cookie):
+    """Si la cookie de la sala corresponde al WC_ADMIN_TOKEN actual (comparación en tiempo constante)."""
+    esperado = sello_anfitrion()
+    return bool(esperado) and cookie is not None and hmac.compare_digest(cookie, esperado)
+
+
+def instalar(app, ruta='/sala/anfitrion', ruta_sala='/sala'):
+    """Agrega `POST {ruta}`: valida el token y redirige a la sala con la cookie del anfitrión."""
+    from fastapi import Form, Header, HTTPException, Request
+    from fastapi.responses import RedirectResponse
+
+    @app.post(ruta, include_in_schema=False)
+    async def entrar(request: Request, clave: str = Form(None), x_admin_token: str = Header(None)):
+        #Sin token configurado no hay anfitrión; con token incorrecto, 403
+        if not os.getenv('WC_ADMIN_TOKEN'):
+            raise HTTPException(status_code=404)
+        if not perfilador.token_valido(x_admin_token or clave):
+            raise HTTPException(status_code=403, detail="Token de administrador inválido")
+        respuesta = RedirectResponse(ruta_sala, status_code=303)
+        https = request.headers.get('x-forwarded-proto', request.url.scheme) == 'https'
+        respuesta.set_cookie(COOKIE_ANFITRION, sello_anfitrion(), path=ruta_sala,
+                             httponly=True, samesite='strict', secure=https)
+        return respuesta
+
+    return entrar
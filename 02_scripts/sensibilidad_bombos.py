@@ -0,0 +1,148 @@
+"""
+Análisis de sensibilidad de los bombos frente a cambios en el ranking FIFA.
+
+Responde preguntas del tipo "si ARG gana 10 puntos, ¿cómo cambian sus probabilidades de grupo?":
+1. Perturba los puntos de los equipos elegidos (uno a la vez) con cada delta del barrido.
+2. Recalcula los bombos con `asignar_bombos`.
+3. Re-estima las probabilidades con el motor de sorteo usando números aleatorios comunes:
+   el sorteo i de cada paso usa la misma semilla, así las diferencias entre pasos tienen
+   poca varianza.
+
+Los agregados se cachean por composición de bombos: los pasos que no mueven a ningún equipo
+de bombo reutilizan el resultado del paso base sin volver a sortear.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/sensibilidad_bombos.py ARG NOR --deltas -50 -25 0 25 50 --sorteos 500
+"""
+
+import argparse
+
+import pandas as pd
+
+from simular_bombos import (df_clasificados, df_bombos, df_power_ranking, asignar_bombos,
+                            escenario_de)
+from simular_sorteo_func import simular_sorteos
+from registro_rankings import firma_bombos
+
+
+def perturbar_ranking(df_ranking, equipo, delta):
+    df = df_ranking.copy()
+    df.loc[df['codigo'] == equipo, 'puntos_totales'] += delta
+    return df
+
+
+def _orden_canonico(df_bombos):
+    #Orden fijo dentro de cada bombo: si un paso solo intercambia un par de equipos entre
+    #bombos, el resto de bolitas conserva su posición y los números aleatorios comunes
+    #siguen acoplando los sorteos
+    return df_bombos.sort_values(by=['bombo', 'codigo']).reset_index(drop=True)
+
+
+def analisis_sensibilidad(equipos, deltas, n_sorteos=1000, seed=0,
+                          escenario=None, df_ranking=None):
+    """
+    Barrido de perturbaciones de puntos.
+
+    Args:
+        equipos (list): Códigos de los equipos a perturbar (uno a la vez).
+        deltas (list): Puntos a sumar en cada paso (incluir 0 para la referencia).
+        n_sorteos (int): Sorteos por paso.
+        seed (int): Semilla base compartida por todos los pasos.
+        escenario (tuple): Ganadores de repechaje (uefa, fifa). Por defecto los de df_bombos.
+        df_ranking (DataFrame): Snapshot de ranking base. Por defecto el cargado en simular_bombos.
+
+    Returns:
+        DataFrame en formato largo con una fila por (equipo, delta, tipo, objetivo):
+        tipo 'grupo' (objetivo A-L) o 'rival' (objetivo = código del rival). Los ganadores de
+        repechaje (columna `repechaje`) quedan en el bombo 4 con cualquier delta.
+
+    Raises:
+        ValueError: si algún equipo no está en los bombos del escenario.
+    """
+    if escenario is None:
+        escenario = escenario_de(df_bombos)
+    if df_ranking is None:
+        df_ranking = df_power_ranking
+    ganadores_uefa, ganadores_fifa = escenario
+
+    cache = {}
+
+    def agregados_para(df_rank):
+        df_b = asignar_bombos(df_clasificados,
+                              clasificados_uefa=list(ganadores_uefa),
+                              clasificados_fifa=list(ganadores_fifa),
+                              df_ranking=df_rank)
+        firma = firma_bombos(df_b)
+        if firma not in cache:
+            cache[firma] = simular_sorteos(_orden_canonico(df_b), n_sorteos, seed=seed)
+        return df_b, cache[firma]
+
+    df_base, base = agregados_para(df_ranking)
+    desconocidos = [eq for eq in equipos if eq not in set(df_base['codigo'])]
+    if desconocidos:
+        raise ValueError(f"Equipos que no están en los bombos de este escenario: {', '.join(desconocidos)}")
+
+    filas = []
+    for equipo in equipos:
+        for delta in deltas:
+            df_b, agregados = agregados_para(perturbar_ranking(df_ranking, equipo, delta))
+            fila_eq = df_b[df_b['codigo'] == equipo].iloc[0]
+            comunes = {
+                'equipo': equipo,
+                'delta': delta,
+                'puntos_totales': fila_eq['puntos_totales'],
+                'bombo': fila_eq['bombo'],
+                'repechaje': fila_eq['repechaje'],
+            }
+
+            for grupo, prob in agregados['grupos'].loc[equipo].items():
+                filas.append({**comunes, 'tipo': 'grupo', 'objetivo': grupo,
+                              'probabilidad': prob,
+                              'diferencia': prob - base['grupos'].loc[equipo, grupo]})
+
+            for rival, prob in agregados['rivales'].loc[equipo].items():
+                prob_base = base['rivales'].loc[equipo].get(rival, 0.0)
+                if prob == 0 and prob_base == 0:
+                    continue
+                filas.append({**comunes, 'tipo': 'rival', 'objetivo': rival,
+                              'probabilidad': prob,
+                              'diferencia': prob - prob_base})
+
+    df = pd.DataFrame(filas)
+    df.attrs['sorteos_ejecutados'] = len(cache) * n_sorteos
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensibilidad de bombos y grupos ante cambios de puntos FIFA")
+    parser.add_argument('equipos', nargs='+', help="Códigos FIFA de los equipos a perturbar")
+    parser.add_argument('--deltas', nargs='+', type=float, default=[-50, -25, 0, 25, 50])
+    parser.add_argument('--sorteos', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Ruta CSV donde guardar la tabla completa")
+    args = parser.parse_args()
+
+    try:
+        df = analisis_sensibilidad([eq.upper() for eq in args.equipos], args.deltas,
+                                   n_sorteos=args.sorteos, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.output:
+        df.to_csv(args.output, index=False)
+
+    for (equipo, delta), paso in df[df['tipo'] == 'grupo'].groupby(['equipo', 'delta']):
+        #Los ganadores de repechaje van al bombo 4 sin importar sus puntos
+        nota = ', ganador de repechaje' if paso['repechaje'].iloc[0] else ''
+        print(f"\n--- {equipo} {delta:+g} pts ({paso['puntos_totales'].iloc[0]:.2f} pts, "
+              f"bombo {paso['bombo'].iloc[0]}{nota}) ---")
+        print(paso[['objetivo', 'probabilidad', 'diferencia']]
+              .rename(columns={'objetivo': 'grupo'})
+              .round(3).to_string(index=False))
+
+    print(f"\nSorteos ejecutados: {df.attrs['sorteos_ejecutados']} "
+          f"(los pasos sin cambio de bombo reutilizan la caché)")
+
+
+if __name__ == "__main__":
+    main()
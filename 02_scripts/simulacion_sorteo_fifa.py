@@ -1,21 +1,11 @@
 import pandas as pd
 from simular_bombos import df_bombos  
-from simular_sorteo_func import sortear_bombo_1, sortear_bombo_n
+from simular_sorteo_func import eventos_mundial, consumir, imprimir_evento
 
 
 def main():
-    # --- BOMBO 1 ---
-    grupos_dict, asignaciones_sorteo, bombos_slots = sortear_bombo_1(df_bombos)
-
-    # --- BOMBOS 2, 3, 4 ---
-    for n_bombo in range(2, 5):  # bombos 2, 3, 4
-        grupos_dict, asignaciones_sorteo, bombos_slots = sortear_bombo_n(
-            n_bombo,
-            df_bombos,
-            bombos_slots,
-            grupos_dict,
-            asignaciones_sorteo
-        )
+    # --- BOMBOS 1, 2, 3, 4 (imprimiendo cada evento del sorteo) ---
+    grupos_dict, asignaciones_sorteo = consumir(eventos_mundial(df_bombos), imprimir_evento)
 
     # --- Crear tabla final ---
     filas = []
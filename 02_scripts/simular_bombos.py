@@ -1,6 +1,9 @@
+import functools
+import itertools
 import pandas as pd
 import numpy as np
 
+from formato_torneo import WC2026
 
 #Importamos lista de selecciones clasificadas y dejamos slots para las de repechaje
 
@@ -15,31 +18,166 @@ df_repechaje_fifa = pd.read_excel('01_datos_brutos/Clasificados_WC_26.xlsx',
 
 #Cargamos Power Ranking FIFA
 
-df_power_ranking = pd.read_csv('01_datos_brutos/FIFA_PR_19_11_2025.csv').drop(columns=['Unnamed: 7'])
+def cargar_power_ranking(ruta):
+    # El CSV exportado de la FIFA trae una columna vacía al final ('Unnamed: 7')
+    df = pd.read_csv(ruta)
+    df = df.drop(columns=[c for c in df.columns if c.startswith('Unnamed')])
+    # Algunas filas vienen mal delimitadas (ej: "Hong Kong, China") y convierten la columna
+    # en texto; forzamos numérico para que el orden por puntos no sea lexicográfico
+    df['puntos_totales'] = pd.to_numeric(df['puntos_totales'], errors='coerce')
+    # El scrapeo repite algunos equipos al final de la tabla; nos quedamos con la primera fila
+    return df.drop_duplicates(subset='codigo', keep='first').reset_index(drop=True)
+
+RUTA_POWER_RANKING = '01_datos_brutos/FIFA_PR_19_11_2025.csv'
+
+df_power_ranking = cargar_power_ranking(RUTA_POWER_RANKING)
+
+CONFEDERACIONES_ORDEN = ['AFC', 'CAF', 'CONCACAF', 'CONMEBOL', 'OFC', 'UEFA']
+
+#Confederación de todas las selecciones posibles (clasificadas + repechajes).
+#Permite consultar la confederación de un equipo sin depender de un df_bombos concreto.
+CONFEDERACIONES = dict(zip(
+    pd.concat([df_clasificados['codigo'], df_repechaje_uefa['codigo'], df_repechaje_fifa['codigo']]),
+    pd.concat([df_clasificados['confederacion'], df_repechaje_uefa['confederacion'], df_repechaje_fifa['confederacion']])
+))
+
+#Modelo de partidos de repechaje
+#Cada llave se juega como cuadro de eliminación sembrado por puntos de ranking: con 4 equipos
+#1 vs 4 y 2 vs 3 en semifinales y final entre ganadores; con 3, el mejor pasa directo a la final
+#(como el repechaje intercontinental). La probabilidad de ganar un partido es el resultado
+#esperado del ranking FIFA: 1 / (1 + 10^(-(pA - pB) / ESCALA_RANKING)). Un equipo sin puntos en
+#el ranking juega con el mínimo del ranking.
+
+ESCALA_RANKING = 600
+
+def prob_victoria(puntos_a, puntos_b, escala=ESCALA_RANKING):
+    return 1 / (1 + 10 ** (-(np.asarray(puntos_a) - np.asarray(puntos_b)) / escala))
+
+
+def _orden_cuadro(tamano):
+    #Semillas (1 = mejor) por posición en el cuadro: [1, 4, 2, 3] para 4, con byes > n equipos
+    orden = [1]
+    while len(orden) < tamano:
+        m = 2 * len(orden) + 1
+        orden = [x for s in orden for x in (s, m - s)]
+    return orden
+
+
+class LlavesRepechaje:
+    """
+    Llaves de un repechaje (columnas `codigo` y `llave`) con los puntos de ranking de sus equipos.
+    Los ganadores se dan como posición del equipo dentro de su llave, en el orden de
+    `escenarios_repechaje`.
+    """
+    def __init__(self, df, df_ranking=None):
+        if df_ranking is None:
+            df_ranking = df_power_ranking
+        puntos = dict(zip(df_ranking['codigo'], df_ranking['puntos_totales']))
+        minimo = df_ranking['puntos_totales'].min()
+        self.llaves = [list(g['codigo']) for _, g in df.groupby('llave')]
+        self.puntos = [np.array([puntos.get(eq, np.nan) for eq in llave], dtype=float) for llave in self.llaves]
+        self.puntos = [np.where(np.isnan(p), minimo, p) for p in self.puntos]
+        #Posición en la llave de cada lugar del cuadro (-1: bye)
+        self.cuadros = []
+        for p in self.puntos:
+            por_semilla = np.argsort(-p, kind='stable')
+            tamano = 1 << (len(p) - 1).bit_length()
+            self.cuadros.append(np.array([por_semilla[s - 1] if s <= len(p) else -1
+                                          for s in _orden_cuadro(tamano)], dtype=np.int64))
+
+    def simular(self, n, rng=None):
+        """
+        Juega las llaves en `n` sorteos a la vez: matriz (n, llaves) con la posición del
+        ganador en su llave. Un partido es una comparación de `n` uniformes para todo el lote.
+        """
+        rng = np.random.default_rng(rng)
+        ganadores = np.empty((n, len(self.llaves)), dtype=np.int64)
+        for k, (puntos, cuadro) in enumerate(zip(self.puntos, self.cuadros)):
+            vivos = np.repeat(cuadro[:, None], n, axis=1)
+            while len(vivos) > 1:
+                a, b = vivos[0::2], vivos[1::2]
+                p = prob_victoria(puntos[a], puntos[b])
+                gana_a = (b < 0) | ((a >= 0) & (rng.random(a.shape) < p))
+                vivos = np.where(gana_a, a, b)
+            ganadores[:, k] = vivos[0]
+        return ganadores
+
+    def ganadores(self, n, rng=None):
+        """Códigos de los ganadores, matriz (n, llaves)."""
+        posiciones = self.simular(n, rng)
+        return np.stack([np.array(llave, dtype=object)[posiciones[:, k]]
+                         for k, llave in enumerate(self.llaves)], axis=1)
+
+    def probabilidades(self):
+        """Probabilidad exacta de que cada equipo gane su llave: un array por llave."""
+        resultado = []
+        for puntos, cuadro in zip(self.puntos, self.cuadros):
+            #Distribución del ganador de cada lugar del cuadro sobre los equipos de la llave
+            vivos = [np.eye(len(puntos))[i] if i >= 0 else np.zeros(len(puntos)) for i in cuadro]
+            gana = prob_victoria(puntos[:, None], puntos[None, :])
+            while len(vivos) > 1:
+                siguiente = []
+                for a, b in zip(vivos[0::2], vivos[1::2]):
+                    if not b.any() or not a.any():
+                        siguiente.append(a + b)
+                    else:
+                        siguiente.append(a * (gana @ b) + b * (gana @ a))
+                vivos = siguiente
+            resultado.append(vivos[0])
+        return resultado
+
+
+def probabilidades_escenarios(df_ranking=None, modelo='ranking'):
+    """Probabilidad de cada escenario de repechaje, en el orden de `escenarios_repechaje`."""
+    por_llave = []
+    for df in (df_repechaje_uefa, df_repechaje_fifa):
+        llaves = LlavesRepechaje(df, df_ranking)
+        if modelo == 'uniforme':
+            por_llave += [np.full(len(llave), 1 / len(llave)) for llave in llaves.llaves]
+        else:
+            por_llave += llaves.probabilidades()
+    return functools.reduce(np.multiply.outer, por_llave).ravel()
+
 
 #Generamos los repechajes
 
-def generar_repechaje_uefa(df, random_state=None):
-    ganadores = df.groupby('llave', group_keys=False).sample(1, random_state=random_state)
+def _generador(random_state):
+    #Generator de numpy para el modelo 'ranking' con la misma semántica de random_state que
+    #pandas.sample: None usa el estado global de np.random (respeta np.random.seed)
+    if random_state is None:
+        return np.random.default_rng(np.random.randint(2**31 - 1))
+    if isinstance(random_state, np.random.RandomState):
+        return np.random.default_rng(random_state.randint(2**31 - 1))
+    return np.random.default_rng(random_state)
+
+
+def _generar_repechaje(df, random_state, df_ranking, modelo):
+    if df_ranking is None:
+        df_ranking = df_power_ranking
+
+    if modelo == 'uniforme':
+        ganadores = df.groupby('llave', group_keys=False).sample(1, random_state=random_state)
+    elif modelo == 'ranking':
+        llaves = LlavesRepechaje(df, df_ranking)
+        codigos = llaves.ganadores(1, _generador(random_state))[0]
+        ganadores = df.set_index('codigo').loc[codigos].reset_index()[df.columns]
+    else:
+        raise ValueError(f"Modelo de repechaje desconocido: {modelo} (hay 'ranking' y 'uniforme')")
 
     ganadores = pd.merge(ganadores, 
-                         df_power_ranking[['codigo', 'puntos_totales']], 
+                         df_ranking[['codigo', 'puntos_totales']], 
                          on='codigo', 
                          how='left')
-    
-    return ganadores  # devuelve todas las columnas
 
+    return ganadores  # devuelve todas las columnas
 
-def generar_repechaje_fifa(df, random_state = None):
 
-    ganadores = df.groupby('llave').sample(1, random_state = random_state)
+def generar_repechaje_uefa(df, random_state=None, df_ranking=None, modelo='uniforme'):
+    return _generar_repechaje(df, random_state, df_ranking, modelo)
 
-    ganadores = pd.merge(ganadores, 
-                         df_power_ranking[['codigo', 'puntos_totales']], 
-                         on='codigo', 
-                         how='left')
 
-    return ganadores
+def generar_repechaje_fifa(df, random_state = None, df_ranking = None, modelo = 'uniforme'):
+    return _generar_repechaje(df, random_state, df_ranking, modelo)
 
 
 #Simulamos bombos
@@ -47,32 +185,40 @@ def generar_repechaje_fifa(df, random_state = None):
 def asignar_bombos(df_clasificados, 
                    clasificados_uefa = None,
                    clasificados_fifa = None,
-                   random_state = None):
+                   random_state = None,
+                   df_ranking = None,
+                   formato = WC2026,
+                   modelo_repechaje = 'uniforme'):
+    # Snapshot del ranking (por defecto el cargado arriba)
+    if df_ranking is None:
+        df_ranking = df_power_ranking
+
     # Merge
-    df_merged = pd.merge(df_clasificados, df_power_ranking[['codigo', 'puntos_totales']],
+    df_merged = pd.merge(df_clasificados, df_ranking[['codigo', 'puntos_totales']],
                           on='codigo', 
                           how='left')
     df_sorted = df_merged.sort_values(by='puntos_totales', ascending=False).reset_index(drop=True)
 
-    # Bombo 1: anfitriones + mejores restantes hasta 12
-    anfitriones=['MEX','USA','CAN']
+    # Bombo 1: anfitriones + mejores restantes hasta completar un equipo por grupo
+    por_bombo = formato.n_grupos
+    anfitriones = list(formato.anfitriones)
     bombo1 = df_sorted[df_sorted['codigo'].isin(anfitriones)].copy()
     restantes = df_sorted[~df_sorted['codigo'].isin(anfitriones)]
-    bombo1 = pd.concat([bombo1, restantes.head(12 - len(bombo1))])
+    bombo1 = pd.concat([bombo1, restantes.head(por_bombo - len(bombo1))])
     bombo1['bombo'] = 1
 
     # Actualizamos restantes
-    restantes = restantes.drop(restantes.head(9).index)
+    restantes = restantes.drop(restantes.head(por_bombo - len(anfitriones)).index)
 
     # Bombo 2
-    bombo2 = restantes.head(12).copy()
+    bombo2 = restantes.head(por_bombo).copy()
     bombo2['bombo'] = 2
-    restantes = restantes.drop(restantes.head(12).index)
+    restantes = restantes.drop(restantes.head(por_bombo).index)
 
     # Bombo 3
-    bombo3 = restantes.head(12).copy()
+    bombo3 = restantes.head(por_bombo).copy()
     bombo3['bombo'] = 3
-    restantes = restantes.drop(restantes.head(12).index)
+    restantes = restantes.drop(restantes.head(por_bombo).index)
 
     # Bombo 4 inicial
     bombo4 = restantes.copy()
@@ -81,21 +227,25 @@ def asignar_bombos(df_clasificados,
 
     # Ganadores de repechaje UEFA
     if clasificados_uefa is None:
-        ganadores_uefa = generar_repechaje_uefa(df_repechaje_uefa, random_state=random_state)
+        ganadores_uefa = generar_repechaje_uefa(df_repechaje_uefa, random_state=random_state,
+                                                df_ranking=df_ranking, modelo=modelo_repechaje)
         ganadores_uefa['repechaje'] = 1
         ganadores_uefa['anfitrion'] = 0
     else:
-        ganadores_uefa = df_repechaje_uefa[df_repechaje_uefa['codigo'].isin(clasificados_uefa)].copy()
+        ganadores_uefa = pd.merge(df_repechaje_uefa[df_repechaje_uefa['codigo'].isin(clasificados_uefa)],
+                                  df_ranking[['codigo', 'puntos_totales']], on='codigo', how='left')
         ganadores_uefa['repechaje'] = 1
         ganadores_uefa['anfitrion'] = 0
 
     # Ganadores de repechaje FIFA
     if clasificados_fifa is None:
-        ganadores_fifa = generar_repechaje_fifa(df_repechaje_fifa, random_state=random_state)
+        ganadores_fifa = generar_repechaje_fifa(df_repechaje_fifa, random_state=random_state,
+                                                df_ranking=df_ranking, modelo=modelo_repechaje)
         ganadores_fifa['repechaje'] = 1
         ganadores_fifa['anfitrion'] = 0
     else:
-        ganadores_fifa = df_repechaje_fifa[df_repechaje_fifa['codigo'].isin(clasificados_fifa)].copy()
+        ganadores_fifa = pd.merge(df_repechaje_fifa[df_repechaje_fifa['codigo'].isin(clasificados_fifa)],
+                                  df_ranking[['codigo', 'puntos_totales']], on='codigo', how='left')
         ganadores_fifa['repechaje'] = 1
         ganadores_fifa['anfitrion'] = 0
 
@@ -117,4 +267,23 @@ def asignar_bombos(df_clasificados,
 
     return df_final
 
+#Escenarios de repechaje: un ganador por llave en cada repechaje
+
+def escenarios_repechaje():
+    llaves_uefa = [list(g['codigo']) for _, g in df_repechaje_uefa.groupby('llave')]
+    llaves_fifa = [list(g['codigo']) for _, g in df_repechaje_fifa.groupby('llave')]
+
+    for ganadores_uefa in itertools.product(*llaves_uefa):
+        for ganadores_fifa in itertools.product(*llaves_fifa):
+            yield (ganadores_uefa, ganadores_fifa)
+
+
+def escenario_de(df_bombos):
+    #Ganadores de repechaje presentes en un df_bombos, como escenario (uefa, fifa)
+    repechaje = df_bombos[df_bombos['repechaje'] == 1]
+    ganadores_uefa = tuple(repechaje.loc[repechaje['confederacion'] == 'UEFA', 'codigo'])
+    ganadores_fifa = tuple(repechaje.loc[repechaje['confederacion'] != 'UEFA', 'codigo'])
+    return ganadores_uefa, ganadores_fifa
+
+
 df_bombos = asignar_bombos(df_clasificados, random_state= 42)
\ No newline at end of file
@@ -1,373 +1,307 @@
-import pandas as pd
-import numpy as np
+"""
+Sorteos en lote sin interfaz: genera N sorteos completos y los escribe a medida que salen.
+
+Reemplaza al antiguo script que repetía los bucles de los bombos 2/3/4 y corría al importarse;
+para ver un solo sorteo bolita a bolita sigue estando `simulacion_sorteo_fifa.py`.
+
+- Motores: `nucleo` (por defecto, `nucleo_sorteo`, con Numba si está instalado) u `original`
+  (`simular_sorteo_func.sortear_mundial`, mismo procedimiento pero mucho más lento).
+- Los sorteos se generan en bloques de tamaño fijo y cada bloque tiene su propia semilla
+  derivada de `--seed`: la salida es la misma con cualquier número de `--workers`.
+- Con workers, a lo sumo 2 bloques por worker están en vuelo y se escriben en orden apenas
+  están listos, así que la memoria no crece con `--draws` y la salida se puede encadenar con
+  otra herramienta (`| head`, `| gzip`...).
+- Formatos (`--format`):
+  - `table`: cada sorteo como tablas por grupo (para leer en la consola);
+  - `csv`: una fila por sorteo, una columna por equipo con su slot (`C3`);
+  - `ndjson`: un objeto JSON por línea, `{"sorteo": k, "slots": {"MEX": "A1", ...}}`;
+  - `npy`: matriz int8 (n_sorteos, n_equipos) con `grupo * 4 + slot` (la codificación de
+    `almacen_resultados`); la cabecera se escribe al principio porque N se conoce de antemano;
+  - `parquet`: una columna int8 por equipo con la misma codificación, un row group por bloque.
+    Necesita `pyarrow` (opcional, no está en requirements.txt).
+- Las estadísticas de rendimiento salen por stderr al final, para no mezclarse con la salida.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/simular_sorteo.py --draws 5
+    python 02_scripts/simular_sorteo.py --draws 1000000 --workers 4 --format npy --output 03_resultados/sorteos.npy
+    python 02_scripts/simular_sorteo.py --draws 100000 --format csv --playoff-winners ITA,UKR,TUR,DEN,COD,IRQ | head
+"""
+
+import os
+import sys
+import json
+import time
 import random
-import string
-
-
-from simular_bombos import df_bombos
-
-#Definimos funciones
-def checker_validez_grupo(grupo, eq_sorteado, grupos_dict, verbose=True):
-    #Confederacion del sorteado
-    conf_sorteado = df_bombos.loc[df_bombos['codigo'] == eq_sorteado, 'confederacion'].iloc[0]
-
-    #Equipos en grupo
-    equipos_en_grupo = grupos_dict[grupo]
-
-    #Extraer confederaciones ya asignadas
-    confs = [e['conf'] for e in equipos_en_grupo]
+import argparse
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 
-    #Contamos apariciones de confederacion
-    conf_counts = pd.Series(confs).value_counts()
-
-    #-----Constraints FIFA------
+import numpy as np
 
-    if conf_sorteado != 'UEFA':
-        if conf_sorteado in conf_counts.index:
-            if verbose:
-                print(f"Otro equipo de {conf_sorteado}. Reasignando...")
-            return False
+import sorteo_rapido
+from sorteo_rapido import GRUPOS, SLOTS_POR_GRUPO
+from nucleo_sorteo import NucleoSorteo
+from almacen_resultados import codificar_slot
+from simular_bombos import (df_bombos, df_clasificados, df_repechaje_uefa, df_repechaje_fifa,
+                            asignar_bombos, CONFEDERACIONES)
+from simular_sorteo_func import sortear_mundial
+
+FORMATOS = ('table', 'csv', 'ndjson', 'parquet', 'npy')
+MOTORES = ('nucleo', 'original')
+TAMANO_BLOQUE = {'nucleo': 10_000, 'original': 50}  # sorteos por bloque (y por tarea de worker)
+EN_VUELO_POR_WORKER = 2
+NOMBRES_SLOT = [f"{g}{s + 1}" for g in GRUPOS for s in range(SLOTS_POR_GRUPO)]
+
+
+# --- Tabla de equipos ---
+
+def ganadores_de(texto):
+    """
+    'ITA,UKR,TUR,DEN,COD,IRQ' -> (ganadores_uefa, ganadores_fifa), validando que haya
+    exactamente un ganador por llave de cada repechaje. None -> escenario de df_bombos.
+    """
+    if not texto:
+        return None
+    codigos = [c.strip().upper() for c in texto.split(',') if c.strip()]
+    ganadores = []
+    for df_repechaje in (df_repechaje_uefa, df_repechaje_fifa):
+        elegidos = []
+        for llave, g in df_repechaje.groupby('llave'):
+            en_llave = [c for c in codigos if c in set(g['codigo'])]
+            if len(en_llave) != 1:
+                raise ValueError(f"Hace falta exactamente un ganador de la llave {llave} "
+                                 f"({', '.join(g['codigo'])}); se dieron {en_llave or 'ninguno'}")
+            elegidos.append(en_llave[0])
+        ganadores.append(tuple(elegidos))
+    desconocidos = set(codigos) - set(ganadores[0]) - set(ganadores[1])
+    if desconocidos:
+        raise ValueError(f"Códigos que no están en ningún repechaje: {', '.join(sorted(desconocidos))}")
+    return tuple(ganadores)
+
+
+@lru_cache(maxsize=4)
+def tabla_de(ganadores):
+    """(df_bombos, TablaSorteo, NucleoSorteo) del escenario; una vez por proceso."""
+    if ganadores is None:
+        df = df_bombos
     else:
-        #UEFA permite máximo 2
-        if conf_counts.get('UEFA', 0) >= 2:
-            if verbose:
-                print("Dos equipos de UEFA actuales. Reasignando...")
-            return False
-        
-    return True
-
-
-def lookahead(grupo_target, equipo_actual, equipos_restantes, grupos_dict, bombos_slots, numero_de_bombo):
-    # 1. Copia de los grupos
-    grupos_sim = {g: lst.copy() for g, lst in grupos_dict.items()}
-    conf_actual = df_bombos.loc[df_bombos['codigo'] == equipo_actual, 'confederacion'].iloc[0]
-    grupos_sim[grupo_target].append({"codigo": equipo_actual, "slot": None, "conf": conf_actual})
-
-    # 2. Función recursiva para asignar equipos restantes
-    def asignar_restantes(restantes, grupos):
-        if not restantes:
-            return True  # todos asignados
-
-        eq = restantes[0]
-        conf_eq = df_bombos.loc[df_bombos['codigo'] == eq, 'confederacion'].iloc[0]
-
-        for g in grupos.keys():
-            if len(grupos[g]) >= numero_de_bombo:
-                continue
-            if not checker_validez_grupo(g, eq, grupos, verbose=False):
-                continue
-
-            # Asignación temporal
-            grupos[g].append({"codigo": eq, "slot": None, "conf": conf_eq})
-            if asignar_restantes(restantes[1:], grupos):
-                return True  # éxito
-            grupos[g].pop()  # deshacer asignación si no funciona
-
-        return False  # ningún grupo válido para este equipo
-
-    return asignar_restantes(equipos_restantes, grupos_sim)
-
-
-#Generamos esqueleto
-grupos = list(string.ascii_uppercase[:12])  # A-L
-asignaciones_sorteo = {}
-
-#Generamos los bombos de cada grupo (slots)
-bombos_slots = {}
-for grupo in grupos:
-    bombos_slots[grupo] = [f"{grupo}{i}" for i in range(1, 5)]
-
-#Asignaciones de Anfitriones
-anfitriones = {
-    "MEX": "A1",
-    "CAN": "B1",
-    "USA": "D1"
-}
-
-for eq, slot in anfitriones.items():
-    conf = df_bombos.loc[df_bombos['codigo'] == eq, 'confederacion'].iloc[0]
-    grupo = slot[0]       # "A", "B", "D"
-    
-    asignaciones_sorteo[eq] = {
-        "grupo": grupo,
-        "slot": slot,
-        "conf": conf
-    }
-
-#Retiramos las bolitas rojas de Anfitriones
-bombos_slots['A'].remove("A1")
-bombos_slots['B'].remove("B1")
-bombos_slots['D'].remove("D1")
-
-#Equipos restantes bombo 1
-eq_restantes_bombo_1 = df_bombos[
-    (~df_bombos['codigo'].isin(['MEX', 'USA', 'CAN'])) &
-    (df_bombos['bombo'] == 1)
-]
-
-print("----BOMBO 1: CABEZAS DE GRUPO----")
-
-for grupo in bombos_slots.keys():
-    if grupo not in ('A', 'B', 'D'):
-        # Selecciona equipo
-        eq_sorteado = eq_restantes_bombo_1['codigo'].sample(1).iloc[0]  # Bolita país
-        fila_eq = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] == eq_sorteado].iloc[0]
-        conf = fila_eq['confederacion']  # Ajusta nombre si es distinto
-
-        # Quitamos bolita del bombo de países
-        eq_restantes_bombo_1 = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] != eq_sorteado]
-
-        # Asignamos grupo y slot
-        slot = grupo + "1"
-        asignaciones_sorteo[eq_sorteado] = {
-            "grupo": grupo,
-            "slot": slot,
-            "conf": conf
-        }
-
-        # Quitamos slot del bombo de grupos
-        bombos_slots[grupo].remove(slot)
-
-        print(f"{eq_sorteado} ({conf}) cabeza de Grupo {grupo} → slot {slot}")
-
-
-
-
-grupos_dict = {g: [] for g in grupos}
-
-for equipo, info in asignaciones_sorteo.items():
-    grupos_dict[info["grupo"]].append({
-        "codigo": equipo,
-        "slot": info["slot"],
-        "conf": info["conf"]
-    })
-
-
-print("----BOMBO 2----")
-
-grupos = list(bombos_slots.keys())  # A→L
-
-eq_bombo_2 = df_bombos[df_bombos['bombo'] == 2].copy()
-
-for _ in grupos:
-    if eq_bombo_2.empty:
-        break
-
-    # Sacamos un equipo del bombo 2
-    eq_sorteado = eq_bombo_2['codigo'].sample(1).iloc[0]
-    eq_bombo_2 = eq_bombo_2[eq_bombo_2['codigo'] != eq_sorteado]
-
-    grupo_asignado = None
-
-    for g in grupos:
-
-        # 1) Máximo 2 equipos en este bombo
-        if len(grupos_dict[g]) >= 2:
-            continue
-
-        # 2) Constraint normal de confederación
-        if not checker_validez_grupo(g, eq_sorteado, grupos_dict):
-            continue
-
-        # 3) Lookahead — ¿ponerlo aquí ahorca los grupos para los restantes?
-        if not lookahead(
-            grupo_target=g,
-            equipo_actual=eq_sorteado,
-            equipos_restantes=list(eq_bombo_2['codigo']),
-            grupos_dict=grupos_dict,
-            bombos_slots=bombos_slots,
-            numero_de_bombo=2
-        ):
-            print(f"Lookahead: {eq_sorteado} NO puede ir en grupo {g}, causaría dead-end. Reasignando...")
-            continue
-
-        # 4) Si pasa todo → este es su grupo
-        grupo_asignado = g
-        break
-
-    if grupo_asignado is None:
-        raise ValueError(f"No hay grupo válido para {eq_sorteado}. Revisa constraints!")
-
-    # ---- Asignación real ----
-    slot_sorteado = random.choice(bombos_slots[grupo_asignado])
-    bombos_slots[grupo_asignado].remove(slot_sorteado)
-
-    conf_sorteado = df_bombos.loc[df_bombos['codigo'] == eq_sorteado, 'confederacion'].iloc[0]
-
-    grupos_dict[grupo_asignado].append({
-        "codigo": eq_sorteado,
-        "slot": slot_sorteado,
-        "conf": conf_sorteado
-    })
-
-    asignaciones_sorteo[eq_sorteado] = {
-        "grupo": grupo_asignado,
-        "slot": slot_sorteado,
-        "conf": conf_sorteado
-    }
-
-    print(f"{eq_sorteado} → Grupo {grupo_asignado}, slot {slot_sorteado}")
-
-
-
-#Bombo 3:
-
-print("----BOMBO 3----")
-
-grupos = list(bombos_slots.keys())  # A→L
-
-eq_bombo_3 = df_bombos[df_bombos['bombo'] == 3].copy()
-
-for _ in grupos:
-    if eq_bombo_3.empty:
-        break
-
-    # Sacamos un equipo del bombo 3
-    eq_sorteado = eq_bombo_3['codigo'].sample(1).iloc[0]
-    eq_bombo_3 = eq_bombo_3[eq_bombo_3['codigo'] != eq_sorteado]
-
-    grupo_asignado = None
-
-    for g in grupos:
-
-        # 1) Máximo 3 equipos en este bombo
-        if len(grupos_dict[g]) >= 3:
-            continue
-
-        # 2) Constraint normal de confederación
-        if not checker_validez_grupo(g, eq_sorteado, grupos_dict):
-            continue
-
-        # 3) Lookahead — ¿ponerlo aquí ahorca los grupos para los restantes?
-        if not lookahead(
-            grupo_target=g,
-            equipo_actual=eq_sorteado,
-            equipos_restantes=list(eq_bombo_3['codigo']),
-            grupos_dict=grupos_dict,
-            bombos_slots=bombos_slots,
-            numero_de_bombo=3
-        ):
-            print(f"Lookahead: {eq_sorteado} NO puede ir en grupo {g}, causaría dead-end. Reasignando...")
-            continue
-
-        # 4) Si pasa todo → este es su grupo
-        grupo_asignado = g
-        break
-
-    if grupo_asignado is None:
-        raise ValueError(f"No hay grupo válido para {eq_sorteado}. Revisa constraints!")
-
-    # ---- Asignación real ----
-    slot_sorteado = random.choice(bombos_slots[grupo_asignado])
-    bombos_slots[grupo_asignado].remove(slot_sorteado)
-
-    conf_sorteado = df_bombos.loc[df_bombos['codigo'] == eq_sorteado, 'confederacion'].iloc[0]
-
-    grupos_dict[grupo_asignado].append({
-        "codigo": eq_sorteado,
-        "slot": slot_sorteado,
-        "conf": conf_sorteado
-    })
-
-    asignaciones_sorteo[eq_sorteado] = {
-        "grupo": grupo_asignado,
-        "slot": slot_sorteado,
-        "conf": conf_sorteado
-    }
-
-    print(f"{eq_sorteado} → Grupo {grupo_asignado}, slot {slot_sorteado}")
-
-
-#Bombo 4:
-
-print("----BOMBO 4----")
-
-grupos = list(bombos_slots.keys())  # A→L
-
-eq_bombo_4 = df_bombos[df_bombos['bombo'] == 4].copy()
-
-for _ in grupos:
-    if eq_bombo_4.empty:
-        break
-
-    # Sacamos un equipo del bombo 3
-    eq_sorteado = eq_bombo_4['codigo'].sample(1).iloc[0]
-    eq_bombo_4 = eq_bombo_4[eq_bombo_4['codigo'] != eq_sorteado]
-
-    grupo_asignado = None
-
-    for g in grupos:
-
-        # 1) Máximo 4 equipos en este bombo
-        if len(grupos_dict[g]) >= 4:
-            continue
-
-        # 2) Constraint normal de confederación
-        if not checker_validez_grupo(g, eq_sorteado, grupos_dict):
-            continue
-
-        # 3) Lookahead — ¿ponerlo aquí ahorca los grupos para los restantes?
-        if not lookahead(
-            grupo_target=g,
-            equipo_actual=eq_sorteado,
-            equipos_restantes=list(eq_bombo_4['codigo']),
-            grupos_dict=grupos_dict,
-            bombos_slots=bombos_slots,
-            numero_de_bombo=4
-        ):
-            print(f"Lookahead: {eq_sorteado} NO puede ir en grupo {g}, causaría dead-end. Reasignando...")
-            continue
-
-        # 4) Si pasa todo → este es su grupo
-        grupo_asignado = g
-        break
-
-    if grupo_asignado is None:
-        raise ValueError(f"No hay grupo válido para {eq_sorteado}. Revisa constraints!")
-
-    # ---- Asignación real ----
-    slot_sorteado = random.choice(bombos_slots[grupo_asignado])
-    bombos_slots[grupo_asignado].remove(slot_sorteado)
-
-    conf_sorteado = df_bombos.loc[df_bombos['codigo'] == eq_sorteado, 'confederacion'].iloc[0]
-
-    grupos_dict[grupo_asignado].append({
-        "codigo": eq_sorteado,
-        "slot": slot_sorteado,
-        "conf": conf_sorteado
-    })
-
-    asignaciones_sorteo[eq_sorteado] = {
-        "grupo": grupo_asignado,
-        "slot": slot_sorteado,
-        "conf": conf_sorteado
-    }
-
-    print(f"{eq_sorteado} → Grupo {grupo_asignado}, slot {slot_sorteado}")
-
-# Crear lista de filas
-filas = []
-for grupo, equipos in grupos_dict.items():
-    for eq in equipos:
-        filas.append({
-            "Grupo": grupo,
-            "Equipo": eq["codigo"],
-            "Slot": eq["slot"],
-            "Confederacion": eq["conf"]
-        })
-
-# Convertir a DataFrame
-df_tabla = pd.DataFrame(filas)
-
-# Mostrar tabla
-for grupo in sorted(df_tabla['Grupo'].unique()):
-    print(f"\n--- Grupo {grupo} ---")
-
-    tabla = (
-        df_tabla[df_tabla['Grupo'] == grupo]
-        .sort_values(by="Slot")
-        .drop(columns=["Grupo"])
-        .reset_index(drop=True)
-    )
-
-    print(tabla)
+        df = asignar_bombos(df_clasificados, clasificados_uefa=list(ganadores[0]), clasificados_fifa=list(ganadores[1]))
+    t = sorteo_rapido.TablaSorteo(df)
+    return df, t, NucleoSorteo(t)
+
+
+# --- Generación por bloques ---
+
+def semilla_bloque(seed, b):
+    return int(np.random.SeedSequence(seed, spawn_key=(b,)).generate_state(1)[0])
+
+
+def generar_bloque(args):
+    """Bloque b: matriz int8 (n_equipos, n) con `grupo * 4 + slot`. Función de módulo para el pool."""
+    motor, ganadores, seed, b, inicio, n = args
+    df, t, nucleo = tabla_de(ganadores)
+    if motor == 'nucleo':
+        return nucleo.sortear_lote(n, seed=semilla_bloque(seed, b))
+
+    bloque = np.empty((t.n_equipos, n), dtype=np.int8)
+    for k in range(n):
+        #Como `simular_sorteos`: el sorteo i se siembra con seed + i
+        random.seed(seed + inicio + k)
+        np.random.seed((seed + inicio + k) % 2**32)
+        _, asignaciones = sortear_mundial(df)
+        for eq, info in asignaciones.items():
+            bloque[t.idx[eq], k] = codificar_slot(info['slot'])
+    return bloque
+
+
+def bloques(motor, ganadores, n_sorteos, seed, workers, tamano=None):
+    """Genera (inicio, bloque) en orden, con a lo sumo EN_VUELO_POR_WORKER bloques por worker pendientes."""
+    tamano = tamano or TAMANO_BLOQUE[motor]
+    trabajos = ((motor, ganadores, seed, b, inicio, min(tamano, n_sorteos - inicio))
+                for b, inicio in enumerate(range(0, n_sorteos, tamano)))
+    if workers <= 1:
+        for trabajo in trabajos:
+            yield trabajo[4], generar_bloque(trabajo)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as ejecutor:
+        pendientes = deque()
+        for trabajo in trabajos:
+            pendientes.append((trabajo[4], ejecutor.submit(generar_bloque, trabajo)))
+            if len(pendientes) >= workers * EN_VUELO_POR_WORKER:
+                inicio, futuro = pendientes.popleft()
+                yield inicio, futuro.result()
+        while pendientes:
+            inicio, futuro = pendientes.popleft()
+            yield inicio, futuro.result()
+
+
+# --- Escritores ---
+
+class SalidaContada:
+    """Envuelve un archivo binario contando los bytes escritos."""
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.bytes = 0
+        self.closed = False
+
+    def write(self, datos):
+        self.bytes += len(datos)
+        return self.archivo.write(datos)
+
+    def flush(self):
+        self.archivo.flush()
+
+    def close(self):
+        self.closed = True
+
+
+class EscritorTabla:
+    def __init__(self, salida, t, n_sorteos):
+        self.salida, self.t = salida, t
+
+    def escribir(self, inicio, bloque):
+        t = self.t
+        partes = []
+        for k in range(bloque.shape[1]):
+            partes.append(f"\n===== Sorteo {inicio + k} =====\n")
+            ocupantes = {int(v): i for i, v in enumerate(bloque[:, k])}
+            for g, letra in enumerate(GRUPOS):
+                partes.append(f"\n--- Grupo {letra} ---\n")
+                for s in range(SLOTS_POR_GRUPO):
+                    i = ocupantes[g * SLOTS_POR_GRUPO + s]
+                    partes.append(f"{letra}{s + 1}  {t.equipos[i]:<4} {CONFEDERACIONES[t.equipos[i]]}\n")
+        self.salida.write(''.join(partes).encode())
+
+    def cerrar(self):
+        pass
+
+
+class EscritorCSV:
+    def __init__(self, salida, t, n_sorteos):
+        self.salida = salida
+        self.salida.write((','.join(['sorteo'] + t.equipos) + '\n').encode())
+
+    def escribir(self, inicio, bloque):
+        nombres = np.array(NOMBRES_SLOT)[bloque.T]
+        filas = [f"{inicio + k}," + ','.join(fila) for k, fila in enumerate(nombres.tolist())]
+        self.salida.write(('\n'.join(filas) + '\n').encode())
+
+    def cerrar(self):
+        pass
+
+
+class EscritorNDJSON:
+    def __init__(self, salida, t, n_sorteos):
+        self.salida, self.equipos = salida, t.equipos
+
+    def escribir(self, inicio, bloque):
+        nombres = np.array(NOMBRES_SLOT)[bloque.T]
+        lineas = [json.dumps({'sorteo': inicio + k, 'slots': dict(zip(self.equipos, fila))}, separators=(',', ':'))
+                  for k, fila in enumerate(nombres.tolist())]
+        self.salida.write(('\n'.join(lineas) + '\n').encode())
+
+    def cerrar(self):
+        pass
+
+
+class EscritorNPY:
+    def __init__(self, salida, t, n_sorteos):
+        self.salida = salida
+        cabecera = {'descr': np.dtype(np.int8).str, 'fortran_order': False, 'shape': (n_sorteos, t.n_equipos)}
+        np.lib.format.write_array_header_1_0(salida, cabecera)
+
+    def escribir(self, inicio, bloque):
+        self.salida.write(np.ascontiguousarray(bloque.T).tobytes())
+
+    def cerrar(self):
+        pass
+
+
+class EscritorParquet:
+    def __init__(self, salida, t, n_sorteos):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("El formato parquet necesita pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.equipos = t.equipos
+        esquema = pa.schema([('sorteo', pa.int64())] + [(eq, pa.int8()) for eq in t.equipos])
+        self.escritor = pq.ParquetWriter(salida, esquema)
+
+    def escribir(self, inicio, bloque):
+        pa = self.pa
+        columnas = [pa.array(np.arange(inicio, inicio + bloque.shape[1], dtype=np.int64))]
+        columnas += [pa.array(bloque[i]) for i in range(len(self.equipos))]
+        self.escritor.write_batch(pa.record_batch(columnas, names=['sorteo'] + self.equipos))
+
+    def cerrar(self):
+        self.escritor.close()
+
+
+ESCRITORES = {'table': EscritorTabla, 'csv': EscritorCSV, 'ndjson': EscritorNDJSON,
+              'npy': EscritorNPY, 'parquet': EscritorParquet}
+
+
+def simular(n_sorteos, archivo, formato='csv', seed=0, workers=1, ganadores=None, motor='nucleo', tamano=None):
+    """
+    Escribe `n_sorteos` sorteos en `archivo` (binario). Devuelve (bytes escritos, segundos,
+    segundos de compilación). La compilación (o carga de la caché en disco) del núcleo se hace
+    antes de medir, para que los sorteos/s no la incluyan; los workers cargan la caché que deja.
+    """
+    _, t, nucleo = tabla_de(ganadores)
+    salida = SalidaContada(archivo)
+    t0 = time.perf_counter()
+    if motor == 'nucleo':
+        nucleo.sortear_lote(1, seed=seed)
+    compilacion = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    escritor = ESCRITORES[formato](salida, t, n_sorteos)
+    for inicio, bloque in bloques(motor, ganadores, n_sorteos, seed, workers, tamano):
+        escritor.escribir(inicio, bloque)
+    escritor.cerrar()
+    salida.flush()
+    return salida.bytes, time.perf_counter() - t0, compilacion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sorteos del Mundial 2026 en lote, escritos a medida que se generan")
+    parser.add_argument('--sorteos', '--draws', dest='sorteos', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=1, help="Procesos generadores (la salida no depende de esto)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ganadores-repechaje', '--playoff-winners', dest='ganadores', default=None,
+                        help="Un ganador por llave, separados por comas (por defecto, el escenario de df_bombos)")
+    parser.add_argument('--formato', '--format', dest='formato', choices=FORMATOS, default='table')
+    parser.add_argument('--output', '-o', default='-', help="Archivo de salida ('-' = stdout)")
+    parser.add_argument('--motor', choices=MOTORES, default='nucleo')
+    parser.add_argument('--bloque', type=int, default=None, help="Sorteos por bloque (por defecto según el motor)")
+    args = parser.parse_args()
+
+    try:
+        ganadores = ganadores_de(args.ganadores)
+    except ValueError as e:
+        parser.error(str(e))
+
+    archivo = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        n_bytes, segundos, compilacion = simular(args.sorteos, archivo, args.formato, args.seed, args.workers,
+                                    ganadores, args.motor, args.bloque)
+    except BrokenPipeError:
+        #El consumidor cerró la tubería (p. ej. `| head`): no es un error
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    finally:
+        if archivo is not sys.stdout.buffer:
+            archivo.close()
+
+    print(f"{args.sorteos} sorteos en {segundos:.2f} s ({args.sorteos / max(segundos, 1e-9):,.0f} sorteos/s), "
+          f"{n_bytes / 1e6:.1f} MB ({n_bytes / max(segundos, 1e-9) / 1e6:.1f} MB/s); motor {args.motor}, "
+          f"{args.workers} worker(s), formato {args.formato}"
+          + (f"; compilación del núcleo {compilacion:.2f} s (no incluida)" if args.motor == 'nucleo' else ''),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,23 @@
 import pandas as pd
 import numpy as np
 import random
-import string
+import time
+from collections import Counter, namedtuple
 
+import instrumentacion
 
-from simular_bombos import df_bombos
+
+from simular_bombos import CONFEDERACIONES
+from formato_torneo import WC2026
+
+#Versión de las reglas del sorteo implementadas aquí. Se guarda junto a los resultados
+#persistidos para no mezclar sorteos generados con reglas distintas.
+VERSION_REGLAS = 'wc2026-v1'
 
 #Definimos funciones
-def checker_validez_grupo(grupo, eq_sorteado, grupos_dict, verbose=True):
+def checker_validez_grupo(grupo, eq_sorteado, grupos_dict, verbose=True, formato=WC2026):
     #Confederacion del sorteado
-    conf_sorteado = df_bombos.loc[df_bombos['codigo'] == eq_sorteado, 'confederacion'].iloc[0]
+    conf_sorteado = CONFEDERACIONES[eq_sorteado]
 
     #Equipos en grupo
     equipos_en_grupo = grupos_dict[grupo]
@@ -18,43 +26,58 @@ def checker_validez_grupo(grupo, eq_sorteado, grupos_dict, verbose=True):
     confs = [e['conf'] for e in equipos_en_grupo]
 
     #Contamos apariciones de confederacion
-    conf_counts = pd.Series(confs).value_counts()
+    conf_counts = Counter(confs)
 
     #-----Constraints FIFA------
-
-    if conf_sorteado != 'UEFA':
-        if conf_sorteado in conf_counts.index:
-            if verbose:
-                print(f"Otro equipo de {conf_sorteado}. Reasignando...")
-            return False
-    else:
-        #UEFA permite máximo 2
-        if conf_counts.get('UEFA', 0) >= 2:
-            if verbose:
-                print("Dos equipos de UEFA actuales. Reasignando...")
-            return False
+    #Cupo por confederación del formato (en el 2026, UEFA permite máximo 2 y el resto 1)
+    if conf_counts.get(conf_sorteado, 0) >= formato.cupo(conf_sorteado):
+        if verbose:
+            print(detalle_rechazo_confederacion(grupo, eq_sorteado, grupos_dict, formato))
+        return False
         
     return True
 
 
-def lookahead(grupo_target, equipo_actual, equipos_restantes, grupos_dict, bombos_slots, numero_de_bombo):
+class PlazoVencido(RuntimeError):
+    """`lookahead` llegó a su `plazo` sin terminar la búsqueda."""
+
+
+def lookahead(grupo_target, equipo_actual, equipos_restantes, grupos_dict, bombos_slots, numero_de_bombo,
+              plazo=None, formato=WC2026):
+    # `plazo`: instante (time.perf_counter) a partir del cual se corta la búsqueda con PlazoVencido
+    # 0. Contadores (None si la instrumentación está desactivada)
+    c = instrumentacion.actual
+    if c is not None:
+        c.lookaheads += 1
+    total_restantes = len(equipos_restantes)
+
     # 1. Copia de los grupos
     grupos_sim = {g: lst.copy() for g, lst in grupos_dict.items()}
-    conf_actual = df_bombos.loc[df_bombos['codigo'] == equipo_actual, 'confederacion'].iloc[0]
+    conf_actual = CONFEDERACIONES[equipo_actual]
     grupos_sim[grupo_target].append({"codigo": equipo_actual, "slot": None, "conf": conf_actual})
 
     # 2. Función recursiva para asignar equipos restantes
     def asignar_restantes(restantes, grupos):
+        if plazo is not None and time.perf_counter() > plazo:
+            raise PlazoVencido(f"lookahead de {equipo_actual} en el grupo {grupo_target} sin terminar")
+        if c is not None:
+            c.nodos += 1
+            if c.limite_nodos is not None and c.nodos > c.limite_nodos:
+                raise instrumentacion.LimiteNodosExcedido(f"lookahead: más de {c.limite_nodos} nodos")
+            profundidad = total_restantes - len(restantes)
+            if profundidad > c.profundidad_max:
+                c.profundidad_max = profundidad
+
         if not restantes:
             return True  # todos asignados
 
         eq = restantes[0]
-        conf_eq = df_bombos.loc[df_bombos['codigo'] == eq, 'confederacion'].iloc[0]
+        conf_eq = CONFEDERACIONES[eq]
 
         for g in grupos.keys():
             if len(grupos[g]) >= numero_de_bombo:
                 continue
-            if not checker_validez_grupo(g, eq, grupos, verbose=False):
+            if not checker_validez_grupo(g, eq, grupos, verbose=False, formato=formato):
                 continue
 
             # Asignación temporal
@@ -62,93 +85,157 @@ def lookahead(grupo_target, equipo_actual, equipos_restantes, grupos_dict, bombo
             if asignar_restantes(restantes[1:], grupos):
                 return True  # éxito
             grupos[g].pop()  # deshacer asignación si no funciona
+            if c is not None:
+                c.backtracks += 1
 
         return False  # ningún grupo válido para este equipo
 
     return asignar_restantes(equipos_restantes, grupos_sim)
 
-def sortear_bombo_1(df_bombos):
-    #Generamos esqueleto
-    grupos = list(string.ascii_uppercase[:12])  # A-L
-    asignaciones_sorteo = {}
-
-    #Generamos los bombos de cada grupo (slots)
-    bombos_slots = {}
-    for grupo in grupos:
-        bombos_slots[grupo] = [f"{grupo}{i}" for i in range(1, 5)]
-
-    #Asignaciones de Anfitriones
-    anfitriones = {
-        "MEX": "A1",
-        "CAN": "B1",
-        "USA": "D1"
-    }
-
-    for eq, slot in anfitriones.items():
+#----Eventos del sorteo----
+#Los generadores `eventos_*` van produciendo estos eventos mientras sortean. Con eventos=False no
+#se construye ninguno (modo batch): el generador corre hasta el final sin hacer yield.
+InicioBombo = namedtuple('InicioBombo', 'bombo')
+BolaSorteada = namedtuple('BolaSorteada', 'bombo equipo')
+#motivo: 'confederacion' (checker_validez_grupo) o 'lookahead' (dejaría sin solución al resto del bombo)
+GrupoRechazado = namedtuple('GrupoRechazado', 'bombo equipo grupo motivo detalle')
+EquipoColocado = namedtuple('EquipoColocado', 'bombo equipo grupo slot conf anfitrion')
+
+#Anfitriones del 2026 (cada formato trae los suyos en `formato.anfitriones`)
+ANFITRIONES = WC2026.anfitriones
+_CANTIDADES = {2: "Dos", 3: "Tres"}
+
+
+def detalle_rechazo_confederacion(grupo, eq_sorteado, grupos_dict, formato=WC2026):
+    #Mismo texto que imprime checker_validez_grupo
+    conf_sorteado = CONFEDERACIONES[eq_sorteado]
+    cupo = formato.cupo(conf_sorteado)
+    if cupo > 1:
+        return f"{_CANTIDADES.get(cupo, cupo)} equipos de {conf_sorteado} actuales. Reasignando..."
+    return f"Otro equipo de {conf_sorteado}. Reasignando..."
+
+
+def imprimir_evento(evento):
+    #Suscriptor de consola: reproduce los mensajes de la versión con prints
+    if isinstance(evento, InicioBombo):
+        if evento.bombo == 1:
+            print("----BOMBO 1: CABEZAS DE GRUPO----")
+        else:
+            print(f"----BOMBO {evento.bombo}----")
+    elif isinstance(evento, GrupoRechazado):
+        if evento.motivo == 'lookahead':
+            print(f"Lookahead: {evento.equipo} NO puede ir en grupo {evento.grupo}, causaría dead-end. Reasignando...")
+        else:
+            print(evento.detalle)
+    elif isinstance(evento, EquipoColocado) and not evento.anfitrion:
+        #Los anfitriones se colocan sin mensaje, como en la versión con prints
+        if evento.bombo == 1:
+            print(f"{evento.equipo} ({evento.conf}) cabeza de Grupo {evento.grupo} → slot {evento.slot}")
+        else:
+            print(f"{evento.equipo} → Grupo {evento.grupo}, slot {evento.slot}")
+
+
+def consumir(generador, *suscriptores):
+    """Corre un generador de eventos pasando cada evento a los suscriptores; devuelve su resultado."""
+    try:
+        while True:
+            evento = next(generador)
+            for suscriptor in suscriptores:
+                suscriptor(evento)
+    except StopIteration as fin:
+        return fin.value
+
+
+def sacar_bola(eq_bombo, orden_bolas=None):
+    #Bolita al azar del bombo, o la primera de `orden_bolas` que siga en él (para reproducir un orden)
+    if orden_bolas is None:
+        return eq_bombo['codigo'].sample(1).iloc[0]
+    quedan = set(eq_bombo['codigo'])
+    return next(eq for eq in orden_bolas if eq in quedan)
+
+
+def esqueleto_sorteo(formato=WC2026):
+    #grupos_dict, asignaciones_sorteo y bombos_slots vacíos (en el 2026, grupos A-L y slots 1-4)
+    grupos_dict = {g: [] for g in formato.grupos}
+    bombos_slots = {g: formato.slots(g) for g in formato.grupos}
+    return grupos_dict, {}, bombos_slots
+
+
+def eventos_bombo_1(df_bombos, grupos_dict, asignaciones_sorteo, bombos_slots, eventos=True,
+                    orden_bolas=None, formato=WC2026):
+    """
+    Generador del bombo 1 sobre el estado recibido (se modifica en el lugar).
+    Devuelve (grupos_dict, asignaciones_sorteo, bombos_slots) al terminar.
+    Con `orden_bolas` (lista de códigos) las bolitas salen en ese orden en vez de al azar.
+    """
+    if eventos:
+        yield InicioBombo(1)
+
+    #Asignaciones de Anfitriones (y retiramos sus bolitas rojas)
+    for eq, slot in formato.anfitriones.items():
         conf = df_bombos.loc[df_bombos['codigo'] == eq, 'confederacion'].iloc[0]
         grupo = slot[0]       # "A", "B", "D"
-        
-        asignaciones_sorteo[eq] = {
-            "grupo": grupo,
-            "slot": slot,
-            "conf": conf
-        }
 
-    #Retiramos las bolitas rojas de Anfitriones
-    bombos_slots['A'].remove("A1")
-    bombos_slots['B'].remove("B1")
-    bombos_slots['D'].remove("D1")
+        if eventos:
+            yield BolaSorteada(1, eq)
+        asignaciones_sorteo[eq] = {"grupo": grupo, "slot": slot, "conf": conf}
+        grupos_dict[grupo].append({"codigo": eq, "slot": slot, "conf": conf})
+        bombos_slots[grupo].remove(slot)
+        if eventos:
+            yield EquipoColocado(1, eq, grupo, slot, conf, True)
 
     #Equipos restantes bombo 1
     eq_restantes_bombo_1 = df_bombos[
-        (~df_bombos['codigo'].isin(['MEX', 'USA', 'CAN'])) &
+        (~df_bombos['codigo'].isin(list(formato.anfitriones))) &
         (df_bombos['bombo'] == 1)
     ]
 
-    print("----BOMBO 1: CABEZAS DE GRUPO----")
-
-    for grupo in bombos_slots.keys():
-        if grupo not in ('A', 'B', 'D'):
-            # Selecciona equipo
-            eq_sorteado = eq_restantes_bombo_1['codigo'].sample(1).iloc[0]  # Bolita país
-            fila_eq = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] == eq_sorteado].iloc[0]
-            conf = fila_eq['confederacion']  # Ajusta nombre si es distinto
-
-            # Quitamos bolita del bombo de países
-            eq_restantes_bombo_1 = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] != eq_sorteado]
-
-            # Asignamos grupo y slot
-            slot = grupo + "1"
-            asignaciones_sorteo[eq_sorteado] = {
-                "grupo": grupo,
-                "slot": slot,
-                "conf": conf
-            }
-
-            # Quitamos slot del bombo de grupos
-            bombos_slots[grupo].remove(slot)
-
-            print(f"{eq_sorteado} ({conf}) cabeza de Grupo {grupo} → slot {slot}")
-
-    grupos_dict = {g: [] for g in grupos}
-
-    for equipo, info in asignaciones_sorteo.items():
-        grupos_dict[info["grupo"]].append({
-            "codigo": equipo,
-            "slot": info["slot"],
-            "conf": info["conf"]
-        })
+    grupos_anfitriones = {slot[0] for slot in formato.anfitriones.values()}
+    for grupo in list(bombos_slots.keys()):
+        if grupo in grupos_anfitriones:
+            continue
+
+        # Selecciona equipo
+        eq_sorteado = sacar_bola(eq_restantes_bombo_1, orden_bolas)  # Bolita país
+        fila_eq = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] == eq_sorteado].iloc[0]
+        conf = fila_eq['confederacion']  # Ajusta nombre si es distinto
+        if eventos:
+            yield BolaSorteada(1, eq_sorteado)
+
+        # Quitamos bolita del bombo de países
+        eq_restantes_bombo_1 = eq_restantes_bombo_1[eq_restantes_bombo_1['codigo'] != eq_sorteado]
+
+        # Asignamos grupo y slot; quitamos slot del bombo de grupos
+        slot = grupo + "1"
+        asignaciones_sorteo[eq_sorteado] = {"grupo": grupo, "slot": slot, "conf": conf}
+        grupos_dict[grupo].append({"codigo": eq_sorteado, "slot": slot, "conf": conf})
+        bombos_slots[grupo].remove(slot)
+        if eventos:
+            yield EquipoColocado(1, eq_sorteado, grupo, slot, conf, False)
 
     return grupos_dict, asignaciones_sorteo, bombos_slots
 
 
-def sortear_bombo_n(n_bombo,
+def eventos_bombo_n(n_bombo,
                     df_bombos,
                     bombos_slots,
                     grupos_dict,
-                    asignaciones_sorteo): 
-
-    print(f"----BOMBO {n_bombo}----")
+                    asignaciones_sorteo,
+                    eventos=True,
+                    orden_bolas=None,
+                    factibilidad=lookahead,
+                    formato=WC2026):
+    """
+    Generador de los bombos 2 en adelante sobre el estado recibido (se modifica en el lugar).
+    Devuelve (grupos_dict, asignaciones_sorteo, bombos_slots) al terminar.
+    Con `orden_bolas` (lista de códigos) las bolitas salen en ese orden en vez de al azar.
+    `factibilidad` decide si el resto del bombo sigue teniendo solución (misma firma que
+    `lookahead`; la GUI pasa una versión con tiempo acotado).
+    """
+    c = instrumentacion.actual
+
+    if eventos:
+        yield InicioBombo(n_bombo)
 
     grupos = list(bombos_slots.keys())  # A→L
 
@@ -157,12 +244,17 @@ def sortear_bombo_n(n_bombo,
     for _ in grupos:
         if eq_bombo.empty:
             break
-        
-        # Sacamos un equipo del bombo 2
-        eq_sorteado = eq_bombo['codigo'].sample(1).iloc[0]
+
+        # Sacamos un equipo del bombo
+        eq_sorteado = sacar_bola(eq_bombo, orden_bolas)
         eq_bombo = eq_bombo[eq_bombo['codigo'] != eq_sorteado]
+        if eventos:
+            yield BolaSorteada(n_bombo, eq_sorteado)
 
         grupo_asignado = None
+        #Tiempo de solver de la bolita (checker + lookahead); no incluye lo que tarden los
+        #consumidores de eventos entre un yield y el siguiente
+        t_bola = 0.0
 
         for g in grupos:
 
@@ -170,20 +262,35 @@ def sortear_bombo_n(n_bombo,
             if len(grupos_dict[g]) >= n_bombo:
                 continue
 
+            t0 = time.perf_counter() if c is not None else 0.0
+
             #2) Constraint confederaciones
-            if not checker_validez_grupo(g, eq_sorteado, grupos_dict):
+            if not checker_validez_grupo(g, eq_sorteado, grupos_dict, verbose=False, formato=formato):
+                if c is not None:
+                    t_bola += time.perf_counter() - t0
+                    c.rechazos_confederacion += 1
+                if eventos:
+                    yield GrupoRechazado(n_bombo, eq_sorteado, g, 'confederacion',
+                                         detalle_rechazo_confederacion(g, eq_sorteado, grupos_dict, formato))
                 continue
 
             #3) Lookahead - ¿Ponerlo aquí ahorca los grupos para los restantes?
-            if not lookahead(
+            valido = factibilidad(
                 grupo_target=g,
                 equipo_actual=eq_sorteado,
                 equipos_restantes=list(eq_bombo['codigo']),
                 grupos_dict=grupos_dict,
                 bombos_slots=bombos_slots,
-                numero_de_bombo=n_bombo
-            ):
-                print(f"Lookahead: {eq_sorteado} NO puede ir en grupo {g}, causaría dead-end. Reasignando...")
+                numero_de_bombo=n_bombo,
+                formato=formato
+            )
+            if c is not None:
+                t_bola += time.perf_counter() - t0
+            if not valido:
+                if c is not None:
+                    c.rechazos_lookahead += 1
+                if eventos:
+                    yield GrupoRechazado(n_bombo, eq_sorteado, g, 'lookahead', None)
                 continue
 
             #4) Si pasa todo -> este es su grupo
@@ -192,12 +299,12 @@ def sortear_bombo_n(n_bombo,
 
         if grupo_asignado is None:
             raise ValueError(f"No hay grupo válido para {eq_sorteado}. Revisa constraints!")
-        
+
         #----Asignación Real----
         slot_sorteado = random.choice(bombos_slots[grupo_asignado])
         bombos_slots[grupo_asignado].remove(slot_sorteado)
 
-        conf_sorteado = df_bombos.loc[df_bombos['codigo'] == eq_sorteado, 'confederacion'].iloc[0]
+        conf_sorteado = CONFEDERACIONES[eq_sorteado]
 
         grupos_dict[grupo_asignado].append({
             "codigo": eq_sorteado,
@@ -211,7 +318,88 @@ def sortear_bombo_n(n_bombo,
             "conf": conf_sorteado
         }
 
-        print(f"{eq_sorteado} → Grupo {grupo_asignado}, slot {slot_sorteado}")
+        if c is not None:
+            c.registrar_bola(n_bombo, eq_sorteado, t_bola)
+            c.registrar_bombo(n_bombo, t_bola)
+
+        if eventos:
+            yield EquipoColocado(n_bombo, eq_sorteado, grupo_asignado, slot_sorteado, conf_sorteado, False)
 
     return grupos_dict, asignaciones_sorteo, bombos_slots
 
+
+def eventos_mundial(df_bombos, eventos=True, orden_bolas=None, factibilidad=lookahead, formato=WC2026):
+    #Sorteo completo: bombo 1 y luego el resto en orden. Devuelve (grupos_dict, asignaciones_sorteo)
+    grupos_dict, asignaciones_sorteo, bombos_slots = esqueleto_sorteo(formato)
+    yield from eventos_bombo_1(df_bombos, grupos_dict, asignaciones_sorteo, bombos_slots, eventos=eventos,
+                               orden_bolas=orden_bolas, formato=formato)
+    for n_bombo in range(2, formato.n_bombos + 1):
+        yield from eventos_bombo_n(n_bombo, df_bombos, bombos_slots, grupos_dict, asignaciones_sorteo,
+                                   eventos=eventos, orden_bolas=orden_bolas, factibilidad=factibilidad,
+                                   formato=formato)
+    return grupos_dict, asignaciones_sorteo
+
+
+#----Interfaz con prints (verbose) sobre los generadores----
+
+def sortear_bombo_1(df_bombos, verbose=True, formato=WC2026):
+    grupos_dict, asignaciones_sorteo, bombos_slots = esqueleto_sorteo(formato)
+    generador = eventos_bombo_1(df_bombos, grupos_dict, asignaciones_sorteo, bombos_slots, eventos=verbose,
+                                formato=formato)
+    return consumir(generador, imprimir_evento)
+
+
+def sortear_bombo_n(n_bombo,
+                    df_bombos,
+                    bombos_slots,
+                    grupos_dict,
+                    asignaciones_sorteo,
+                    verbose=True,
+                    formato=WC2026):
+    generador = eventos_bombo_n(n_bombo, df_bombos, bombos_slots, grupos_dict, asignaciones_sorteo,
+                                eventos=verbose, formato=formato)
+    return consumir(generador, imprimir_evento)
+
+
+def sortear_mundial(df_bombos, verbose=False, orden_bolas=None, factibilidad=lookahead, formato=WC2026):
+    return consumir(eventos_mundial(df_bombos, eventos=verbose, orden_bolas=orden_bolas, factibilidad=factibilidad,
+                                    formato=formato),
+                    imprimir_evento)
+
+
+def simular_sorteos(df_bombos, n_sorteos, seed=0, formato=WC2026):
+    """
+    Monte Carlo de sorteos completos. El sorteo i se siembra con seed + i, de modo que
+    dos llamadas con la misma seed comparten números aleatorios sorteo a sorteo.
+
+    Devuelve un dict con:
+    - 'n_sorteos'
+    - 'grupos': probabilidad de cada equipo (filas) de caer en cada grupo (columnas)
+    - 'rivales': probabilidad de que cada par de equipos comparta grupo
+    """
+    equipos = list(df_bombos['codigo'])
+    idx = {eq: i for i, eq in enumerate(equipos)}
+    grupos = formato.grupos
+    idx_grupo = {g: j for j, g in enumerate(grupos)}
+
+    conteo_grupos = np.zeros((len(equipos), len(grupos)), dtype=np.int64)
+    conteo_rivales = np.zeros((len(equipos), len(equipos)), dtype=np.int64)
+
+    for i in range(n_sorteos):
+        random.seed(seed + i)
+        np.random.seed(seed + i)
+        grupos_dict, _ = sortear_mundial(df_bombos, formato=formato)
+
+        for g, lst in grupos_dict.items():
+            miembros = [idx[e['codigo']] for e in lst]
+            conteo_grupos[miembros, idx_grupo[g]] += 1
+            conteo_rivales[np.ix_(miembros, miembros)] += 1
+
+    np.fill_diagonal(conteo_rivales, 0)
+
+    return {
+        'n_sorteos': n_sorteos,
+        'grupos': pd.DataFrame(conteo_grupos / n_sorteos, index=equipos, columns=grupos),
+        'rivales': pd.DataFrame(conteo_rivales / n_sorteos, index=equipos, columns=equipos),
+    }
+
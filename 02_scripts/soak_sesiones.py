@@ -0,0 +1,112 @@
+"""
+Prueba de resistencia (soak) del ciclo de vida de las sesiones de GUI_sorteo.
+
+Abre y cierra miles de sesiones simuladas en el mismo proceso, con el simulador de usuarios
+de NiceGUI (sin navegador ni servidor HTTP real). Cada sesión carga '/', arranca un sorteo
+animado (o uno rápido) y se cierra a mitad de animación, como una pestaña que se va. Tras
+cada lote se mide la RSS del proceso, las tareas de asyncio vivas y los clientes registrados.
+
+Termina con código 1 si, comparado con el primer lote (calentamiento), las tareas o los
+clientes crecen más que la tolerancia o la RSS crece más de --tolerancia-mb.
+
+Uso desde consola (desde la raíz del repo):
+    python 02_scripts/soak_sesiones.py --sesiones 2000 --lote 100
+"""
+
+import os
+import importlib
+import gc
+import sys
+import time
+import asyncio
+import argparse
+
+os.environ['NICEGUI_USER_SIMULATION'] = 'true'
+
+import httpx
+from nicegui import core, ui, Client
+from nicegui.testing.general import prepare_simulation
+from nicegui.testing.user import User
+
+# Solo por el efecto de importarlo: registra las páginas (@ui.page) de la GUI en la app
+importlib.import_module('GUI_sorteo')
+from metricas import rss_bytes
+
+
+async def abrir_y_cerrar(http, rapido, espera):
+    user = User(http)
+    cliente = await user.open('/')
+    user.find('Sorteo rápido' if rapido else 'Iniciar Sorteo').click()
+    await asyncio.sleep(espera)
+    # Equivale a cerrar la pestaña y agotar el timeout de reconexión
+    cliente.delete()
+
+
+def medir():
+    gc.collect()
+    return {
+        'rss_mb': rss_bytes() / 2**20,
+        'tareas': len(asyncio.all_tasks()),
+        'clientes': len(Client.instances),
+    }
+
+
+async def soak(n_sesiones, lote, espera, cada_rapido):
+    prepare_simulation()
+    ui.run(storage_secret='soak')
+    filas = []
+    async with core.app.router.lifespan_context(core.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(core.app), base_url='http://soak') as http:
+            t0 = time.perf_counter()
+            for inicio in range(0, n_sesiones, lote):
+                for k in range(inicio, min(inicio + lote, n_sesiones)):
+                    await abrir_y_cerrar(http, cada_rapido and k % cada_rapido == 0, espera)
+                # Deja terminar las cancelaciones antes de medir
+                await asyncio.sleep(0.05)
+                fila = {'sesiones': min(inicio + lote, n_sesiones), **medir()}
+                filas.append(fila)
+                print(f"{fila['sesiones']:>7} sesiones  RSS {fila['rss_mb']:8.1f} MB  "
+                      f"tareas {fila['tareas']:>5}  clientes {fila['clientes']:>5}  "
+                      f"({time.perf_counter() - t0:.0f} s)")
+    return filas
+
+
+def evaluar(filas, tolerancia_mb, tolerancia_tareas):
+    """Lista de fallos comparando la última medición contra el primer lote."""
+    base, final = filas[0], filas[-1]
+    fallos = []
+    if final['tareas'] - base['tareas'] > tolerancia_tareas:
+        fallos.append(f"tareas de asyncio: {base['tareas']} -> {final['tareas']}")
+    if final['clientes'] - base['clientes'] > tolerancia_tareas:
+        fallos.append(f"clientes vivos: {base['clientes']} -> {final['clientes']}")
+    if final['rss_mb'] - base['rss_mb'] > tolerancia_mb:
+        fallos.append(f"RSS: {base['rss_mb']:.1f} MB -> {final['rss_mb']:.1f} MB")
+    return fallos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test de sesiones de la GUI")
+    parser.add_argument('--sesiones', type=int, default=2000)
+    parser.add_argument('--lote', type=int, default=100, help="Sesiones entre mediciones")
+    parser.add_argument('--espera', type=float, default=0.02,
+                        help="Segundos que cada sesión deja correr el sorteo antes de cerrarse")
+    parser.add_argument('--cada-rapido', type=int, default=10,
+                        help="Una de cada N sesiones usa el sorteo rápido (0 = nunca)")
+    parser.add_argument('--tolerancia-mb', type=float, default=40.0)
+    parser.add_argument('--tolerancia-tareas', type=int, default=5)
+    args = parser.parse_args()
+
+    filas = asyncio.run(soak(args.sesiones, args.lote, args.espera, args.cada_rapido))
+    if len(filas) < 2:
+        print("Se necesitan al menos dos lotes para comparar.")
+        return
+
+    fallos = evaluar(filas, args.tolerancia_mb, args.tolerancia_tareas)
+    if fallos:
+        print("\nFUGA DETECTADA:\n  " + "\n  ".join(fallos))
+        sys.exit(1)
+    print("\nRSS, tareas y clientes estables.")
+
+
+if __name__ == "__main__":
+    main()
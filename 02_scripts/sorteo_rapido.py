@@ -0,0 +1,259 @@
+"""
+Motor de sorteo rápido sobre enteros (sin pandas).
+
+Reproduce el procedimiento de `simular_sorteo_func` (bombo 1 con anfitriones fijos, bombos 2-4
+asignando cada bolita al primer grupo válido en orden A→L con lookahead) pero sobre listas de
+enteros:
+- Equipos, grupos y confederaciones se indexan con enteros (`TablaSorteo`).
+- El estado de un sorteo es `conteo[g][c]` (equipos de la confederación c en el grupo g),
+  `tamano[g]` y los slots libres de cada grupo.
+- El lookahead es exacto y no recursivo: los equipos restantes de un bombo solo se distinguen
+  por su confederación, así que la factibilidad se decide con la condición de Hall sobre los
+  subconjuntos de confederaciones (como mucho 2^6 - 1 comprobaciones con máscaras de bits).
+
+Los sorteos se codifican igual que en `almacen_resultados`: `grupo * 4 + slot` (en general,
+`grupo * slots_por_grupo + slot`). Grupos, bombos, anfitriones y cupos salen del `FormatoTorneo`
+de la tabla (por defecto el del 2026).
+"""
+
+import random
+
+import numpy as np
+
+from simular_bombos import df_bombos, CONFEDERACIONES, CONFEDERACIONES_ORDEN
+from formato_torneo import WC2026
+
+#Constantes del 2026, para los módulos que solo trabajan con ese formato
+GRUPOS = WC2026.grupos  # A-L
+SLOTS_POR_GRUPO = WC2026.slots_por_grupo
+ANFITRIONES = WC2026.anfitriones
+#Máximo de equipos por confederación en un grupo (1 si no aparece)
+MAXIMO_POR_GRUPO = WC2026.maximo_por_grupo
+
+
+class TablaSorteo:
+    """
+    Datos de un df_bombos convertidos a enteros para el motor rápido.
+    El índice de cada equipo es su fila en df_bombos; el orden dentro de cada bombo también.
+    """
+    def __init__(self, df_bombos=df_bombos, formato=WC2026):
+        self.formato = formato
+        self.grupos = formato.grupos
+        self.slots_por_grupo = formato.slots_por_grupo
+        self.n_bombos = formato.n_bombos
+        self.equipos = list(df_bombos['codigo'])
+        self.idx = {eq: i for i, eq in enumerate(self.equipos)}
+        self.n_equipos = len(self.equipos)
+        self.n_grupos = formato.n_grupos
+        self.n_conf = len(CONFEDERACIONES_ORDEN)
+        self.conf = [CONFEDERACIONES_ORDEN.index(CONFEDERACIONES[eq]) for eq in self.equipos]
+        self.cupo = [formato.cupo(c) for c in CONFEDERACIONES_ORDEN]
+        self.bombo = [int(b) for b in df_bombos['bombo']]
+        self.bombos = {b: [i for i in range(self.n_equipos) if self.bombo[i] == b]
+                       for b in range(1, self.n_bombos + 1)}
+        self.anfitriones = {
+            self.idx[eq]: (self.grupos.index(slot[0]), int(slot[1:]) - 1)
+            for eq, slot in formato.anfitriones.items() if eq in self.idx
+        }
+
+
+def factible(confs_restantes, n_bombo, tamano, conteo, cupo, n_conf):
+    """
+    ¿Se pueden colocar los equipos restantes del bombo (dados por su confederación) en los
+    grupos que aún no tienen equipo de este bombo?
+
+    Condición de Hall: para todo subconjunto S de confederaciones presentes, el número de
+    equipos de S no supera el número de grupos abiertos que aceptan alguna confederación de S.
+    """
+    demanda = [0] * n_conf
+    for c in confs_restantes:
+        demanda[c] += 1
+
+    #Máscara de grupos abiertos que aceptan cada confederación
+    presentes = []
+    for c in range(n_conf):
+        if demanda[c]:
+            mascara = 0
+            for g in range(len(tamano)):
+                if tamano[g] < n_bombo and conteo[g][c] < cupo[c]:
+                    mascara |= 1 << g
+            if mascara.bit_count() < demanda[c]:
+                return False
+            presentes.append((demanda[c], mascara))
+
+    k = len(presentes)
+    for subconjunto in range(3, 1 << k):
+        if subconjunto & (subconjunto - 1) == 0:
+            continue  # los subconjuntos de un elemento ya se revisaron arriba
+        total = 0
+        union = 0
+        for j in range(k):
+            if subconjunto >> j & 1:
+                total += presentes[j][0]
+                union |= presentes[j][1]
+        if union.bit_count() < total:
+            return False
+    return True
+
+
+def sortear(tabla, rng):
+    """
+    Un sorteo completo con el procedimiento FIFA (primer grupo válido en orden A→L).
+
+    Returns:
+        (grupo_de, slot_de): listas indexadas por equipo con el grupo (0-11) y el slot (0-3).
+    """
+    return completar(tabla, [-1] * tabla.n_equipos, [-1] * tabla.n_equipos, rng)
+
+
+def _tamano_hasta(tabla, grupo_de, n):
+    """Equipos de los bombos 1..n ya colocados en cada grupo (los fijados de bombos posteriores no cuentan)."""
+    tamano = [0] * tabla.n_grupos
+    for i, g in enumerate(grupo_de):
+        if g >= 0 and tabla.bombo[i] <= n:
+            tamano[g] += 1
+    return tamano
+
+
+def completar(tabla, grupo_de, slot_de, rng):
+    """
+    Termina un sorteo a medias con el mismo procedimiento que `sortear` (que es el caso sin
+    ningún equipo colocado). `grupo_de`/`slot_de` usan -1 para los equipos aún sin grupo y
+    no se modifican.
+
+    El estado a medias puede ser uno por el que pasa el procedimiento (bombos anteriores
+    completos y, en el bombo en curso, cada grupo con a lo sumo un equipo de ese bombo) o tener
+    además equipos fijados a mano en cualquier bombo (`fijaciones`): cuentan para los cupos
+    desde el principio y su bombo se sortea sin ellos. En ese caso las cabezas de serie del
+    bombo 1 también respetan cupos y la condición de Hall, y el sorteo puede quedar sin grupo
+    válido en un bombo posterior (ValueError).
+
+    Returns:
+        (grupo_de, slot_de) del sorteo completo.
+    """
+    n_grupos = tabla.n_grupos
+    conf = tabla.conf
+    cupo = tabla.cupo
+    n_conf = tabla.n_conf
+
+    grupo_de = list(grupo_de)
+    slot_de = list(slot_de)
+    conteo = [[0] * n_conf for _ in range(n_grupos)]
+    slots_libres = [list(range(tabla.slots_por_grupo)) for _ in range(n_grupos)]
+    for i in range(tabla.n_equipos):
+        if grupo_de[i] >= 0:
+            g = grupo_de[i]
+            conteo[g][conf[i]] += 1
+            slots_libres[g].remove(slot_de[i])
+
+    # --- BOMBO 1: anfitriones fijos y el resto a los grupos libres en orden ---
+    for i, (g, s) in tabla.anfitriones.items():
+        if grupo_de[i] >= 0:
+            continue
+        grupo_de[i], slot_de[i] = g, s
+        conteo[g][conf[i]] += 1
+        slots_libres[g].remove(s)
+
+    tamano = _tamano_hasta(tabla, grupo_de, 1)
+    restantes = [i for i in tabla.bombos[1] if grupo_de[i] < 0]
+    #Sin fijados de otros bombos, cualquier cabeza de serie entra en cualquier grupo libre
+    fijados_despues = any(g >= 0 and tabla.bombo[i] > 1 for i, g in enumerate(grupo_de))
+    for g in range(n_grupos):
+        if tamano[g] or not restantes:
+            continue
+        if fijados_despues:
+            validos = [k for k in range(len(restantes)) if _cabeza_valida(k, g, restantes, tabla, tamano, conteo)]
+            if not validos:
+                raise ValueError(f"No hay cabeza de serie válida para el grupo {tabla.grupos[g]}. Revisa constraints!")
+            i = restantes.pop(validos[rng.randrange(len(validos))])
+        else:
+            i = restantes.pop(rng.randrange(len(restantes)))
+        grupo_de[i], slot_de[i] = g, 0
+        conteo[g][conf[i]] += 1
+        tamano[g] += 1
+        slots_libres[g].remove(0)
+
+    # --- BOMBOS 2 EN ADELANTE ---
+    for n in range(2, tabla.n_bombos + 1):
+        tamano = _tamano_hasta(tabla, grupo_de, n)
+        bolas = [i for i in tabla.bombos[n] if grupo_de[i] < 0]
+        while bolas:
+            i = bolas.pop(rng.randrange(len(bolas)))
+            c = conf[i]
+            confs_restantes = [conf[j] for j in bolas]
+
+            grupo_asignado = -1
+            for g in range(n_grupos):
+                if tamano[g] >= n or conteo[g][c] >= cupo[c]:
+                    continue
+                conteo[g][c] += 1
+                tamano[g] += 1
+                ok = factible(confs_restantes, n, tamano, conteo, cupo, n_conf)
+                conteo[g][c] -= 1
+                tamano[g] -= 1
+                if ok:
+                    grupo_asignado = g
+                    break
+
+            if grupo_asignado < 0:
+                raise ValueError(f"No hay grupo válido para {tabla.equipos[i]}. Revisa constraints!")
+
+            libres = slots_libres[grupo_asignado]
+            s = libres.pop(rng.randrange(len(libres)))
+            grupo_de[i], slot_de[i] = grupo_asignado, s
+            conteo[grupo_asignado][c] += 1
+            tamano[grupo_asignado] += 1
+
+    return grupo_de, slot_de
+
+
+def _cabeza_valida(k, g, restantes, tabla, tamano, conteo):
+    """¿Puede la cabeza de serie restantes[k] ir al grupo g sin dejar al resto del bombo 1 sin lugar?"""
+    i = restantes[k]
+    c = tabla.conf[i]
+    if conteo[g][c] >= tabla.cupo[c]:
+        return False
+    conteo[g][c] += 1
+    tamano[g] += 1
+    ok = factible([tabla.conf[j] for j in restantes if j != i], 1, tamano, conteo, tabla.cupo, tabla.n_conf)
+    conteo[g][c] -= 1
+    tamano[g] -= 1
+    return ok
+
+
+def desde_grupos_dict(tabla, grupos_dict):
+    """(grupo_de, slot_de) de un `grupos_dict` del repo, con -1 para los equipos sin grupo."""
+    grupo_de = [-1] * tabla.n_equipos
+    slot_de = [-1] * tabla.n_equipos
+    for grupo, equipos in grupos_dict.items():
+        for e in equipos:
+            i = tabla.idx[e['codigo']]
+            grupo_de[i] = tabla.grupos.index(grupo)
+            slot_de[i] = int(e['slot'][1:]) - 1
+    return grupo_de, slot_de
+
+
+def sortear_lote(tabla, n_sorteos, seed=0):
+    """
+    `n_sorteos` sorteos (el i-ésimo sembrado con seed + i) codificados como
+    int8 `grupo * 4 + slot`, con forma (n_equipos, n_sorteos) como en `almacen_resultados`.
+    """
+    salida = np.empty((tabla.n_equipos, n_sorteos), dtype=np.int8)
+    for k in range(n_sorteos):
+        grupo_de, slot_de = sortear(tabla, random.Random(seed + k))
+        salida[:, k] = [g * tabla.slots_por_grupo + s for g, s in zip(grupo_de, slot_de)]
+    return salida
+
+
+def a_grupos_dict(tabla, grupo_de, slot_de):
+    """Convierte un sorteo del motor rápido al formato (grupos_dict, asignaciones_sorteo) del repo."""
+    grupos_dict = {g: [] for g in tabla.grupos}
+    asignaciones_sorteo = {}
+    for i, eq in enumerate(tabla.equipos):
+        if grupo_de[i] < 0:
+            continue
+        grupo = tabla.grupos[grupo_de[i]]
+        info = {"grupo": grupo, "slot": f"{grupo}{slot_de[i] + 1}", "conf": CONFEDERACIONES[eq]}
+        asignaciones_sorteo[eq] = info
+        grupos_dict[grupo].append({"codigo": eq, "slot": info["slot"], "conf": info["conf"]})
+    return grupos_dict, asignaciones_sorteo